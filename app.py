@@ -1,13 +1,11 @@
 # app.py
 import streamlit as st
-import streamlit_pills as stp
-import pandas as pd
 from src import database
+from src import config_app
 # from src import database # Mantenha para suas funções de BD
+# pandas e streamlit_pills são importados só nas páginas que os usam (primeira execução mais rápida)
 
 import streamlit_authenticator as stauth # Biblioteca de autenticação
-import yaml
-from yaml.loader import SafeLoader # Para carregar o YAML de forma segura
 
 # --- Configuração da Página (DEVE SER A PRIMEIRA CHAMADA DO STREAMLIT) ---
 st.set_page_config(
@@ -17,9 +15,9 @@ st.set_page_config(
 )
 
 # --- 1. Carregar Configurações do Autenticador ---
+# Lido uma vez por processo (e de novo só se o arquivo mudar), já com as senhas em hash
 try:
-    with open('config.yaml', 'r', encoding='utf-8') as file: # Adicionado encoding='utf-8'
-        config = yaml.load(file, Loader=SafeLoader)
+    config = config_app.carregar_config('config.yaml')
 except FileNotFoundError:
     st.error("ERRO CRÍTICO: Arquivo de configuração 'config.yaml' não encontrado. "
              "Crie este arquivo no mesmo diretório do app.py conforme a documentação.")
@@ -28,8 +26,13 @@ except Exception as e:
     st.error(f"Erro ao carregar o arquivo config.yaml: {e}")
     st.stop()
 
+# Perfil de PRAGMAs/pool do SQLite (seção 'database' do config.yaml, opcional)
+database.configurar_banco(config.get('database'))
+
+# O Authenticate é criado a cada execução porque o gerenciador de cookies dele lê os
+# cookies da sessão só no construtor; com as senhas já em hash, isso fica barato.
 authenticator = stauth.Authenticate(
-    config['credentials'],
+    config_app.credenciais_da_sessao(config),
     config['cookie']['name'],
     config['cookie']['key'],
     config['cookie']['expiry_days']
@@ -68,6 +71,7 @@ if st.session_state["authentication_status"]:
         st.markdown("---")
 
     # --- Menu de Navegação com Pills (Área Principal) ---
+    import streamlit_pills as stp # Só depois do login
     opcoes_menu_base = ["Dashboard", "Clientes", "Treinos", "Pagamentos"]
     icones_menu_base = ["🏠", "👥", "🏋️", "💳"]
     
@@ -114,6 +118,7 @@ if st.session_state["authentication_status"]:
         # except Exception as e:
         #     st.error(f"Erro ao carregar dados para o dashboard: {e}")
     elif pagina_atual == "Clientes":
+        import pandas as pd # Importação adiada: o Dashboard não usa pandas
         st.title("👨‍💻 Gestão de Clientes")
         st.markdown("Gerencie os clientes da sua academia: visualize, adicione e veja seus planos.")
 
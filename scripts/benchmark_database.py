@@ -0,0 +1,278 @@
+"""
+Benchmark de todas as funções públicas de src/database.py.
+
+Uso:
+  python scripts/benchmark_database.py                                  # escalas minima e pequena
+  python scripts/benchmark_database.py --escalas pequena media --saida bench.json
+  python scripts/benchmark_database.py --salvar-baseline bench_base.json
+  python scripts/benchmark_database.py --baseline bench_base.json --limite 0.25
+
+Para cada escala, um banco temporário é gerado com gerar_dados_sinteticos.py
+(o academia.db não é tocado) e cada função é medida: latência p50/p95/p99,
+linhas/s e pico de memória (tracemalloc, numa execução à parte). Com --baseline,
+o p50 de cada caso é comparado com o armazenado e o script termina com código 1
+se algum ficar mais lento que o limite.
+"""
+import io
+import os
+import sys
+import json
+import asyncio
+import contextlib
+import time
+import sqlite3
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, SCRIPT_DIR)
+from src import database
+from gerar_dados_sinteticos import ESCALAS, gerar_blocos, gravar_sqlite
+
+# Funções públicas que configuram ou inspecionam o módulo, sem consultar dados
+NAO_MEDIDAS = {
+    "configurar_banco", "conectar_bd", "get_pool", "configurar_pool", "conexao_bd", "get_pool_stats",
+    "invalidar_tabelas", "limpar_cache", "get_cache_stats", "ativar_group_commit", "desativar_group_commit",
+    "get_group_commit_stats", "configurar_instrumentacao", "get_config_instrumentacao", "get_query_stats",
+    "get_slow_queries", "limpar_query_stats", "registrar_observador_consultas",
+    "configurar_leitura", "conectar_bd_leitura", "get_pool_leitura", "conexao_leitura", "get_versoes_tabelas",
+}
+QUERY_PAGAMENTOS_RECENTES = "SELECT cliente_id, data_pagamento, valor, pago FROM pagamentos WHERE data_pagamento >= ?"
+
+def _casos(ctx):
+    """
+    (nome, função). `ctx` traz ids válidos no banco da escala atual.
+    Leituras vêm antes das escritas, para que todas meçam o mesmo banco.
+    """
+    contador = iter(range(10**9))
+    exercicios = [{"exercicio_id": (i % 7) + 1, "series": "3", "repeticoes": "12", "ordem": i + 1} for i in range(6)]
+    cliente, instrutor = ctx["cliente_id"], ctx["instrutor_id"]
+    return [
+        ("get_active_pragmas", lambda: database.get_active_pragmas()),
+        ("aplicar_migracoes", lambda: database.aplicar_migracoes()),
+        ("fetch_columns", lambda: database.fetch_columns(QUERY_PAGAMENTOS_RECENTES, ("2025-06-01",))),
+        ("fetch_frame", lambda: database.fetch_frame(QUERY_PAGAMENTOS_RECENTES, ("2025-06-01",))),
+        ("verificar_planos_de_consulta", lambda: database.verificar_planos_de_consulta(cliente, instrutor)),
+        ("get_all_clients", database.get_all_clients),
+        ("fulltext_search_clients", lambda: database.fulltext_search_clients("silva")),
+        ("search_clients", lambda: database.search_clients("silva", page_size=50)),
+        ("search_clients (sem termo, página 20)", lambda: database.search_clients(page=20)),
+        ("get_all_instructors", database.get_all_instructors),
+        ("get_all_plans", database.get_all_plans),
+        ("get_all_exercises", database.get_all_exercises),
+        ("get_all_exercises_frame", database.get_all_exercises_frame),
+        ("count_workouts", lambda: database.count_workouts(cliente_id=cliente)),
+        ("get_workouts_with_exercises (cliente)", lambda: database.get_workouts_with_exercises(cliente_id=cliente)),
+        ("get_workouts_with_exercises (página)", lambda: database.get_workouts_with_exercises(limit=50)),
+        ("get_pagamentos_by_client_id", lambda: database.get_pagamentos_by_client_id(cliente)),
+        ("get_pagamentos_by_client_id_frame", lambda: database.get_pagamentos_by_client_id_frame(cliente)),
+        ("get_clients_with_current_plan_info", database.get_clients_with_current_plan_info),
+        ("get_clients_with_current_plan_info_frame", database.get_clients_with_current_plan_info_frame),
+        ("get_payment_stats_bulk (todos)", database.get_payment_stats_bulk),
+        ("get_payment_stats_bulk (100 ids)", lambda: database.get_payment_stats_bulk(ctx["cem_clientes"])),
+        ("get_payment_stats_for_client", lambda: database.get_payment_stats_for_client(cliente)),
+        ("get_active_client_count_per_instructor", database.get_active_client_count_per_instructor),
+        ("get_all_clients_for_select", database.get_all_clients_for_select),
+        ("get_all_instructors_for_select", database.get_all_instructors_for_select),
+        ("get_all_plans_for_select", database.get_all_plans_for_select),
+        ("get_all_exercises_for_select", database.get_all_exercises_for_select),
+        ("get_all_treinos_for_select", database.get_all_treinos_for_select),
+        ("count_total_clientes", database.count_total_clientes),
+        ("count_total_instrutores", database.count_total_instrutores),
+        ("count_clientes_por_plano", database.count_clientes_por_plano),
+        ("count_pagamentosn", database.count_pagamentosn),
+        ("get_dashboard_summary", database.get_dashboard_summary),
+        ("submit_read", lambda: database.submit_read(database.count_total_clientes).result()),
+        ("fetch_concurrently (cards do Dashboard)", lambda: database.fetch_concurrently({
+            "total_clientes": database.count_total_clientes, "total_instrutores": database.count_total_instrutores,
+            "por_plano": database.count_clientes_por_plano, "pendentes": database.count_pagamentosn,
+        })),
+        ("fetch_async", lambda: asyncio.run(database.fetch_async(database.get_payment_stats_for_client, cliente))),
+        ("reconstruir_dashboard_stats", database.reconstruir_dashboard_stats),
+        ("reconstruir_ultimo_treino", database.reconstruir_ultimo_treino),
+        ("add_client", lambda: database.add_client("Cliente Bench", f"bench{next(contador)}@exemplo.com")),
+        ("add_instructor", lambda: database.add_instructor(f"Instrutor Bench {next(contador)}", "Musculação")),
+        ("add_plan", lambda: database.add_plan(f"Plano Bench {next(contador)}", 150.0, 6)),
+        ("add_exercise", lambda: database.add_exercise(f"Exercício Bench {next(contador)}", "Core")),
+        ("add_treino", lambda: database.add_treino("Treino Bench", "2025-06-30", cliente_id=cliente)),
+        ("add_exercise_to_treino", lambda: database.add_exercise_to_treino(ctx["treino_id"], 1, "3", "12")),
+        ("save_treino_with_exercises",
+         lambda: database.save_treino_with_exercises("Treino Bench", "2025-06-30", exercicios, cliente_id=cliente)),
+        ("add_pagamento", lambda: database.add_pagamento(cliente, "2025-06-30", 100.0, 0)),
+        ("submit_write", lambda: _submit_write("UPDATE pagamentos SET pago = 1 WHERE id = ?", (ctx["pagamento_id"],))),
+    ]
+
+def _submit_write(query, params):
+    database.ativar_group_commit() # Não faz nada se já estiver ativo
+    return database.submit_write(query, params).result()
+
+def _linhas(resultado):
+    if isinstance(resultado, (list, tuple, pd.DataFrame)):
+        return len(resultado)
+    if isinstance(resultado, dict):
+        if "clientes" in resultado: # search_clients
+            return len(resultado["clientes"])
+        colunas = [v for v in resultado.values() if isinstance(v, (list, tuple))] # fetch_columns: uma tupla por coluna
+        return len(colunas[0]) if colunas else 1
+    return 1 if resultado is not None else 0
+
+def medir_caso(funcao, repeticoes, tempo_max_s):
+    """Executa `funcao` até `repeticoes` vezes (no mínimo 3, parando após `tempo_max_s`)."""
+    with contextlib.redirect_stdout(io.StringIO()): # As funções avisam erros com print()
+        return _medir_caso(funcao, repeticoes, tempo_max_s)
+
+def _medir_caso(funcao, repeticoes, tempo_max_s):
+    funcao() # Aquece o cache de páginas do SQLite e o pool
+    latencias = []
+    linhas = 0
+    inicio = time.perf_counter()
+    while len(latencias) < repeticoes and (len(latencias) < 3 or time.perf_counter() - inicio < tempo_max_s):
+        database.limpar_cache() # Mede a consulta, não o cache de resultados
+        t0 = time.perf_counter()
+        linhas = _linhas(funcao())
+        latencias.append(time.perf_counter() - t0)
+
+    database.limpar_cache()
+    tracemalloc.start()
+    funcao()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    p50, p95, p99 = np.percentile(latencias, [50, 95, 99])
+    return {
+        "execucoes": len(latencias),
+        "linhas": linhas,
+        "p50_ms": p50 * 1000,
+        "p95_ms": p95 * 1000,
+        "p99_ms": p99 * 1000,
+        "linhas_por_s": linhas / p50 if p50 > 0 else 0.0,
+        "pico_memoria_mb": pico / 1e6,
+    }
+
+def _contexto(caminho):
+    conn = sqlite3.connect(caminho)
+    try:
+        # Cliente com mais pagamentos: o pior caso das consultas por cliente
+        cliente_id = conn.execute(
+            "SELECT cliente_id FROM pagamentos GROUP BY cliente_id ORDER BY COUNT(*) DESC LIMIT 1"
+        ).fetchone()[0]
+        return {
+            "cliente_id": cliente_id,
+            "instrutor_id": conn.execute("SELECT instrutor_id FROM clientes WHERE id = ?", (cliente_id,)).fetchone()[0],
+            "treino_id": conn.execute("SELECT MAX(id) FROM treinos").fetchone()[0],
+            "pagamento_id": conn.execute("SELECT MAX(id) FROM pagamentos").fetchone()[0],
+            "cem_clientes": [row[0] for row in conn.execute("SELECT id FROM clientes ORDER BY id LIMIT 100")],
+        }
+    finally:
+        conn.close()
+
+def verificar_cobertura(nomes_medidos):
+    """Funções públicas de database.py sem caso de benchmark (para não esquecer as novas)."""
+    publicas = {
+        nome for nome, obj in vars(database).items()
+        if callable(obj) and not nome.startswith("_") and getattr(obj, "__module__", None) == database.__name__
+        and not isinstance(obj, type)
+    }
+    return sorted(publicas - NAO_MEDIDAS - {nome.split(" ")[0] for nome in nomes_medidos})
+
+def rodar(escalas, repeticoes, tempo_max_s, semente, pasta):
+    resultados = {}
+    for escala in escalas:
+        caminho = os.path.join(pasta, f"bench_{escala}_{semente}.db")
+        if not os.path.exists(caminho):
+            print(f"\nGerando banco da escala '{escala}' ({ESCALAS[escala]['clientes']} clientes)...")
+            gravar_sqlite(gerar_blocos(ESCALAS[escala]["clientes"], ESCALAS[escala]["pagamentos"], semente), caminho)
+        # As escritas alteram o banco: cada rodada mede uma cópia do banco gerado
+        copia = os.path.join(pasta, f"bench_{escala}_rodada.db")
+        with sqlite3.connect(caminho) as origem, sqlite3.connect(copia) as destino:
+            origem.backup(destino)
+        database.DB_NAME = copia
+        database.limpar_cache()
+
+        print(f"\n=== Escala '{escala}' ===")
+        print(f"{'Função':<46}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'linhas':>9}{'linhas/s':>12}{'pico MB':>9}")
+        resultados[escala] = {}
+        for nome, funcao in _casos(_contexto(copia)):
+            r = medir_caso(funcao, repeticoes, tempo_max_s)
+            resultados[escala][nome] = r
+            print(f"{nome:<46}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}"
+                  f"{r['linhas']:>9}{r['linhas_por_s']:>12.0f}{r['pico_memoria_mb']:>9.1f}")
+        database.desativar_group_commit()
+        database.get_pool().fechar_todas()
+        os.remove(copia)
+    return resultados
+
+def comparar(atual, baseline, limite, limite_memoria, tolerancia_ms):
+    """Lista de regressões (escala, caso, métrica, antes, depois) acima dos limites."""
+    regressoes = []
+    for escala, casos in atual.items():
+        for nome, r in casos.items():
+            base = baseline.get(escala, {}).get(nome)
+            if not base:
+                continue
+            if r["p50_ms"] > base["p50_ms"] * (1 + limite) and r["p50_ms"] - base["p50_ms"] > tolerancia_ms:
+                regressoes.append((escala, nome, "p50_ms", base["p50_ms"], r["p50_ms"]))
+            if limite_memoria is not None and r["pico_memoria_mb"] > base["pico_memoria_mb"] * (1 + limite_memoria) \
+                    and r["pico_memoria_mb"] - base["pico_memoria_mb"] > 1:
+                regressoes.append((escala, nome, "pico_memoria_mb", base["pico_memoria_mb"], r["pico_memoria_mb"]))
+    return regressoes
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark das funções de src/database.py.")
+    parser.add_argument('--escalas', nargs='+', choices=ESCALAS, default=["minima", "pequena"])
+    parser.add_argument('--repeticoes', type=int, default=30, help="Execuções por função (máximo).")
+    parser.add_argument('--tempo-max', type=float, default=3.0, help="Segundos por função antes de parar de repetir.")
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--pasta-bancos', help="Guarda os bancos gerados aqui para reaproveitar entre execuções.")
+    parser.add_argument('--saida', help="Grava os resultados neste JSON.")
+    parser.add_argument('--salvar-baseline', metavar='ARQUIVO', help="Grava os resultados como baseline.")
+    parser.add_argument('--baseline', metavar='ARQUIVO', help="Compara com este baseline.")
+    parser.add_argument('--limite', type=float, default=0.20, help="Regressão tolerada no p50 (0.20 = 20%%).")
+    parser.add_argument('--limite-memoria', type=float, default=None, help="Regressão tolerada no pico de memória.")
+    parser.add_argument('--tolerancia-ms', type=float, default=0.5, help="Diferenças de p50 abaixo disso são ruído.")
+    args = parser.parse_args()
+
+    faltando = verificar_cobertura(nome for nome, _ in _casos({"cliente_id": 1, "instrutor_id": 1, "treino_id": 1,
+                                                                  "pagamento_id": 1, "cem_clientes": []}))
+    if faltando:
+        print(f"AVISO: funções sem caso de benchmark: {', '.join(faltando)}")
+
+    with tempfile.TemporaryDirectory() as pasta_temp:
+        pasta = args.pasta_bancos or pasta_temp
+        os.makedirs(pasta, exist_ok=True)
+        resultados = rodar(args.escalas, args.repeticoes, args.tempo_max, args.semente, pasta)
+
+    documento = {
+        "meta": {
+            "data": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "maquina": platform.platform(),
+            "semente": args.semente,
+            "escalas": {escala: ESCALAS[escala] for escala in args.escalas},
+        },
+        "resultados": resultados,
+    }
+    for destino in filter(None, (args.saida, args.salvar_baseline)):
+        with open(destino, "w", encoding="utf-8") as f:
+            json.dump(documento, f, ensure_ascii=False, indent=2)
+        print(f"\nResultados gravados em '{destino}'.")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["resultados"]
+        regressoes = comparar(resultados, baseline, args.limite, args.limite_memoria, args.tolerancia_ms)
+        if regressoes:
+            print(f"\nREGRESSÕES em relação a '{args.baseline}':")
+            for escala, nome, metrica, antes, depois in regressoes:
+                print(f"  [{escala}] {nome}: {metrica} {antes:.2f} -> {depois:.2f} ({depois / antes - 1:+.0%})")
+            sys.exit(1)
+        print(f"\nSem regressões acima de {args.limite:.0%} em relação a '{args.baseline}'.")
@@ -0,0 +1,76 @@
+"""
+Compara pd.DataFrame(_fetch_all(...)) com database.fetch_frame(...) em tempo e pico de memória.
+
+Uso: python scripts/benchmark_fetch_frame.py [numero_de_linhas]
+Cria um banco temporário com clientes e pagamentos sintéticos; o academia.db não é tocado.
+"""
+import os
+import sys
+import random
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, SCRIPT_DIR)
+from src import database
+from setup_database import criar_tabelas
+
+def popular_banco(caminho, n_linhas):
+    conn = sqlite3.connect(caminho)
+    criar_tabelas(conn)
+    rng = random.Random(42)
+    conn.executemany("INSERT INTO planos (nome, preco_mensal, duracao_meses) VALUES (?, ?, ?)",
+                     [("Básico", 100.0, 3), ("Premium", 200.0, 6), ("VIP", 300.0, 12)])
+    conn.executemany("INSERT INTO clientes (nome, idade, sexo, email, telefone, plano_id) VALUES (?, ?, ?, ?, ?, ?)",
+                     ((f"Cliente {i}", rng.randint(16, 80), rng.choice("MF"), f"cliente{i}@exemplo.com",
+                       f"(11) 9{i:08d}", rng.randint(1, 3)) for i in range(n_linhas)))
+    # Todos os pagamentos no cliente 1 para que get_pagamentos_by_client_id devolva n_linhas
+    conn.executemany("INSERT INTO pagamentos (cliente_id, data_pagamento, valor, pago) VALUES (?, ?, ?, ?)",
+                     ((1, f"20{rng.randint(10, 25)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                       rng.choice((100.0, 200.0, 300.0)), rng.randint(0, 1)) for _ in range(n_linhas)))
+    conn.commit()
+    conn.close()
+
+def medir(funcao):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    df = funcao()
+    duracao = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return duracao, pico, len(df)
+
+if __name__ == '__main__':
+    n_linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    with tempfile.TemporaryDirectory() as pasta:
+        database.DB_NAME = os.path.join(pasta, 'benchmark.db')
+        print(f"Populando banco temporário com {n_linhas} clientes e {n_linhas} pagamentos...")
+        popular_banco(database.DB_NAME, n_linhas)
+        database.get_pool() # Aplica as migrações (índices) antes das medições
+
+        casos = [
+            ("clientes + plano atual",
+             lambda: pd.DataFrame(database.get_clients_with_current_plan_info()),
+             database.get_clients_with_current_plan_info_frame),
+            ("pagamentos de um cliente",
+             lambda: pd.DataFrame(database.get_pagamentos_by_client_id(1)),
+             lambda: database.get_pagamentos_by_client_id_frame(1)),
+        ]
+        print(f"\n{'Consulta':<28}{'Método':<14}{'Linhas':>10}{'Tempo (s)':>12}{'Pico (MB)':>12}")
+        for nome, via_dicts, via_frame in casos:
+            resultados = {}
+            for metodo, funcao in (("dicts", via_dicts), ("fetch_frame", via_frame)):
+                funcao() # Aquece o cache de páginas do SQLite
+                duracao, pico, linhas = medir(funcao)
+                resultados[metodo] = (duracao, pico)
+                print(f"{nome:<28}{metodo:<14}{linhas:>10}{duracao:>12.3f}{pico / 1e6:>12.1f}")
+            t_dicts, m_dicts = resultados["dicts"]
+            t_frame, m_frame = resultados["fetch_frame"]
+            print(f"{'':<28}{'economia':<14}{'':>10}{1 - t_frame / t_dicts:>11.0%} {1 - m_frame / m_dicts:>11.0%}")
+        database.get_pool().fechar_todas()
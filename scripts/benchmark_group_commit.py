@@ -0,0 +1,62 @@
+"""
+Compara a vazão de escritas concorrentes com commits diretos e com group commit.
+
+Uso: python scripts/benchmark_group_commit.py [threads] [escritas_por_thread] [atraso_max_ms]
+Cada thread simula um atendente registrando pagamentos via database.add_pagamento.
+Usa um banco temporário; o academia.db não é tocado.
+"""
+import os
+import sys
+import sqlite3
+import tempfile
+import threading
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, SCRIPT_DIR)
+from src import database
+from setup_database import criar_tabelas
+
+def rodar_carga(n_threads, escritas_por_thread):
+    def atendente(numero):
+        for i in range(escritas_por_thread):
+            database.add_pagamento(numero + 1, "2025-01-01", 100.0 + i, 1)
+
+    threads = [threading.Thread(target=atendente, args=(n,)) for n in range(n_threads)]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - inicio
+
+if __name__ == '__main__':
+    n_threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    escritas_por_thread = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    atraso_max_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 0
+    total = n_threads * escritas_por_thread
+
+    with tempfile.TemporaryDirectory() as pasta:
+        database.DB_NAME = os.path.join(pasta, 'benchmark.db')
+        conn = sqlite3.connect(database.DB_NAME)
+        criar_tabelas(conn)
+        conn.close()
+
+        print(f"\n{n_threads} threads x {escritas_por_thread} escritas ({total} no total), atraso máximo {atraso_max_ms} ms")
+        # synchronous=FULL faz um fsync por commit: é onde agrupar commits mais compensa
+        for synchronous in ("NORMAL", "FULL"):
+            database.configurar_banco({"pool_tamanho": n_threads, "pragmas": {"synchronous": synchronous}})
+            print(f"\nsynchronous={synchronous}")
+            duracao_direto = rodar_carga(n_threads, escritas_por_thread)
+            print(f"  Direto:       {duracao_direto:7.2f} s  {total / duracao_direto:9.0f} escritas/s")
+
+            database.ativar_group_commit(atraso_max_ms=atraso_max_ms, lote_max=200)
+            duracao_gc = rodar_carga(n_threads, escritas_por_thread)
+            stats = database.get_group_commit_stats()
+            database.desativar_group_commit()
+            print(f"  Group commit: {duracao_gc:7.2f} s  {total / duracao_gc:9.0f} escritas/s"
+                  f"  ({stats['lotes']} commits, {stats['operacoes_por_lote']:.1f} escritas por commit, {stats['erros']} erros)")
+            print(f"  Ganho: {duracao_direto / duracao_gc:.1f}x")
+        database.get_pool().fechar_todas()
@@ -0,0 +1,109 @@
+"""
+Tempo de inicialização e de cada execução (rerun) do app Streamlit.
+
+Uso:
+  python scripts/benchmark_inicializacao.py
+  python scripts/benchmark_inicializacao.py --reruns 200 --config config.yaml
+
+Mede duas coisas, sem abrir o navegador:
+  1. Importação a frio dos módulos pesados, cada um num processo Python novo
+     (é o que a primeira execução do app paga; pandas e streamlit_pills agora
+     só são importados nas páginas que os usam).
+  2. O trecho de config/autenticação que roda a cada interação: antes, ler e
+     interpretar o config.yaml e gerar o hash bcrypt das senhas em texto puro;
+     agora, src/config_app.carregar_config() (cache por processo) mais a cópia
+     das credenciais entregue ao stauth.Authenticate.
+Para o tempo real por página dentro do app, use o perfil de src/perfil_paginas.py
+(etapa "config/auth").
+"""
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, PROJECT_ROOT)
+from src import config_app
+
+MODULOS = ["yaml", "pandas", "streamlit", "streamlit_pills", "streamlit_authenticator", "src.database"]
+
+def tempo_importacao(modulo, repeticoes=3):
+    """Menor tempo (ms) de `import modulo` num interpretador novo, ou None se não estiver instalado."""
+    codigo = ("import time; t = time.perf_counter(); import " + modulo +
+              "; print((time.perf_counter() - t) * 1000)")
+    tempos = []
+    for _ in range(repeticoes):
+        resultado = subprocess.run([sys.executable, "-c", codigo], cwd=PROJECT_ROOT,
+                                   capture_output=True, text=True)
+        if resultado.returncode != 0:
+            return None
+        tempos.append(float(resultado.stdout.strip().splitlines()[-1]))
+    return min(tempos)
+
+def _hash_senhas(credenciais):
+    """O que o stauth.Authenticate faz a cada execução quando as senhas estão em texto puro."""
+    try:
+        from streamlit_authenticator import Hasher
+    except ImportError:
+        return False
+    Hasher.hash_passwords(credenciais)
+    return True
+
+def rerun_antigo(caminho):
+    import yaml
+    from yaml.loader import SafeLoader
+    with open(caminho, 'r', encoding='utf-8') as arquivo:
+        config = yaml.load(arquivo, Loader=SafeLoader)
+    _hash_senhas(config['credentials'])
+    return config
+
+def rerun_novo(caminho):
+    config = config_app.carregar_config(caminho)
+    config_app.credenciais_da_sessao(config)
+    return config
+
+def medir(funcao, caminho, reruns):
+    tempos = []
+    for _ in range(reruns):
+        inicio = time.perf_counter()
+        funcao(caminho)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return {"p50_ms": tempos[len(tempos) // 2], "max_ms": tempos[-1], "total_ms": sum(tempos)}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tempo de inicialização e de rerun do app.")
+    parser.add_argument('--config', default=os.path.join(PROJECT_ROOT, 'config.yaml'))
+    parser.add_argument('--reruns', type=int, default=50, help="Execuções simuladas do trecho de config/auth.")
+    parser.add_argument('--sem-importacoes', action='store_true', help="Não mede a importação a frio dos módulos.")
+    args = parser.parse_args()
+
+    if not args.sem_importacoes:
+        print("Importação a frio (processo novo, melhor de 3):")
+        for modulo in MODULOS:
+            ms = tempo_importacao(modulo)
+            print(f"  {modulo:<26} {'não instalado' if ms is None else f'{ms:8.1f} ms'}")
+
+    try:
+        import streamlit_authenticator # noqa: F401
+        com_hash = True
+    except ImportError:
+        com_hash = False
+        print("\nstreamlit_authenticator não instalado: o hash das senhas não entra na medição.")
+
+    # Primeira execução do processo (o cache ainda está vazio)
+    inicio = time.perf_counter()
+    rerun_novo(args.config)
+    primeira_ms = (time.perf_counter() - inicio) * 1000
+
+    antigo = medir(rerun_antigo, args.config, args.reruns)
+    novo = medir(rerun_novo, args.config, args.reruns)
+    print(f"\nConfig/auth por execução ({args.reruns} execuções{', com hash bcrypt' if com_hash else ''}):")
+    print(f"  {'':<24}{'p50 ms':>10}{'máx ms':>10}{'total ms':>12}")
+    print(f"  {'antes (yaml + hash)':<24}{antigo['p50_ms']:>10.3f}{antigo['max_ms']:>10.3f}{antigo['total_ms']:>12.1f}")
+    print(f"  {'agora (cache)':<24}{novo['p50_ms']:>10.3f}{novo['max_ms']:>10.3f}{novo['total_ms']:>12.1f}")
+    print(f"  Primeira execução com cache vazio: {primeira_ms:.3f} ms")
+    if novo['p50_ms'] > 0:
+        print(f"  Ganho no p50: {antigo['p50_ms'] / novo['p50_ms']:.0f}x")
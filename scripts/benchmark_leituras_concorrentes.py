@@ -0,0 +1,116 @@
+"""
+Latência de páginas com consultas independentes: em sequência x em paralelo
+(database.fetch_concurrently), com o banco em WAL.
+
+Uso:
+  python scripts/benchmark_leituras_concorrentes.py                       # escala pequena
+  python scripts/benchmark_leituras_concorrentes.py --escala media --repeticoes 30
+  python scripts/benchmark_leituras_concorrentes.py --banco /tmp/media.db
+
+O banco é gerado com gerar_dados_sinteticos.py (ou indicado com --banco; o
+academia.db não é tocado). O cache de consultas é limpo antes de cada
+execução, para medir as consultas e não o cache. O ganho depende de haver
+mais de um núcleo: o sqlite3 solta o GIL durante a consulta, mas com um só
+núcleo as threads apenas se revezam.
+"""
+import io
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import contextlib
+import tempfile
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, SCRIPT_DIR)
+from src import database
+from gerar_dados_sinteticos import ESCALAS, gerar_blocos, gravar_sqlite
+
+def _cenarios(cliente_id):
+    """nome -> chamadas no formato de database.fetch_concurrently."""
+    return {
+        "Dashboard (count_*)": {
+            "total_clientes": database.count_total_clientes,
+            "total_instrutores": database.count_total_instrutores,
+            "clientes_por_plano": database.count_clientes_por_plano,
+            "pagamentos_pendentes": database.count_pagamentosn,
+        },
+        "Pagamentos (histórico + totais)": {
+            "historico": (database.get_pagamentos_by_client_id_frame, cliente_id),
+            "stats": (database.get_payment_stats_for_client, cliente_id),
+        },
+        "Relatórios": {
+            "planos": database.get_clients_with_current_plan_info_frame,
+            "instrutores": database.get_active_client_count_per_instructor,
+            "pagamentos": database.get_payment_stats_bulk,
+        },
+    }
+
+def em_sequencia(chamadas):
+    resultados = {}
+    for nome, chamada in chamadas.items():
+        funcao, *args = chamada if isinstance(chamada, tuple) else (chamada,)
+        resultados[nome] = funcao(*args)
+    return resultados
+
+def medir(funcao, chamadas, repeticoes):
+    funcao(chamadas) # Aquece o pool, o executor e o cache de páginas do SQLite
+    latencias = []
+    for _ in range(repeticoes):
+        database.limpar_cache()
+        inicio = time.perf_counter()
+        funcao(chamadas)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+    return np.percentile(latencias, [50, 95])
+
+def _cliente_com_mais_pagamentos(caminho):
+    conn = sqlite3.connect(caminho)
+    try:
+        return conn.execute(
+            "SELECT cliente_id FROM pagamentos GROUP BY cliente_id ORDER BY COUNT(*) DESC LIMIT 1"
+        ).fetchone()[0]
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Leituras em sequência x concorrentes (fetch_concurrently).")
+    parser.add_argument('--escala', choices=ESCALAS, default="pequena")
+    parser.add_argument('--banco', help="Usa este banco em vez de gerar um (só leituras; o arquivo passa para WAL).")
+    parser.add_argument('--repeticoes', type=int, default=20)
+    parser.add_argument('--pool', type=int, default=database.POOL_TAMANHO_PADRAO,
+                        help="Conexões no pool (e threads de leitura).")
+    parser.add_argument('--semente', type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta_temp:
+        caminho = args.banco
+        if not caminho:
+            caminho = os.path.join(pasta_temp, f"leituras_{args.escala}.db")
+            print(f"Gerando banco da escala '{args.escala}' ({ESCALAS[args.escala]['clientes']} clientes)...")
+            gravar_sqlite(gerar_blocos(ESCALAS[args.escala]["clientes"], ESCALAS[args.escala]["pagamentos"],
+                                       args.semente), caminho)
+        database.DB_NAME = caminho
+        database.configurar_banco({"perfil_pragma": "concorrente", "pool_tamanho": args.pool})
+        modo = database.get_active_pragmas()["journal_mode"]
+        print(f"journal_mode={modo}, pool={args.pool}, núcleos={os.cpu_count()}")
+        if modo != "wal":
+            print("Aviso: banco fora do modo WAL; leitores podem se bloquear.")
+
+        cliente_id = _cliente_com_mais_pagamentos(caminho)
+        print(f"\n{'Cenário':<34}{'seq p50':>10}{'seq p95':>10}{'conc p50':>10}{'conc p95':>10}{'ganho':>8}")
+        with contextlib.redirect_stdout(io.StringIO()) as avisos: # As funções avisam erros com print()
+            linhas = []
+            for nome, chamadas in _cenarios(cliente_id).items():
+                seq = medir(em_sequencia, chamadas, args.repeticoes)
+                conc = medir(database.fetch_concurrently, chamadas, args.repeticoes)
+                linhas.append(f"{nome:<34}{seq[0]:>10.2f}{seq[1]:>10.2f}{conc[0]:>10.2f}{conc[1]:>10.2f}"
+                              f"{seq[0] / conc[0]:>7.2f}x")
+        print("\n".join(linhas))
+        if avisos.getvalue():
+            print("\nAvisos das consultas:\n" + avisos.getvalue())
+        database.get_pool().fechar_todas()
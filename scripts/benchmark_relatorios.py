@@ -0,0 +1,85 @@
+"""
+Tempo do relatório de receita mensal (src/relatorios.py) num histórico grande.
+
+Uso:
+  python scripts/benchmark_relatorios.py                                  # 200 mil clientes, 10 milhões de pagamentos
+  python scripts/benchmark_relatorios.py --clientes 100000 --pagamentos 2400000
+  python scripts/benchmark_relatorios.py --banco /tmp/media.db --hoje 2025-06-15
+
+Mede: a primeira chamada (fecha e grava todos os meses anteriores), as
+chamadas seguintes (meses fechados vindos do cache, como nos reruns da página
+Pagamentos), a chamada logo após um novo pagamento (mês atual recalculado) e a
+primeira chamada de um processo novo (meses fechados lidos de receita_mensal).
+O banco é gerado com gerar_dados_sinteticos.py numa pasta temporária, ou
+indicado com --banco (recebe as migrações e um pagamento de teste).
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+from datetime import date
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, SCRIPT_DIR)
+from src import database
+from src import relatorios
+from gerar_dados_sinteticos import DATA_REFERENCIA, gerar_blocos, gravar_sqlite
+
+def cronometrar(funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return (time.perf_counter() - inicio) * 1000, resultado
+
+def processo_novo(caminho, hoje):
+    """Primeira chamada num interpretador novo: mede a leitura de receita_mensal, sem o fechamento."""
+    codigo = (
+        "import sys, time; from datetime import date; sys.path.insert(0, sys.argv[1]);"
+        "from src import database, relatorios; database.DB_NAME = sys.argv[2];"
+        "database.configurar_banco({}); hoje = date.fromisoformat(sys.argv[3]);"
+        "t = time.perf_counter(); relatorios.relatorio_receita(12, hoje);"
+        "print((time.perf_counter() - t) * 1000)"
+    )
+    resultado = subprocess.run([sys.executable, "-c", codigo, PROJECT_ROOT, caminho, hoje.isoformat()],
+                               capture_output=True, text=True)
+    linhas = resultado.stdout.strip().splitlines()
+    return float(linhas[-1]) if resultado.returncode == 0 and linhas else None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do relatório de receita mensal.")
+    parser.add_argument('--clientes', type=int, default=200_000)
+    parser.add_argument('--pagamentos', type=int, default=10_000_000)
+    parser.add_argument('--banco', help="Usa este banco em vez de gerar um.")
+    parser.add_argument('--hoje', default=DATA_REFERENCIA, help="Data de referência (AAAA-MM-DD) do mês atual.")
+    parser.add_argument('--repeticoes', type=int, default=20)
+    parser.add_argument('--semente', type=int, default=42)
+    args = parser.parse_args()
+    hoje = date.fromisoformat(str(args.hoje)[:10])
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = args.banco
+        if not caminho:
+            caminho = os.path.join(pasta, "receita.db")
+            print(f"Gerando {args.clientes} clientes e {args.pagamentos} pagamentos...")
+            gravar_sqlite(gerar_blocos(args.clientes, args.pagamentos, args.semente), caminho)
+        database.DB_NAME = caminho
+        database.configurar_banco({})
+
+        ms_primeira, _ = cronometrar(relatorios.relatorio_receita, 12, hoje)
+        quentes = [cronometrar(relatorios.relatorio_receita, 12, hoje)[0] for _ in range(args.repeticoes)]
+        database.add_pagamento(1, hoje.isoformat(), 100.0, 1) # Invalida só o mês atual
+        ms_apos_escrita, _ = cronometrar(relatorios.relatorio_receita, 12, hoje)
+        ms_processo_novo = processo_novo(caminho, hoje)
+
+        print(f"\nRelatório de receita (12 meses, mês atual {hoje:%Y-%m}):")
+        print(f"  Primeira chamada (fecha todo o histórico): {ms_primeira:10.1f} ms")
+        print(f"  Chamadas seguintes, p50 / p95:             {np.percentile(quentes, 50):10.1f} / {np.percentile(quentes, 95):.1f} ms")
+        print(f"  Após um novo pagamento:                    {ms_apos_escrita:10.1f} ms")
+        if ms_processo_novo is not None:
+            print(f"  Processo novo (meses fechados gravados):   {ms_processo_novo:10.1f} ms")
+        database.get_pool().fechar_todas()
@@ -0,0 +1,57 @@
+"""
+Job de inadimplência: recalcula a tabela inadimplencia para todos os clientes
+(src/relatorios.calcular_inadimplencia) e mostra um resumo.
+
+Uso:
+  python scripts/calcular_inadimplencia.py                           # academia.db, data de hoje
+  python scripts/calcular_inadimplencia.py --hoje 2025-06-30 --listar 20
+  python scripts/calcular_inadimplencia.py --banco /tmp/media.db --sem-gravar
+
+Pensado para rodar agendado (cron), fora do app: lê os pagamentos de todos os
+clientes numa única consulta e grava o resultado numa transação. O tempo
+cresce linearmente com o número de clientes e pagamentos.
+"""
+import os
+import sys
+import time
+import argparse
+from datetime import date
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, PROJECT_ROOT)
+from src import database
+from src import relatorios
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recalcula a inadimplência de todos os clientes.")
+    parser.add_argument('--banco', help="Banco a usar (padrão: academia.db).")
+    parser.add_argument('--hoje', help="Data de referência (AAAA-MM-DD); padrão: hoje.")
+    parser.add_argument('--dia-vencimento', type=int, default=relatorios.DIA_VENCIMENTO_PADRAO,
+                        help="Dia do mês em que a mensalidade vence.")
+    parser.add_argument('--sem-gravar', action='store_true', help="Só calcula, sem alterar a tabela inadimplencia.")
+    parser.add_argument('--listar', type=int, default=0, help="Mostra os N maiores valores em atraso.")
+    args = parser.parse_args()
+    hoje = date.fromisoformat(args.hoje) if args.hoje else date.today()
+
+    if args.banco:
+        database.DB_NAME = args.banco
+    database.configurar_banco({})
+
+    inicio = time.perf_counter()
+    df, resumo = relatorios.calcular_inadimplencia(hoje, args.dia_vencimento, gravar=not args.sem_gravar)
+    segundos = time.perf_counter() - inicio
+    if resumo is None:
+        sys.exit(1)
+
+    print(f"Inadimplência em {resumo['data_referencia']} (vencimento no dia {args.dia_vencimento}):")
+    for rotulo, valor in [("Clientes", resumo["clientes"]),
+                          ("Avaliados (plano + pagamentos)", resumo["clientes_avaliados"]),
+                          ("Em atraso", resumo["clientes_em_atraso"]),
+                          ("Valor total em atraso", f"{resumo['valor_total_em_atraso']:.2f}")]:
+        print(f"  {rotulo:<32}{valor:>14}")
+    print(f"  {'Tempo':<32}{segundos:>13.2f}s{'' if args.sem_gravar else ' (com gravação)'}")
+    if args.listar:
+        print()
+        print(df.head(args.listar).to_string(index=False))
+    database.get_pool().fechar_todas()
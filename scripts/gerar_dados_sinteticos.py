@@ -0,0 +1,287 @@
+"""
+Gera dados sintéticos (determinísticos pela semente) para o esquema da academia.
+
+Uso:
+  python scripts/gerar_dados_sinteticos.py --escala pequena --csv data_sintetica/
+  python scripts/gerar_dados_sinteticos.py --escala grande --sqlite /tmp/academia_grande.db
+  python scripts/gerar_dados_sinteticos.py --clientes 50000 --pagamentos 2000000 --semente 7 --csv pasta/
+
+Os CSVs têm os mesmos nomes e colunas de data/ e podem ser importados com
+  python scripts/setup_database.py --streaming --pasta-dados pasta/
+O arquivo SQLite já sai com as migrações aplicadas (índices, resumos e FTS).
+Tudo é gerado em blocos com NumPy, então a memória não cresce com a escala.
+"""
+import os
+import sys
+import time
+import sqlite3
+import argparse
+
+import numpy as np
+import pandas as pd
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, SCRIPT_DIR)
+from src import database
+from setup_database import criar_tabelas
+
+ESCALAS = { # clientes e pagamentos; o resto é proporcional
+    "minima": {"clientes": 1_000, "pagamentos": 20_000},
+    "pequena": {"clientes": 10_000, "pagamentos": 240_000},
+    "media": {"clientes": 100_000, "pagamentos": 2_400_000},
+    "grande": {"clientes": 1_000_000, "pagamentos": 50_000_000},
+}
+CLIENTES_POR_INSTRUTOR = 250
+TREINOS_POR_CLIENTE = 3 # Média (Poisson)
+EXERCICIOS_POR_TREINO = (4, 8) # Mínimo e máximo
+CLIENTES_POR_BLOCO = 100_000
+PAGAMENTOS_POR_BLOCO = 1_000_000
+DATA_REFERENCIA = np.datetime64('2025-06-30') # Fixa para que a saída não dependa do dia em que roda
+DIAS_DE_HISTORICO = 3 * 365
+
+PLANOS = [("Básico", 100.0, 3), ("Premium", 200.0, 6), ("VIP", 300.0, 12)]
+PESOS_PLANOS = [0.55, 0.30, 0.15]
+EXERCICIOS = [
+    ("Agachamento", "Pernas"), ("Leg Press", "Pernas"), ("Cadeira Extensora", "Pernas"),
+    ("Mesa Flexora", "Pernas"), ("Panturrilha em Pé", "Pernas"), ("Supino", "Peito"),
+    ("Supino Inclinado", "Peito"), ("Crucifixo", "Peito"), ("Remada", "Costas"),
+    ("Puxada Frontal", "Costas"), ("Levantamento Terra", "Costas"), ("Desenvolvimento", "Ombros"),
+    ("Elevação Lateral", "Ombros"), ("Bíceps Rosca", "Braços"), ("Rosca Martelo", "Braços"),
+    ("Tríceps Testa", "Braços"), ("Tríceps Corda", "Braços"), ("Abdominal", "Core"),
+    ("Prancha", "Core"), ("Esteira", "Cardio"), ("Bicicleta", "Cardio"),
+]
+ESPECIALIDADES = ["Musculação", "Funcional", "Cardio", "Pilates", "Crossfit", "Yoga"]
+PRIMEIROS_NOMES = [
+    "Ana", "Bruno", "Carla", "Daniel", "Eduarda", "Felipe", "Gabriela", "Henrique", "Isabela", "João",
+    "Larissa", "Lucas", "Mariana", "Mateus", "Natália", "Otávio", "Paula", "Rafael", "Sofia", "Thiago",
+    "Vanessa", "Vinícius", "Beatriz", "Caio", "Débora", "Fernanda", "Gustavo", "Helena", "Igor", "Júlia",
+]
+SOBRENOMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima", "Gomes",
+    "Costa", "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes", "Soares", "Fernandes", "Vieira", "Barbosa",
+    "Rocha", "Dias", "Nascimento", "Andrade", "Moreira", "Nunes", "Marques", "Machado", "Mendes", "Freitas",
+]
+NOMES_TREINOS = np.array(["Treino A", "Treino B", "Treino C", "Treino D", "Full Body", "Upper", "Lower"])
+OBJETIVOS = np.array(["Hipertrofia", "Emagrecimento", "Condicionamento", "Força", "Saúde"])
+TIPOS_TREINO = np.array(["Musculação", "Funcional", "Cardio", "Misto"])
+SEM_ACENTO = str.maketrans("áàâãéêíóôõúçÁÉÍÓÚÇ", "aaaaeeioooucAEIOUC")
+
+def _texto(*partes):
+    """Concatena arrays/strings elemento a elemento (np.char.add encadeado)."""
+    resultado = np.asarray(partes[0]).astype(str)
+    for parte in partes[1:]:
+        resultado = np.char.add(resultado, np.asarray(parte).astype(str))
+    return resultado
+
+def _datas(dias_atras):
+    return np.datetime_as_string(DATA_REFERENCIA - dias_atras.astype('timedelta64[D]'), unit='D')
+
+def _iso_para_br(datas_iso):
+    """'AAAA-MM-DD' -> 'DD/MM/AAAA' sem laço em Python (reordena os caracteres)."""
+    caracteres = np.asarray(datas_iso, dtype='U10').view('U1').reshape(-1, 10)
+    br = caracteres[:, [8, 9, 4, 5, 6, 7, 0, 1, 2, 3]]
+    br[:, [2, 5]] = '/'
+    return np.ascontiguousarray(br).view('U10').ravel()
+
+def _gerar_cadastros(rng, n_instrutores):
+    primeiros = np.array(PRIMEIROS_NOMES)
+    sobrenomes = np.array(SOBRENOMES)
+    instrutores = pd.DataFrame({
+        "nome": _texto(primeiros[rng.integers(len(primeiros), size=n_instrutores)], " ",
+                       sobrenomes[rng.integers(len(sobrenomes), size=n_instrutores)]),
+        "especialidade": np.array(ESPECIALIDADES)[rng.integers(len(ESPECIALIDADES), size=n_instrutores)],
+    })
+    planos = pd.DataFrame(PLANOS, columns=["nome", "preco_mensal", "duracao_meses"])
+    exercicios = pd.DataFrame(EXERCICIOS, columns=["nome", "grupo_muscular"])
+    return {"instrutores": instrutores, "planos": planos, "exercicios": exercicios}
+
+def _gerar_bloco_clientes(rng, primeiro_id, n, n_instrutores, primeiro_treino_id):
+    """Clientes [primeiro_id, primeiro_id + n) com seus treinos e exercícios. Devolve (tabelas, plano_por_cliente)."""
+    ids = np.arange(primeiro_id, primeiro_id + n)
+    idx_nome = rng.integers(len(PRIMEIROS_NOMES), size=n)
+    idx_sobrenome = rng.integers(len(SOBRENOMES), size=n)
+    primeiros = np.array(PRIMEIROS_NOMES)[idx_nome]
+    sobrenomes = np.array(SOBRENOMES)[idx_sobrenome]
+    slug_nome = np.array([nome.translate(SEM_ACENTO).lower() for nome in PRIMEIROS_NOMES])[idx_nome]
+    slug_sobrenome = np.array([nome.translate(SEM_ACENTO).lower() for nome in SOBRENOMES])[idx_sobrenome]
+    plano_id = rng.choice(len(PLANOS), size=n, p=PESOS_PLANOS) + 1
+    instrutor_id = rng.integers(1, n_instrutores + 1, size=n)
+
+    # Treinos: quantidade por cliente ~ Poisson, ids sequenciais a partir de primeiro_treino_id
+    treinos_por_cliente = rng.poisson(TREINOS_POR_CLIENTE, size=n)
+    n_treinos = int(treinos_por_cliente.sum())
+    dono = np.repeat(np.arange(n), treinos_por_cliente)
+    inicio_dias_atras = rng.integers(0, DIAS_DE_HISTORICO, size=n_treinos)
+    duracao_dias = rng.integers(28, 91, size=n_treinos)
+    treinos = pd.DataFrame({
+        "nome_treino": NOMES_TREINOS[rng.integers(len(NOMES_TREINOS), size=n_treinos)],
+        "cliente_id": ids[dono],
+        "instrutor_id": instrutor_id[dono],
+        "plano_id": plano_id[dono],
+        "data_inicio": _datas(inicio_dias_atras),
+        "data_fim": _datas(inicio_dias_atras - duracao_dias),
+        "objetivo": OBJETIVOS[rng.integers(len(OBJETIVOS), size=n_treinos)],
+        "tipo_treino": TIPOS_TREINO[rng.integers(len(TIPOS_TREINO), size=n_treinos)],
+    })
+    treino_ids = np.arange(primeiro_treino_id, primeiro_treino_id + n_treinos)
+    # Último treino de cada cliente (ou NULL se não tem nenhum)
+    ultimo = np.full(n, -1)
+    ultimo[dono] = np.arange(n_treinos) # Atribuições repetidas: fica a última
+    treino_cliente = pd.array(np.where(ultimo >= 0, treino_ids[ultimo], 0), dtype="Int64")
+    treino_cliente[ultimo < 0] = pd.NA
+
+    clientes = pd.DataFrame({
+        "nome": _texto(primeiros, " ", sobrenomes),
+        "idade": rng.integers(16, 76, size=n),
+        "sexo": np.where(rng.random(n) < 0.5, "M", "F"),
+        "email": _texto(slug_nome, ".", slug_sobrenome, ".", ids, "@exemplo.com.br"),
+        "telefone": _texto("(", rng.integers(11, 100, size=n), ") 9",
+                           np.char.zfill(rng.integers(0, 10_000, size=n).astype(str), 4), "-",
+                           np.char.zfill(rng.integers(0, 10_000, size=n).astype(str), 4)),
+        "plano_id": plano_id,
+        "instrutor_id": instrutor_id,
+        "treino_id": treino_cliente,
+    })
+
+    # Exercícios de cada treino, na ordem 1..k
+    exercicios_por_treino = rng.integers(EXERCICIOS_POR_TREINO[0], EXERCICIOS_POR_TREINO[1] + 1, size=n_treinos)
+    n_itens = int(exercicios_por_treino.sum())
+    inicio_treino = np.repeat(np.cumsum(exercicios_por_treino) - exercicios_por_treino, exercicios_por_treino)
+    treino_exercicio = pd.DataFrame({
+        "treino_id": np.repeat(treino_ids, exercicios_por_treino),
+        "exercicio_id": rng.integers(1, len(EXERCICIOS) + 1, size=n_itens),
+        "series": rng.integers(3, 6, size=n_itens).astype(str),
+        "repeticoes": np.array(["8", "10", "12", "15"])[rng.integers(4, size=n_itens)],
+        "carga": _texto(rng.integers(1, 41, size=n_itens) * 2.5, " kg"),
+        "descanso_segundos": np.array([30, 45, 60, 90])[rng.integers(4, size=n_itens)],
+        "ordem": np.arange(n_itens) - inicio_treino + 1,
+    })
+    return {"clientes": clientes, "treinos": treinos, "treino_exercicio": treino_exercicio}, plano_id
+
+def _gerar_bloco_pagamentos(rng, n, n_clientes, plano_por_cliente):
+    cliente_id = rng.integers(1, n_clientes + 1, size=n)
+    dias_atras = rng.integers(0, DIAS_DE_HISTORICO, size=n)
+    precos = np.array([preco for _, preco, _ in PLANOS])
+    # Pagamentos antigos quase sempre quitados; os dos últimos 60 dias ficam mais em aberto
+    prob_pago = np.where(dias_atras > 60, 0.95, 0.6)
+    return pd.DataFrame({
+        "cliente_id": cliente_id,
+        "data_pagamento": _datas(dias_atras),
+        "valor": precos[plano_por_cliente[cliente_id - 1] - 1],
+        "pago": (rng.random(n) < prob_pago).astype(int),
+    })
+
+def gerar_blocos(n_clientes, n_pagamentos, semente=42):
+    """
+    Gera os dados em blocos, na ordem das chaves estrangeiras.
+    Produz pares (tabela, DataFrame); os ids ficam implícitos na ordem das linhas (1, 2, 3...).
+    """
+    sementes = np.random.SeedSequence(semente)
+    rng_cadastros, rng_clientes, rng_pagamentos = (np.random.default_rng(s) for s in sementes.spawn(3))
+    n_instrutores = max(3, n_clientes // CLIENTES_POR_INSTRUTOR)
+
+    for tabela, df in _gerar_cadastros(rng_cadastros, n_instrutores).items():
+        yield tabela, df
+
+    plano_por_cliente = np.empty(n_clientes, dtype=np.int64)
+    proximo_treino_id = 1
+    blocos = {"clientes": [], "treinos": [], "treino_exercicio": []}
+    for primeiro in range(0, n_clientes, CLIENTES_POR_BLOCO):
+        n = min(CLIENTES_POR_BLOCO, n_clientes - primeiro)
+        tabelas, planos = _gerar_bloco_clientes(rng_clientes, primeiro + 1, n, n_instrutores, proximo_treino_id)
+        plano_por_cliente[primeiro:primeiro + n] = planos
+        proximo_treino_id += len(tabelas["treinos"])
+        # A ordem das FKs é por tabela: os clientes saem já, treinos e exercícios
+        # esperam o fim dos clientes (ocupam pouco perto dos pagamentos)
+        yield "clientes", tabelas["clientes"]
+        blocos["treinos"].append(tabelas["treinos"])
+        blocos["treino_exercicio"].append(tabelas["treino_exercicio"])
+    for tabela in ("treinos", "treino_exercicio"):
+        for df in blocos[tabela]:
+            yield tabela, df
+        blocos[tabela].clear()
+
+    for inicio in range(0, n_pagamentos, PAGAMENTOS_POR_BLOCO):
+        yield "pagamentos", _gerar_bloco_pagamentos(
+            rng_pagamentos, min(PAGAMENTOS_POR_BLOCO, n_pagamentos - inicio), n_clientes, plano_por_cliente
+        )
+
+COLUNAS_DATA_BR = {"pagamentos": ["data_pagamento"]} # A exportação usa DD/MM/AAAA nos pagamentos
+ARQUIVOS_CSV = { # Mesmos nomes de data/
+    "instrutores": "instrutores.csv",
+    "planos": "planos.csv",
+    "exercicios": "exercicios.csv",
+    "clientes": "clientes_academia.csv",
+    "treinos": "treinos.csv",
+    "treino_exercicio": "treino_exercicios.csv",
+    "pagamentos": "pagamentos.csv",
+}
+
+def gravar_csvs(blocos, pasta):
+    os.makedirs(pasta, exist_ok=True)
+    iniciados = set()
+    linhas = {}
+    for tabela, df in blocos:
+        caminho = os.path.join(pasta, ARQUIVOS_CSV[tabela])
+        for coluna in COLUNAS_DATA_BR.get(tabela, []):
+            df[coluna] = _iso_para_br(df[coluna].to_numpy())
+        df.to_csv(caminho, mode='a' if tabela in iniciados else 'w', header=tabela not in iniciados, index=False)
+        iniciados.add(tabela)
+        linhas[tabela] = linhas.get(tabela, 0) + len(df)
+    return linhas
+
+def gravar_sqlite(blocos, caminho):
+    if os.path.exists(caminho):
+        raise FileExistsError(f"O arquivo '{caminho}' já existe; escolha outro destino.")
+    conn = sqlite3.connect(caminho, isolation_level=None)
+    # Arquivo novo: sem journal durante a carga (se falhar, basta gerar de novo)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA locking_mode = EXCLUSIVE")
+    conn.execute("PRAGMA cache_size = -262144") # 256 MB: os índices criados pelas migrações cabem na memória
+    conn.execute("PRAGMA temp_store = MEMORY")
+    criar_tabelas(conn)
+    linhas = {}
+    try:
+        conn.execute("BEGIN")
+        for tabela, df in blocos:
+            colunas = list(df.columns)
+            valores = zip(*(df[col].astype(object).where(df[col].notna(), None).tolist() for col in colunas))
+            conn.executemany(
+                f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))})", valores
+            )
+            linhas[tabela] = linhas.get(tabela, 0) + len(df)
+        conn.execute("COMMIT")
+        conn.execute("PRAGMA journal_mode = DELETE")
+        database.aplicar_migracoes(conn_externa=conn)
+    finally:
+        conn.close()
+    return linhas
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos para o banco da academia.")
+    parser.add_argument('--escala', choices=ESCALAS, default="pequena")
+    parser.add_argument('--clientes', type=int, help="Sobrescreve o número de clientes da escala.")
+    parser.add_argument('--pagamentos', type=int, help="Sobrescreve o número de pagamentos da escala.")
+    parser.add_argument('--semente', type=int, default=42)
+    destino = parser.add_mutually_exclusive_group(required=True)
+    destino.add_argument('--csv', metavar='PASTA', help="Grava os CSVs nesta pasta.")
+    destino.add_argument('--sqlite', metavar='ARQUIVO', help="Grava um banco SQLite pronto neste arquivo.")
+    args = parser.parse_args()
+
+    n_clientes = args.clientes or ESCALAS[args.escala]["clientes"]
+    n_pagamentos = args.pagamentos if args.pagamentos is not None else ESCALAS[args.escala]["pagamentos"]
+    print(f"Gerando {n_clientes} clientes e {n_pagamentos} pagamentos (semente {args.semente})...")
+
+    inicio = time.perf_counter()
+    blocos = gerar_blocos(n_clientes, n_pagamentos, semente=args.semente)
+    linhas = gravar_csvs(blocos, args.csv) if args.csv else gravar_sqlite(blocos, args.sqlite)
+    segundos = time.perf_counter() - inicio
+
+    print(f"\n{'Tabela':<20}{'Linhas':>14}")
+    for tabela, total in linhas.items():
+        print(f"{tabela:<20}{total:>14}")
+    total = sum(linhas.values())
+    print(f"\n{total} linhas em {segundos:.1f} s ({total / segundos:.0f} linhas/s) -> {args.csv or args.sqlite}")
@@ -1,9 +1,18 @@
 import sqlite3
 import pandas as pd
 import os
+import re
+import sys
+import time
+import argparse
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, PROJECT_ROOT) # Para importar src.database (migrações) ao rodar como script
+from src import database
 DB_NAME = os.path.join(PROJECT_ROOT, 'academia.db')
 DATA_FOLDER = os.path.join(PROJECT_ROOT, 'data')
 
@@ -159,7 +168,389 @@ def popular_tabela_csv_simples(conn, nome_tabela, nome_arquivo_csv):
     except Exception as e:
         print(f"  ERRO ao processar '{nome_arquivo_csv}' para a tabela '{nome_tabela}': {e}")
 
+# --- IMPORTAÇÃO EM STREAMING ---
+# Para CSVs grandes (ex: histórico de pagamentos de uma rede), lê o arquivo em
+# blocos de `chunk_size` linhas, converte os tipos em cada bloco e grava com
+# executemany dentro de transações grandes, sem carregar o arquivo inteiro.
+MAP_BOOLEAN_PAGO = {'true': 1, 'false': 0, 'sim': 1, 'nao': 0, 'não': 0, '1': 1, '0': 0}
+COLUNAS_DATA = {
+    'pagamentos': ['data_pagamento'],
+    'treinos': ['data_inicio', 'data_fim'],
+}
+
+def _colunas_da_tabela(conn, nome_tabela):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({nome_tabela})")]
+
+def _coagir_chunk(df, nome_tabela, colunas_destino):
+    """Converte um bloco do CSV para as colunas e tipos da tabela."""
+    df = df[colunas_destino]
+    for coluna in COLUNAS_DATA.get(nome_tabela, []):
+        if coluna in df.columns:
+            datas = pd.to_datetime(df[coluna], dayfirst=(nome_tabela == 'pagamentos'), errors='coerce')
+            df[coluna] = datas.dt.strftime('%Y-%m-%d') # Mesmo formato gravado pelo app (date.isoformat())
+    if nome_tabela == 'pagamentos' and 'pago' in df.columns:
+        df['pago'] = df['pago'].astype(str).str.strip().str.lower().map(MAP_BOOLEAN_PAGO).fillna(0).astype(int)
+    return df.astype(object).where(df.notna(), None) # NaN/NaT -> NULL
+
+def _indices_usados_por_triggers(conn, nome_tabela):
+    """
+    Índices de `nome_tabela` cuja primeira coluna filtra uma leitura da própria
+    tabela dentro de um trigger (ex: trg_ultimo_treino_* busca o treino mais
+    recente com `FROM treinos WHERE cliente_id = ...`). Sem eles, cada linha
+    inserida faria o trigger varrer a tabela inteira.
+    """
+    colunas = set()
+    for (sql,) in conn.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger'"):
+        corpo = sql.split("BEGIN", 1)[-1]
+        colunas.update(re.findall(rf"\bFROM\s+{nome_tabela}\s+WHERE\s+(\w+)", corpo, re.IGNORECASE))
+    usados = set()
+    for (nome_indice,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?", (nome_tabela,)):
+        primeira_coluna = conn.execute(f"PRAGMA index_info({nome_indice})").fetchone()
+        if primeira_coluna is not None and primeira_coluna[2] in colunas:
+            usados.add(nome_indice)
+    return usados
+
+def _pico_memoria_mb():
+    """Pico de memória residente do processo, em MB (None onde o módulo resource não existe)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024 # macOS em bytes, Linux em KB
+
+def importar_csv_streaming(conn, nome_tabela, nome_arquivo_csv, chunk_size=50_000,
+                           linhas_por_transacao=500_000, recriar_indices=False):
+    """
+    Importa um CSV em blocos. Com `recriar_indices`, os índices secundários da
+    tabela são removidos antes da carga e recriados no final (mais rápido para
+    cargas grandes), exceto os que os triggers das migrações usam para ler a
+    própria tabela. Retorna um dict com linhas, segundos, linhas/s e pico de memória.
+    """
+    caminho_csv = os.path.join(DATA_FOLDER, nome_arquivo_csv)
+    print(f"\nProcessando (streaming): Tabela '{nome_tabela}' com arquivo '{nome_arquivo_csv}'")
+
+    if not os.path.exists(caminho_csv):
+        print(f"  AVISO: Arquivo CSV '{nome_arquivo_csv}' NÃO ENCONTRADO em '{DATA_FOLDER}'. Tabela '{nome_tabela}' não será populada.")
+        return None
+
+    colunas_tabela = [col for col in _colunas_da_tabela(conn, nome_tabela) if col != 'id'] # O banco gera o id
+    indices = []
+    if recriar_indices:
+        mantidos = _indices_usados_por_triggers(conn, nome_tabela)
+        indices = [
+            (nome_indice, sql_indice) for nome_indice, sql_indice in conn.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+                (nome_tabela,)
+            ).fetchall()
+            if nome_indice not in mantidos
+        ]
+        for nome_indice, _ in indices:
+            conn.execute(f"DROP INDEX IF EXISTS {nome_indice}")
+        if indices:
+            print(f"  {len(indices)} índice(s) removido(s) durante a carga.")
+        if mantidos:
+            print(f"  Mantido(s) por serem usados pelos triggers: {', '.join(sorted(mantidos))}.")
+
+    inicio = time.perf_counter()
+    total_linhas = 0
+    linhas_na_transacao = 0
+    try:
+        conn.execute("BEGIN")
+        for chunk in pd.read_csv(caminho_csv, chunksize=chunk_size, dtype=str, keep_default_na=True):
+            colunas_destino = [col for col in colunas_tabela if col in chunk.columns]
+            chunk = _coagir_chunk(chunk, nome_tabela, colunas_destino)
+            query = f"INSERT INTO {nome_tabela} ({', '.join(colunas_destino)}) VALUES ({', '.join('?' * len(colunas_destino))})"
+            conn.executemany(query, chunk.itertuples(index=False, name=None))
+            total_linhas += len(chunk)
+            linhas_na_transacao += len(chunk)
+            if linhas_na_transacao >= linhas_por_transacao:
+                conn.commit()
+                conn.execute("BEGIN")
+                linhas_na_transacao = 0
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"  ERRO ao processar '{nome_arquivo_csv}' para a tabela '{nome_tabela}' (após {total_linhas} linhas já gravadas): {e}")
+    finally:
+        for nome_indice, sql_indice in indices:
+            conn.execute(sql_indice)
+        if indices:
+            conn.commit()
+            print(f"  {len(indices)} índice(s) recriado(s).")
+
+    segundos = time.perf_counter() - inicio
+    stats = {
+        "linhas": total_linhas,
+        "segundos": segundos,
+        "linhas_por_segundo": total_linhas / segundos if segundos > 0 else 0.0,
+        "pico_memoria_mb": _pico_memoria_mb(),
+    }
+    memoria = f"{stats['pico_memoria_mb']:.0f} MB" if stats['pico_memoria_mb'] is not None else "n/d"
+    print(f"  SUCESSO: {total_linhas} linhas em {segundos:.1f} s ({stats['linhas_por_segundo']:.0f} linhas/s, pico de memória {memoria}).")
+    return stats
+
+# --- IMPORTAÇÃO PARALELA ---
+# Cada CSV é lido e convertido num processo separado; os blocos já prontos vão
+# por uma fila (uma por tabela) para um único escritor, que grava as tabelas na
+# ordem das chaves estrangeiras. Enquanto o escritor grava 'clientes', os
+# processos já estão lendo 'treinos' e 'pagamentos'.
+ORDEM_IMPORTACAO = [ # (tabela, arquivo) na ordem das chaves estrangeiras
+    ('instrutores', 'instrutores.csv'),
+    ('planos', 'planos.csv'),
+    ('exercicios', 'exercicios.csv'),
+    ('clientes', 'clientes_academia.csv'),
+    ('treinos', 'treinos.csv'),
+    ('treino_exercicio', 'treino_exercicios.csv'),
+    ('pagamentos', 'pagamentos.csv'),
+]
+BLOCOS_EM_ESPERA_POR_TABELA = 4 # Limita a memória: o leitor espera se o escritor estiver atrasado
+
+_filas_leitura = {} # Preenchido em cada processo do pool por _iniciar_leitor
+
+def _iniciar_leitor(filas):
+    """Inicializador dos processos do pool: as filas só podem ser herdadas na criação do processo."""
+    _filas_leitura.update(filas)
+
+def _ler_csv_para_fila(nome_tabela, caminho_csv, colunas_tabela, chunk_size):
+    """Executado num processo do pool: lê e converte o CSV, enviando blocos de tuplas para a fila da tabela."""
+    fila = _filas_leitura[nome_tabela]
+    try:
+        if not os.path.exists(caminho_csv):
+            fila.put(("aviso", f"Arquivo CSV '{os.path.basename(caminho_csv)}' NÃO ENCONTRADO. Tabela '{nome_tabela}' não será populada."))
+            return
+        for chunk in pd.read_csv(caminho_csv, chunksize=chunk_size, dtype=str):
+            colunas_destino = [col for col in colunas_tabela if col in chunk.columns]
+            chunk = _coagir_chunk(chunk, nome_tabela, colunas_destino)
+            fila.put(("bloco", (colunas_destino, list(chunk.itertuples(index=False, name=None)))))
+    except Exception as e:
+        fila.put(("erro", f"{type(e).__name__}: {e}"))
+    finally:
+        fila.put(("fim", None))
+
+def importar_csvs_em_paralelo(conn, chunk_size=50_000, processos=None, linhas_por_transacao=500_000):
+    """
+    Importa todos os CSVs de ORDEM_IMPORTACAO lendo-os em paralelo (ProcessPoolExecutor)
+    e gravando com um único escritor nesta conexão, tabela por tabela na ordem das FKs.
+    Retorna {tabela: linhas_gravadas}.
+    """
+    conn.isolation_level = None # Transações controladas aqui
+    if (processos or os.cpu_count() or 1) < 2:
+        print("AVISO: apenas um núcleo disponível; o modo paralelo não será mais rápido que --streaming.")
+    colunas = {tabela: [col for col in _colunas_da_tabela(conn, tabela) if col != 'id'] for tabela, _ in ORDEM_IMPORTACAO}
+    resultado = {}
+    inicio = time.perf_counter()
+
+    filas = {tabela: multiprocessing.Queue(maxsize=BLOCOS_EM_ESPERA_POR_TABELA) for tabela, _ in ORDEM_IMPORTACAO}
+    with ProcessPoolExecutor(max_workers=processos, initializer=_iniciar_leitor, initargs=(filas,)) as executor:
+        for tabela, arquivo in ORDEM_IMPORTACAO:
+            executor.submit(_ler_csv_para_fila, tabela, os.path.join(DATA_FOLDER, arquivo),
+                            colunas[tabela], chunk_size)
+
+        for tabela, arquivo in ORDEM_IMPORTACAO:
+            print(f"\nGravando (paralelo): Tabela '{tabela}' com arquivo '{arquivo}'")
+            linhas_tabela = 0
+            linhas_na_transacao = 0
+            conn.execute("BEGIN")
+            while True:
+                tipo, conteudo = filas[tabela].get()
+                if tipo == "fim":
+                    break
+                if tipo == "aviso":
+                    print(f"  AVISO: {conteudo}")
+                elif tipo == "erro":
+                    print(f"  ERRO ao ler '{arquivo}': {conteudo}")
+                elif tipo == "bloco":
+                    colunas_destino, linhas = conteudo
+                    try:
+                        conn.executemany(
+                            f"INSERT INTO {tabela} ({', '.join(colunas_destino)}) VALUES ({', '.join('?' * len(colunas_destino))})",
+                            linhas
+                        )
+                    except sqlite3.Error as e:
+                        print(f"  ERRO ao gravar bloco em '{tabela}' (bloco descartado): {e}")
+                        continue
+                    linhas_tabela += len(linhas)
+                    linhas_na_transacao += len(linhas)
+                    if linhas_na_transacao >= linhas_por_transacao:
+                        conn.commit()
+                        conn.execute("BEGIN")
+                        linhas_na_transacao = 0
+            conn.commit()
+            resultado[tabela] = linhas_tabela
+            print(f"  SUCESSO: {linhas_tabela} linhas gravadas em '{tabela}'.")
+
+    segundos = time.perf_counter() - inicio
+    total = sum(resultado.values())
+    print(f"\nImportação paralela: {total} linhas em {segundos:.1f} s ({total / segundos if segundos > 0 else 0:.0f} linhas/s).")
+    return resultado
+
+# --- IMPORTAÇÃO INCREMENTAL ---
+# Para sincronizar com a exportação diária sem apagar o banco: arquivos sem
+# alteração (mesmo tamanho/mtime ou mesmo SHA-256) são pulados, e as linhas
+# são gravadas com INSERT ... ON CONFLICT DO UPDATE pela chave natural. O
+# WHERE do upsert impede a escrita (e os triggers) quando nada mudou na linha.
+CHAVES_NATURAIS = {
+    'clientes': ('email',),
+    'planos': ('nome',),
+    'exercicios': ('nome',),
+}
+# Tabelas sem chave natural usam o 'id' do CSV ou, sem ele, a posição da linha
+# (é assim que os CSVs se referenciam: treino_id = linha do treinos.csv).
+# Nas tabelas com chave natural o 'id' do CSV é ignorado: a linha existente
+# mantém o seu id (referenciado por pagamentos/treinos) e as novas recebem o
+# próximo id do banco.
+
+def _criar_tabela_importacoes(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS importacoes_csv (
+        arquivo TEXT PRIMARY KEY,
+        tamanho INTEGER NOT NULL,
+        mtime REAL NOT NULL,
+        sha256 TEXT NOT NULL,
+        linhas INTEGER NOT NULL,
+        importado_em TEXT NOT NULL DEFAULT (datetime('now'))
+    )
+    """)
+
+def _sha256_arquivo(caminho, tamanho_bloco=1 << 20):
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+def _query_upsert(nome_tabela, colunas, chave):
+    colunas_atualizaveis = [col for col in colunas if col not in chave]
+    insert = f"INSERT INTO {nome_tabela} ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))})"
+    if not colunas_atualizaveis:
+        return f"{insert} ON CONFLICT({', '.join(chave)}) DO NOTHING"
+    return (
+        f"{insert} ON CONFLICT({', '.join(chave)}) DO UPDATE SET "
+        + ", ".join(f"{col} = excluded.{col}" for col in colunas_atualizaveis)
+        + " WHERE " + " OR ".join(f"{nome_tabela}.{col} IS NOT excluded.{col}" for col in colunas_atualizaveis)
+    )
+
+def importar_csv_incremental(conn, nome_tabela, nome_arquivo_csv, chunk_size=50_000, forcar=False):
+    """
+    Sincroniza a tabela com o CSV. Pula o arquivo se ele não mudou desde a última
+    importação (a menos que `forcar`). Retorna {"inseridas", "atualizadas", "pulado"}
+    ou None se o arquivo não existir ou a importação falhar.
+    """
+    caminho_csv = os.path.join(DATA_FOLDER, nome_arquivo_csv)
+    print(f"\nSincronizando: Tabela '{nome_tabela}' com arquivo '{nome_arquivo_csv}'")
+
+    if not os.path.exists(caminho_csv):
+        print(f"  AVISO: Arquivo CSV '{nome_arquivo_csv}' NÃO ENCONTRADO em '{DATA_FOLDER}'. Tabela '{nome_tabela}' não será sincronizada.")
+        return None
+
+    _criar_tabela_importacoes(conn)
+    info = os.stat(caminho_csv)
+    anterior = conn.execute(
+        "SELECT tamanho, mtime, sha256 FROM importacoes_csv WHERE arquivo = ?", (nome_arquivo_csv,)
+    ).fetchone()
+    if anterior and not forcar:
+        if anterior[0] == info.st_size and anterior[1] == info.st_mtime:
+            print("  Sem alterações (tamanho e data de modificação iguais). Pulado.")
+            return {"inseridas": 0, "atualizadas": 0, "pulado": True}
+    sha256 = _sha256_arquivo(caminho_csv)
+    if anterior and not forcar and anterior[2] == sha256:
+        conn.execute("UPDATE importacoes_csv SET mtime = ? WHERE arquivo = ?", (info.st_mtime, nome_arquivo_csv))
+        conn.commit()
+        print("  Sem alterações (mesmo conteúdo). Pulado.")
+        return {"inseridas": 0, "atualizadas": 0, "pulado": True}
+
+    colunas_tabela = _colunas_da_tabela(conn, nome_tabela)
+    chave = CHAVES_NATURAIS.get(nome_tabela, ('id',))
+    antes = conn.execute(f"SELECT COUNT(*) FROM {nome_tabela}").fetchone()[0]
+    alteradas = 0
+    total_linhas = 0
+    try:
+        conn.execute("BEGIN")
+        for chunk in pd.read_csv(caminho_csv, chunksize=chunk_size, dtype=str):
+            if chave == ('id',) and 'id' not in chunk.columns:
+                chunk.insert(0, 'id', range(total_linhas + 1, total_linhas + len(chunk) + 1))
+            colunas_destino = [col for col in colunas_tabela
+                               if col in chunk.columns and (col != 'id' or chave == ('id',))]
+            chunk = _coagir_chunk(chunk, nome_tabela, colunas_destino)
+            cursor = conn.executemany(_query_upsert(nome_tabela, colunas_destino, chave),
+                                      chunk.itertuples(index=False, name=None))
+            alteradas += cursor.rowcount # Só as linhas da tabela (não conta os triggers nem os upserts sem mudança)
+            total_linhas += len(chunk)
+        conn.execute(
+            """INSERT INTO importacoes_csv (arquivo, tamanho, mtime, sha256, linhas) VALUES (?, ?, ?, ?, ?)
+               ON CONFLICT(arquivo) DO UPDATE SET tamanho = excluded.tamanho, mtime = excluded.mtime,
+               sha256 = excluded.sha256, linhas = excluded.linhas, importado_em = datetime('now')""",
+            (nome_arquivo_csv, info.st_size, info.st_mtime, sha256, total_linhas)
+        )
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"  ERRO ao sincronizar '{nome_arquivo_csv}' com a tabela '{nome_tabela}' (nada foi gravado): {e}")
+        return None
+
+    inseridas = conn.execute(f"SELECT COUNT(*) FROM {nome_tabela}").fetchone()[0] - antes
+    atualizadas = alteradas - inseridas
+    print(f"  SUCESSO: {total_linhas} linhas lidas, {inseridas} inseridas, {atualizadas} atualizadas.")
+    return {"inseridas": inseridas, "atualizadas": atualizadas, "pulado": False}
+
+def verificar_indices():
+    """Confere via EXPLAIN QUERY PLAN que as consultas de src/database.py usam índices."""
+    database.DB_NAME = DB_NAME
+    print("\n--- Verificando planos de consulta (EXPLAIN QUERY PLAN) ---")
+    problemas = database.verificar_planos_de_consulta()
+    for problema in problemas:
+        print(f"  Varredura de '{problema['tabela']}' em {problema['funcao']}: {problema['plano']}")
+        print(f"    {problema['query']}")
+    if problemas:
+        print(f"--- {len(problemas)} varredura(s) fora de database.SCANS_PERMITIDOS. ---")
+        return 1
+    print("--- Nenhuma varredura de tabela fora das listagens permitidas. ---")
+    return 0
+
+def reconstruir_resumos():
+    """Recalcula do zero as tabelas de resumo mantidas por triggers e informa divergências."""
+    database.DB_NAME = DB_NAME
+    print("\n--- Reconstruindo resumo do Dashboard ---")
+    diferencas = database.reconstruir_dashboard_stats()
+    if diferencas is None:
+        return 1
+    for diferenca in diferencas:
+        print(f"  Divergência em '{diferenca['campo']}': {diferenca['antes']} -> {diferenca['depois']}")
+    print("--- Resumo consistente. ---" if not diferencas else f"--- {len(diferencas)} campo(s) corrigido(s). ---")
+
+    print("\n--- Reconstruindo último treino por cliente ---")
+    divergentes = database.reconstruir_ultimo_treino()
+    if divergentes is None:
+        return 1
+    for diferenca in divergentes[:20]:
+        print(f"  Cliente {diferenca['cliente_id']}: treino {diferenca['antes']} -> {diferenca['depois']}")
+    if len(divergentes) > 20:
+        print(f"  ... e mais {len(divergentes) - 20} cliente(s).")
+    print("--- Último treino consistente. ---" if not divergentes else f"--- {len(divergentes)} cliente(s) corrigido(s). ---")
+    return 0
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Cria e popula o banco academia.db a partir dos CSVs em data/.")
+    parser.add_argument('--verificar-indices', action='store_true', help="Confere os planos de consulta e sai.")
+    parser.add_argument('--reconstruir-resumos', action='store_true', help="Recalcula as tabelas de resumo e sai.")
+    parser.add_argument('--streaming', action='store_true', help="Importa os CSVs em blocos (para arquivos grandes).")
+    parser.add_argument('--chunk-size', type=int, default=50_000, help="Linhas por bloco no modo streaming.")
+    parser.add_argument('--recriar-indices', action='store_true', help="No modo streaming, remove e recria os índices de cada tabela.")
+    parser.add_argument('--paralelo', action='store_true', help="Lê os CSVs em paralelo (um processo por arquivo) com um único escritor.")
+    parser.add_argument('--incremental', action='store_true', help="Sincroniza com os CSVs (upsert pela chave natural), pulando arquivos inalterados.")
+    parser.add_argument('--forcar', action='store_true', help="No modo incremental, reprocessa também os arquivos inalterados.")
+    parser.add_argument('--pasta-dados', default=None, help="Pasta com os CSVs (padrão: data/).")
+    parser.add_argument('--processos', type=int, default=None, help="Processos de leitura no modo paralelo (padrão: núcleos da máquina).")
+    args = parser.parse_args()
+    if args.pasta_dados:
+        DATA_FOLDER = os.path.abspath(args.pasta_dados)
+
+    if args.verificar_indices:
+        sys.exit(verificar_indices())
+    if args.reconstruir_resumos:
+        sys.exit(reconstruir_resumos())
+
     print("--- Iniciando Script de Setup do Banco de Dados (Versão Simples) ---")
 
     conn = None
@@ -167,24 +558,44 @@ if __name__ == '__main__':
         conn = conectar_bd()
         criar_tabelas(conn)
 
+        if args.streaming:
+            conn.isolation_level = None # Transações controladas por importar_csv_streaming
+            def popular(conn, nome_tabela, nome_arquivo_csv):
+                importar_csv_streaming(conn, nome_tabela, nome_arquivo_csv,
+                                       chunk_size=args.chunk_size, recriar_indices=args.recriar_indices)
+        elif args.incremental:
+            conn.isolation_level = None # Transações controladas por importar_csv_incremental
+            def popular(conn, nome_tabela, nome_arquivo_csv):
+                importar_csv_incremental(conn, nome_tabela, nome_arquivo_csv,
+                                         chunk_size=args.chunk_size, forcar=args.forcar)
+        else:
+            popular = popular_tabela_csv_simples
+
         print("\n--- Populando Tabelas com Dados dos CSVs (se existirem) ---")
 
-        popular_tabela_csv_simples(conn, 'instrutores', 'instrutores.csv')
-        popular_tabela_csv_simples(conn, 'planos', 'planos.csv')
-        popular_tabela_csv_simples(conn, 'exercicios', 'exercicios.csv')
+        if args.paralelo:
+            importar_csvs_em_paralelo(conn, chunk_size=args.chunk_size, processos=args.processos)
+        else:
+            popular(conn, 'instrutores', 'instrutores.csv')
+            popular(conn, 'planos', 'planos.csv')
+            popular(conn, 'exercicios', 'exercicios.csv')
         
-        popular_tabela_csv_simples(conn, 'clientes', 'clientes_academia.csv')
+            popular(conn, 'clientes', 'clientes_academia.csv')
 
-        print("\nAVISO IMPORTANTE: A tabela 'treinos' não está sendo populada por CSV neste script.")
-        print("Para que 'treino_exercicio' seja populada corretamente, a tabela 'treinos' deve")
-        print("conter os 'treino_id's referenciados no arquivo 'treino_exercicios.csv'.")
-        popular_tabela_csv_simples(conn, 'treinos', 'treinos.csv')
-        popular_tabela_csv_simples(conn, 'treino_exercicio', 'treino_exercicios.csv')
+            print("\nAVISO IMPORTANTE: A tabela 'treinos' não está sendo populada por CSV neste script.")
+            print("Para que 'treino_exercicio' seja populada corretamente, a tabela 'treinos' deve")
+            print("conter os 'treino_id's referenciados no arquivo 'treino_exercicios.csv'.")
+            popular(conn, 'treinos', 'treinos.csv')
+            popular(conn, 'treino_exercicio', 'treino_exercicios.csv')
         
-        popular_tabela_csv_simples(conn, 'pagamentos', 'pagamentos.csv')
+            popular(conn, 'pagamentos', 'pagamentos.csv')
         
         print("\n--- Povoamento de tabelas (tentativa) concluído. ---")
 
+        print("\n--- Aplicando migrações de esquema ---")
+        versao = database.aplicar_migracoes(conn_externa=conn)
+        print(f"Esquema na versão {versao}.")
+
     except sqlite3.Error as e_sqlite:
         print(f"ERRO SQLite durante o setup: {e_sqlite}")
     except Exception as e_geral:
@@ -0,0 +1,54 @@
+import os
+import copy
+import threading
+
+# --- CONFIGURAÇÃO DO APP (UMA VEZ POR PROCESSO) ---
+# O Streamlit reexecuta o script a cada interação. Ler e interpretar o
+# config.yaml e gerar o hash bcrypt das senhas em texto puro (o que o
+# stauth.Authenticate faz sozinho se as senhas não vierem com hash) custa caro;
+# aqui isso é feito uma vez por processo e refeito só quando o arquivo muda
+# (mtime ou tamanho). Módulos importados ficam vivos entre as execuções do
+# script, então o cache sobrevive aos reruns e é compartilhado pelas sessões.
+_cache_config = {} # caminho absoluto -> ((mtime_ns, tamanho), config)
+_lock = threading.Lock()
+
+def _preparar_credenciais(credenciais):
+    """Usuários em minúsculas (como o stauth faz) e senhas com hash bcrypt."""
+    if not credenciais or not credenciais.get('usernames'):
+        return credenciais
+    credenciais['usernames'] = {usuario.lower(): dados for usuario, dados in credenciais['usernames'].items()}
+    try:
+        from streamlit_authenticator import Hasher
+        Hasher.hash_passwords(credenciais) # Pula as senhas que já têm hash
+    except (ImportError, AttributeError) as e:
+        # Versões antigas sem Hasher.hash_passwords: o Authenticate gera o hash a cada execução
+        print(f"Não foi possível gerar o hash das senhas antecipadamente: {e}")
+    return credenciais
+
+def carregar_config(caminho='config.yaml'):
+    """
+    Retorna o config.yaml interpretado, com as credenciais já preparadas.
+    O objeto é compartilhado entre sessões: não altere (use credenciais_da_sessao()).
+    Levanta FileNotFoundError se o arquivo não existir.
+    """
+    caminho = os.path.abspath(caminho)
+    info = os.stat(caminho)
+    versao = (info.st_mtime_ns, info.st_size)
+    with _lock:
+        entrada = _cache_config.get(caminho)
+        if entrada is not None and entrada[0] == versao:
+            return entrada[1]
+
+    import yaml # Só quando o arquivo precisa ser lido
+    from yaml.loader import SafeLoader
+    with open(caminho, 'r', encoding='utf-8') as arquivo:
+        config = yaml.load(arquivo, Loader=SafeLoader) or {}
+    _preparar_credenciais(config.get('credentials'))
+
+    with _lock:
+        _cache_config[caminho] = (versao, config)
+    return config
+
+def credenciais_da_sessao(config):
+    """Cópia das credenciais para o stauth.Authenticate, que altera o dict que recebe."""
+    return copy.deepcopy(config['credentials'])
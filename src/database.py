@@ -1,5 +1,17 @@
 import sqlite3
 import os
+import sys
+import json
+import re
+import queue
+import threading
+import time
+from bisect import bisect_right
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturoTimeout
+from collections import OrderedDict, Counter, deque
+from contextlib import contextmanager
 
 # --- DEFINIÇÃO ROBUSTA DE CAMINHOS ---
 # Diretório onde este script (database.py) está localizado
@@ -14,71 +26,1353 @@ PROJECT_ROOT_DB = os.path.dirname(SCRIPT_DIR_DB) # Assume que database.py está
 
 DB_NAME = os.path.join(PROJECT_ROOT_DB, 'academia.db')
 
+# --- PERFIS DE PRAGMA ---
+# "concorrente" (padrão) é ajustado para muitos leitores e um escritor:
+#   - journal_mode=WAL: leitores não bloqueiam o escritor e vice-versa
+#   - busy_timeout: espera o lock de escrita em vez de falhar com "database is locked"
+#   - synchronous=NORMAL: seguro com WAL e evita um fsync por commit
+#   - mmap_size/cache_size: leituras servidas da memória (256 MB mapeados, ~64 MB de cache)
+#   - temp_store=MEMORY: ORDER BY/GROUP BY temporários sem tocar o disco
+# "padrao" mantém os defaults do SQLite (journal em rollback).
+PERFIS_PRAGMA = {
+    "concorrente": {
+        "journal_mode": "WAL",
+        "busy_timeout": 5000,
+        "synchronous": "NORMAL",
+        "mmap_size": 268435456,
+        "cache_size": -65536, # Negativo = tamanho em KiB
+        "temp_store": "MEMORY",
+    },
+    "padrao": {},
+}
+PRAGMAS_PERMITIDOS = ("journal_mode", "busy_timeout", "synchronous", "mmap_size", "cache_size", "temp_store", "foreign_keys")
+
+_config_bd = {
+    "perfil_pragma": "concorrente",
+    "pragmas": {}, # Sobrescritas individuais sobre o perfil escolhido
+}
+
+def configurar_banco(opcoes=None):
+    """
+    Aplica a seção 'database' do config.yaml (perfil_pragma, pragmas, pool_tamanho, pool_maximo,
+    pool_timeout, leitura, group_commit, instrumentacao).
+    Novas conexões passam a usar os pragmas configurados.
+    """
+    opcoes = opcoes or {}
+    perfil = opcoes.get("perfil_pragma", _config_bd["perfil_pragma"])
+    if perfil not in PERFIS_PRAGMA:
+        print(f"Perfil de pragma '{perfil}' desconhecido. Usando 'concorrente'.")
+        perfil = "concorrente"
+    pragmas = dict(opcoes.get("pragmas") or {})
+    tamanho = opcoes.get("pool_tamanho", POOL_TAMANHO_PADRAO)
+    limites = {"maximo": opcoes.get("pool_maximo"), "timeout": opcoes.get("pool_timeout", POOL_TIMEOUT_PADRAO)}
+    # O app chama esta função a cada rerun: só recria o pool se algo mudou
+    if ((perfil, pragmas, tamanho, limites) != (_config_bd["perfil_pragma"], _config_bd["pragmas"], _pool_tamanho, _pool_limites)
+            or _pool is None):
+        _config_bd["perfil_pragma"] = perfil
+        _config_bd["pragmas"] = pragmas
+        configurar_pool(tamanho, **limites) # Recria o pool com os novos pragmas
+
+    opcoes_leitura = opcoes.get("leitura") or {}
+    configurar_leitura(opcoes_leitura.get("ativo", True), opcoes_leitura.get("replica"),
+                       opcoes_leitura.get("immutable", False), opcoes_leitura.get("cache_size"))
+
+    opcoes_instr = opcoes.get("instrumentacao") or {}
+    configurar_instrumentacao(opcoes_instr.get("ativo"), opcoes_instr.get("limite_lento_ms"),
+                              opcoes_instr.get("explain"), opcoes_instr.get("arquivo_log"))
+
+    opcoes_gc = opcoes.get("group_commit") or {}
+    if opcoes_gc.get("ativo"):
+        ativar_group_commit(opcoes_gc.get("atraso_max_ms", 0), opcoes_gc.get("lote_max", 100))
+    elif _fila_escrita is not None:
+        desativar_group_commit()
+
+def _pragmas_configurados():
+    pragmas = dict(PERFIS_PRAGMA[_config_bd["perfil_pragma"]])
+    pragmas.update(_config_bd["pragmas"])
+    return {nome: valor for nome, valor in pragmas.items() if nome in PRAGMAS_PERMITIDOS}
+
+def _aplicar_pragmas(conn):
+    for nome, valor in _pragmas_configurados().items():
+        try:
+            conn.execute(f"PRAGMA {nome} = {valor}")
+        except sqlite3.Error as e:
+            print(f"Erro ao aplicar PRAGMA {nome}={valor}: {e}")
+
+def get_active_pragmas(conn_externa=None):
+    """Lê da conexão os valores efetivamente ativos (para conferir o perfil em produção)."""
+    with conexao_bd(conn_externa) as conn:
+        ativos = {"perfil": _config_bd["perfil_pragma"]}
+        for nome in PRAGMAS_PERMITIDOS:
+            ativos[nome] = conn.execute(f"PRAGMA {nome}").fetchone()[0]
+        return ativos
+
 def conectar_bd():
-    """Conecta ao banco de dados SQLite e configura row_factory."""
+    """Conecta ao banco de dados SQLite e configura row_factory e pragmas."""
     try:
-        conn = sqlite3.connect(DB_NAME)
+        conn = sqlite3.connect(DB_NAME, check_same_thread=False)
         conn.row_factory = sqlite3.Row # Para acessar colunas pelo nome
+        _aplicar_pragmas(conn)
         return conn
     except sqlite3.Error as e:
         print(f"Erro ao conectar ao banco de dados '{DB_NAME}': {e}")
         raise # Re-levanta a exceção para que o chamador saiba que falhou
 
+# --- POOL DE CONEXÕES ---
+# Cada sessão do Streamlit roda em sua própria thread. Em vez de abrir e fechar
+# uma conexão a cada consulta, as conexões ficam guardadas no pool e são
+# emprestadas a uma thread por vez (por isso check_same_thread=False acima).
+POOL_TAMANHO_PADRAO = 5
+POOL_MAXIMO_PADRAO = 20 # Conexões emprestadas ao mesmo tempo, no máximo
+POOL_TIMEOUT_PADRAO = 30.0 # Segundos esperando uma conexão livre antes de desistir
+
+class PoolConexoes:
+    """
+    Pool simples de conexões SQLite, seguro para uso entre threads.
+    `tamanho` é quantas conexões livres ficam guardadas; `maximo` é o teto de
+    conexões emprestadas ao mesmo tempo. Com o teto atingido, obter() espera
+    uma devolução por até `timeout` segundos e então levanta sqlite3.OperationalError.
+    """
+
+    def __init__(self, db_name, tamanho=POOL_TAMANHO_PADRAO, fabrica=None, maximo=None, timeout=POOL_TIMEOUT_PADRAO):
+        self.db_name = db_name
+        self.tamanho = tamanho
+        self.maximo = max(maximo or POOL_MAXIMO_PADRAO, tamanho)
+        self.timeout = timeout
+        self._fabrica = fabrica or conectar_bd # Função que abre uma conexão nova
+        self._livres = queue.LifoQueue(maxsize=tamanho) # LIFO: reaproveita a conexão mais "quente"
+        self._vagas = threading.BoundedSemaphore(self.maximo)
+        self._lock = threading.Lock()
+        self._encerrado = False
+        self._emprestadas = 0
+        self._stats = {"criadas": 0, "reutilizadas": 0, "descartadas": 0, "esperas": 0, "esgotado": 0}
+
+    def _contar(self, chave):
+        with self._lock:
+            self._stats[chave] += 1
+
+    def _conexao_saudavel(self, conn):
+        """Health check barato: a conexão ainda responde a uma consulta trivial?"""
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def obter(self):
+        """
+        Retira uma conexão do pool (ou cria uma nova se não houver livres).
+        Com `maximo` conexões emprestadas, espera uma devolução por até `timeout` segundos.
+        """
+        if not self._vagas.acquire(blocking=False):
+            self._contar("esperas")
+            if not self._vagas.acquire(timeout=self.timeout):
+                self._contar("esgotado")
+                raise sqlite3.OperationalError(
+                    f"Pool de conexões esgotado: {self.maximo} conexões em uso por mais de {self.timeout}s")
+        try:
+            conn = self._retirar()
+        except BaseException:
+            self._vagas.release()
+            raise
+        with self._lock:
+            self._emprestadas += 1
+        return conn
+
+    def _retirar(self):
+        while True:
+            try:
+                conn = self._livres.get_nowait()
+            except queue.Empty:
+                break
+            if self._conexao_saudavel(conn):
+                self._contar("reutilizadas")
+                return conn
+            self._descartar(conn)
+        conn = self._fabrica()
+        self._contar("criadas")
+        return conn
+
+    def devolver(self, conn):
+        """Devolve a conexão ao pool; se o pool estiver cheio ou encerrado, ela é fechada."""
+        try:
+            if conn.in_transaction: # Nunca devolve uma transação pendente para outra sessão
+                conn.rollback()
+            with self._lock: # Mesmo lock de encerrar(): depois dela nada volta para a fila
+                guardada = not self._encerrado
+                if guardada:
+                    self._livres.put_nowait(conn)
+            if not guardada:
+                self._descartar(conn)
+        except (queue.Full, sqlite3.Error):
+            self._descartar(conn)
+        finally:
+            with self._lock:
+                self._emprestadas -= 1
+            self._vagas.release()
+
+    def _descartar(self, conn):
+        self._contar("descartadas")
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    @contextmanager
+    def conexao(self):
+        """Context manager: `with pool.conexao() as conn: ...`"""
+        conn = self.obter()
+        try:
+            yield conn
+        finally:
+            self.devolver(conn)
+
+    def fechar_todas(self):
+        """Fecha todas as conexões livres (ex: antes de apagar/recriar o banco)."""
+        while True:
+            try:
+                self._descartar(self._livres.get_nowait())
+            except queue.Empty:
+                break
+
+    def encerrar(self):
+        """Pool substituído: fecha as conexões livres e as emprestadas quando forem devolvidas."""
+        with self._lock:
+            self._encerrado = True
+        self.fechar_todas()
+
+    def estatisticas(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["emprestadas"] = self._emprestadas
+        stats["livres"] = self._livres.qsize()
+        stats["tamanho"] = self.tamanho
+        stats["maximo"] = self.maximo
+        return stats
+
+_pool = None
+_pool_tamanho = POOL_TAMANHO_PADRAO
+_pool_limites = {"maximo": None, "timeout": POOL_TIMEOUT_PADRAO} # Valem também para o pool de leitura
+_pool_lock = threading.Lock()
+_bancos_migrados = set() # Arquivos já na última versão do esquema neste processo
+_migracoes_falhas = {} # Arquivo -> versão da migração que falhou neste processo
+
+def _migrar(pool):
+    """
+    Aplica as migrações pendentes no banco do pool. O banco só é marcado como
+    migrado quando chega à última versão: se o app abrir antes do
+    scripts/setup_database.py (tabelas ainda inexistentes), a próxima chamada
+    de get_pool() tenta de novo. Se uma migração falhar com o esquema criado,
+    ela não é repetida a cada consulta: fica registrada até o processo reiniciar.
+    """
+    if pool.db_name in _bancos_migrados or pool.db_name in _migracoes_falhas:
+        return
+    with pool.conexao() as conn:
+        versao = aplicar_migracoes(conn_externa=conn)
+        if versao >= MIGRACOES[-1][0]:
+            _bancos_migrados.add(pool.db_name)
+        elif _esquema_criado(conn):
+            _migracoes_falhas[pool.db_name] = next(m[0] for m in MIGRACOES if m[0] > versao)
+            print(f"Banco {pool.db_name} parado na versão {versao} do esquema; "
+                  f"a migração {_migracoes_falhas[pool.db_name]} só será tentada de novo ao reiniciar o app.")
+
+def _novo_pool():
+    """Cria o pool para DB_NAME e aplica as migrações pendentes."""
+    pool = PoolConexoes(DB_NAME, tamanho=_pool_tamanho, **_pool_limites)
+    _migrar(pool)
+    return pool
+
+def get_pool():
+    """Retorna o pool do processo, recriando-o se DB_NAME tiver sido alterado."""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.db_name != DB_NAME:
+            if _pool is not None:
+                _pool.encerrar()
+            _pool = _novo_pool()
+        else:
+            _migrar(_pool) # Sem custo depois que o banco chega à última versão
+        return _pool
+
+def configurar_pool(tamanho, maximo=None, timeout=POOL_TIMEOUT_PADRAO):
+    """
+    Redefine o pool: `tamanho` conexões mantidas abertas entre consultas e no
+    máximo `maximo` emprestadas ao mesmo tempo (espera de até `timeout` segundos).
+    """
+    global _pool, _pool_tamanho
+    with _pool_lock:
+        if _pool is not None:
+            _pool.encerrar() # As conexões ainda emprestadas são fechadas ao voltar
+        _pool_tamanho = tamanho
+        _pool_limites.update(maximo=maximo, timeout=timeout)
+        _pool = _novo_pool()
+    _fechar_pool_leitura() # Recriado no próximo uso, com os novos pragmas e tamanho
+    _encerrar_executor_leituras() # Uma thread de leitura por conexão do pool
+    return _pool
+
+@contextmanager
+def conexao_bd(conn_externa=None):
+    """
+    Fornece uma conexão para um bloco `with`.
+    Se conn_externa for passada ela é usada diretamente; senão uma conexão é
+    emprestada do pool e devolvida ao final.
+    """
+    if conn_externa:
+        yield conn_externa
+    else:
+        with get_pool().conexao() as conn:
+            yield conn
+
+def get_pool_stats(leitura=False):
+    """Contadores do pool (ou do pool somente leitura): conexões criadas vs. reutilizadas."""
+    return (get_pool_leitura() if leitura else get_pool()).estatisticas()
+
+# --- CONEXÕES SOMENTE LEITURA ---
+# As funções de leitura (_fetch_all, _fetch_one, _fetch_tuplas e quem as usa)
+# pegam conexões de um pool separado, abertas com mode=ro e PRAGMA query_only:
+# um relatório longo nunca pede o lock de escrita e não ocupa as conexões que a
+# recepção usa para gravar, e o cache de páginas delas é maior (só leem).
+# Com `replica`, as leituras vão para outro arquivo (ex: cópia mantida por
+# backup periódico), que pode estar atrasado em relação ao banco principal.
+# `immutable` abre a réplica como um snapshot que não muda (sem locks nem WAL):
+# só vale para a réplica, e só se ninguém a alterar com o app aberto.
+CACHE_SIZE_LEITURA = -131072 # ~128 MB (negativo = KiB)
+
+_config_leitura = {
+    "ativo": True,
+    "replica": None,
+    "immutable": False,
+    "cache_size": CACHE_SIZE_LEITURA,
+}
+_pool_leitura = None
+_pool_leitura_lock = threading.Lock()
+
+def configurar_leitura(ativo=True, replica=None, immutable=False, cache_size=CACHE_SIZE_LEITURA):
+    """Aplica a seção 'database.leitura' do config.yaml (ativo, replica, immutable, cache_size)."""
+    if immutable and not replica:
+        print("PRAGMA immutable ignorado: só vale para a réplica (o banco principal recebe escritas).")
+        immutable = False
+    nova = {"ativo": bool(ativo), "replica": replica or None, "immutable": bool(immutable),
+            "cache_size": cache_size if cache_size is not None else CACHE_SIZE_LEITURA}
+    if nova != _config_leitura:
+        _config_leitura.update(nova)
+        _fechar_pool_leitura()
+        limpar_cache() # Resultados lidos do arquivo anterior
+
+def _caminho_leitura():
+    return _config_leitura["replica"] or DB_NAME
+
+def conectar_bd_leitura():
+    """Conecta em modo somente leitura (mode=ro + query_only) ao banco ou à réplica configurada."""
+    caminho = _caminho_leitura()
+    uri = Path(caminho).absolute().as_uri() + "?mode=ro"
+    if _config_leitura["immutable"]:
+        uri += "&immutable=1"
+    try:
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        pragmas = {nome: valor for nome, valor in _pragmas_configurados().items()
+                   if nome not in ("journal_mode", "synchronous")} # Definidos por quem escreve
+        pragmas["cache_size"] = _config_leitura["cache_size"]
+        pragmas["query_only"] = "ON"
+        for nome, valor in pragmas.items():
+            try:
+                conn.execute(f"PRAGMA {nome} = {valor}")
+            except sqlite3.Error as e:
+                print(f"Erro ao aplicar PRAGMA {nome}={valor} (leitura): {e}")
+        return conn
+    except sqlite3.Error as e:
+        print(f"Erro ao conectar (somente leitura) ao banco de dados '{caminho}': {e}")
+        raise
+
+def get_pool_leitura():
+    """Pool de conexões somente leitura, recriado se o banco ou a réplica mudarem."""
+    global _pool_leitura
+    caminho = _caminho_leitura()
+    if caminho == DB_NAME:
+        get_pool() # O pool principal cria o arquivo e aplica as migrações antes da primeira leitura
+    with _pool_leitura_lock:
+        if _pool_leitura is None or _pool_leitura.db_name != caminho:
+            if _pool_leitura is not None:
+                _pool_leitura.encerrar()
+            _pool_leitura = PoolConexoes(caminho, tamanho=_pool_tamanho, fabrica=conectar_bd_leitura, **_pool_limites)
+        return _pool_leitura
+
+def _fechar_pool_leitura():
+    global _pool_leitura
+    with _pool_leitura_lock:
+        if _pool_leitura is not None:
+            _pool_leitura.encerrar()
+        _pool_leitura = None
+
+@contextmanager
+def conexao_leitura(conn_externa=None):
+    """
+    Como conexao_bd(), mas empresta uma conexão do pool somente leitura
+    (ou do pool principal, se as conexões de leitura estiverem desativadas).
+    """
+    if conn_externa:
+        yield conn_externa
+    elif not _config_leitura["ativo"]:
+        with conexao_bd() as conn:
+            yield conn
+    else:
+        with get_pool_leitura().conexao() as conn:
+            yield conn
+
+# --- INSTRUMENTAÇÃO DE CONSULTAS ---
+# _fetch_all, _fetch_one, _fetch_tuplas e _execute_query registram cada statement:
+# duração, linhas, erros e quem chamou (a função pública de database.py e a linha
+# do app). Por statement ficam contadores, um histograma por faixas e as últimas
+# JANELA_LATENCIAS durações (para p50/p95). Statements acima de limite_lento_ms
+# vão para o log de consultas lentas, opcionalmente com EXPLAIN QUERY PLAN.
+FAIXAS_HISTOGRAMA_MS = (1, 5, 10, 50, 100, 500, 1000)
+JANELA_LATENCIAS = 500
+MAX_CONSULTAS_MONITORADAS = 500 # Acima disso, statements novos são somados em "(outras)"
+MAX_CONSULTAS_LENTAS = 200
+
+_config_instrumentacao = {
+    "ativo": True,
+    "limite_lento_ms": 200.0,
+    "explain": False,
+    "arquivo_log": None, # Se definido, cada consulta lenta é acrescentada como uma linha JSON
+}
+_consultas_stats = {}
+_consultas_lentas = deque(maxlen=MAX_CONSULTAS_LENTAS)
+_instrumentacao_lock = threading.Lock()
+_texto_normalizado = {}
+
+def configurar_instrumentacao(ativo=None, limite_lento_ms=None, explain=None, arquivo_log=None):
+    """Ajusta a instrumentação (os argumentos omitidos mantêm o valor atual)."""
+    for chave, valor in (("ativo", ativo), ("limite_lento_ms", limite_lento_ms),
+                         ("explain", explain), ("arquivo_log", arquivo_log)):
+        if valor is not None:
+            _config_instrumentacao[chave] = valor
+
+def get_config_instrumentacao():
+    return dict(_config_instrumentacao)
+
+def _normalizar_query(query):
+    texto = _texto_normalizado.get(query)
+    if texto is None:
+        if len(_texto_normalizado) > 4 * MAX_CONSULTAS_MONITORADAS:
+            _texto_normalizado.clear()
+        texto = _texto_normalizado[query] = " ".join(re.sub(r"--[^\n]*", "", query).split())
+    return texto
+
+def _chamador():
+    """(função pública de database.py, 'arquivo:linha' de quem a chamou)."""
+    frame = sys._getframe(3) # _chamador <- _registrar_consulta <- helper <- chamador do helper
+    funcao = None
+    while frame is not None and frame.f_code.co_filename == __file__:
+        nome = frame.f_code.co_name
+        if not nome.startswith("_") and nome not in ("conexao_bd", "<module>"):
+            funcao = nome # Fica a mais externa: get_dashboard_summary e não count_total_clientes
+        frame = frame.f_back
+    origem = f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno}" if frame is not None else None
+    return funcao, origem
+
+_observadores_consultas = []
+
+def registrar_observador_consultas(funcao):
+    """`funcao(duracao_ms)` é chamada após cada statement, na thread que o executou."""
+    if funcao not in _observadores_consultas:
+        _observadores_consultas.append(funcao)
+
+def _registrar_consulta(query, params, inicio, linhas, erro=None, conn=None):
+    duracao_ms = (time.perf_counter() - inicio) * 1000
+    for observador in _observadores_consultas:
+        observador(duracao_ms)
+    if not _config_instrumentacao["ativo"]:
+        return
+    texto = _normalizar_query(query)
+    funcao, origem = _chamador()
+    with _instrumentacao_lock:
+        stats = _consultas_stats.get(texto)
+        if stats is None:
+            if len(_consultas_stats) >= MAX_CONSULTAS_MONITORADAS:
+                texto = "(outras)"
+                stats = _consultas_stats.get(texto)
+            if stats is None:
+                stats = _consultas_stats[texto] = {
+                    "chamadas": 0, "erros": 0, "tempo_total_ms": 0.0, "max_ms": 0.0, "linhas_total": 0,
+                    "histograma": [0] * (len(FAIXAS_HISTOGRAMA_MS) + 1),
+                    "latencias": deque(maxlen=JANELA_LATENCIAS), "chamadores": Counter(),
+                }
+        stats["chamadas"] += 1
+        stats["erros"] += erro is not None
+        stats["tempo_total_ms"] += duracao_ms
+        stats["max_ms"] = max(stats["max_ms"], duracao_ms)
+        stats["linhas_total"] += linhas
+        stats["histograma"][bisect_right(FAIXAS_HISTOGRAMA_MS, duracao_ms)] += 1
+        stats["latencias"].append(duracao_ms)
+        stats["chamadores"][funcao or origem] += 1
+
+    if duracao_ms < _config_instrumentacao["limite_lento_ms"]:
+        return
+    entrada = {
+        "quando": datetime.now().isoformat(timespec="seconds"),
+        "duracao_ms": round(duracao_ms, 2),
+        "query": texto,
+        "params": repr(params)[:200] if params else None,
+        "linhas": linhas,
+        "funcao": funcao,
+        "origem": origem,
+        "erro": str(erro) if erro is not None else None,
+        "plano": None,
+    }
+    if _config_instrumentacao["explain"] and conn is not None and erro is None:
+        try:
+            plano = conn.execute(f"EXPLAIN QUERY PLAN {query}", params or ()).fetchall()
+            entrada["plano"] = [linha[3] for linha in plano]
+        except sqlite3.Error:
+            pass # Ex.: statements que não aceitam EXPLAIN
+    with _instrumentacao_lock:
+        _consultas_lentas.append(entrada)
+        arquivo = _config_instrumentacao["arquivo_log"]
+        if arquivo:
+            try:
+                with open(arquivo, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+            except OSError as e:
+                print(f"Erro ao gravar o log de consultas lentas em '{arquivo}': {e}")
+
+def _percentil(valores, fracao):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(fracao * len(ordenados)))] if ordenados else 0.0
+
+def get_query_stats(ordenar_por="tempo_total_ms", limite=20):
+    """
+    Estatísticas por statement, dos piores para os melhores segundo `ordenar_por`
+    (tempo_total_ms, media_ms, p95_ms, max_ms, chamadas, erros ou linhas_total).
+    """
+    faixas = [f"<{FAIXAS_HISTOGRAMA_MS[0]} ms"]
+    faixas += [f"{a}-{b} ms" for a, b in zip(FAIXAS_HISTOGRAMA_MS, FAIXAS_HISTOGRAMA_MS[1:])]
+    faixas += [f">={FAIXAS_HISTOGRAMA_MS[-1]} ms"]
+    with _instrumentacao_lock:
+        copia = [(texto, dict(stats, latencias=list(stats["latencias"]), chamadores=stats["chamadores"].most_common(3),
+                              histograma=list(stats["histograma"])))
+                 for texto, stats in _consultas_stats.items()]
+    resultado = []
+    for texto, stats in copia:
+        resultado.append({
+            "query": texto,
+            "chamadas": stats["chamadas"],
+            "erros": stats["erros"],
+            "tempo_total_ms": stats["tempo_total_ms"],
+            "media_ms": stats["tempo_total_ms"] / stats["chamadas"],
+            "p50_ms": _percentil(stats["latencias"], 0.50),
+            "p95_ms": _percentil(stats["latencias"], 0.95),
+            "max_ms": stats["max_ms"],
+            "linhas_total": stats["linhas_total"],
+            "chamadores": ", ".join(f"{nome} ({n})" for nome, n in stats["chamadores"]),
+            "histograma": dict(zip(faixas, stats["histograma"])),
+        })
+    resultado.sort(key=lambda r: r.get(ordenar_por, 0), reverse=True)
+    return resultado[:limite] if limite else resultado
+
+def get_slow_queries(limite=50):
+    """Consultas lentas mais recentes primeiro."""
+    with _instrumentacao_lock:
+        return list(reversed(_consultas_lentas))[:limite]
+
+def limpar_query_stats():
+    with _instrumentacao_lock:
+        _consultas_stats.clear()
+        _consultas_lentas.clear()
+
+def _fetch_all_ou_erro(query, params=None, conn_externa=None):
+    """Como _fetch_all, mas levanta sqlite3.Error: o chamador distingue falha de resultado vazio."""
+    with conexao_leitura(conn_externa) as conn:
+        inicio = time.perf_counter()
+        try:
+            cursor = conn.cursor()
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            results = [dict(row) for row in cursor.fetchall()]
+            _registrar_consulta(query, params, inicio, len(results), conn=conn)
+            return results
+        except sqlite3.Error as e:
+            _registrar_consulta(query, params, inicio, 0, erro=e)
+            raise
+
 def _fetch_all(query, params=None, conn_externa=None):
     """Executa uma query e retorna todos os resultados como lista de dicionários."""
-    conn = conn_externa if conn_externa else conectar_bd()
     try:
-        cursor = conn.cursor()
-        if params:
-            cursor.execute(query, params)
-        else:
-            cursor.execute(query)
-        results = [dict(row) for row in cursor.fetchall()]
-        return results
+        return _fetch_all_ou_erro(query, params, conn_externa)
     except sqlite3.Error as e:
         print(f"Erro em _fetch_all com query '{query[:50]}...': {e}")
         return [] # Retorna lista vazia em caso de erro
-    finally:
-        if not conn_externa and conn: # Só fecha se a conexão foi aberta nesta função
-            conn.close()
 
 def _fetch_one(query, params=None, conn_externa=None):
     """Executa uma query e retorna um único resultado como dicionário."""
-    conn = conn_externa if conn_externa else conectar_bd()
-    try:
-        cursor = conn.cursor()
-        if params:
-            cursor.execute(query, params)
-        else:
-            cursor.execute(query)
-        result = cursor.fetchone()
-        return dict(result) if result else None
-    except sqlite3.Error as e:
-        print(f"Erro em _fetch_one com query '{query[:50]}...': {e}")
-        return None # Retorna None em caso de erro
-    finally:
-        if not conn_externa and conn:
-            conn.close()
+    with conexao_leitura(conn_externa) as conn:
+        inicio = time.perf_counter()
+        try:
+            cursor = conn.cursor()
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            result = cursor.fetchone()
+            _registrar_consulta(query, params, inicio, 1 if result else 0, conn=conn)
+            return dict(result) if result else None
+        except sqlite3.Error as e:
+            _registrar_consulta(query, params, inicio, 0, erro=e)
+            print(f"Erro em _fetch_one com query '{query[:50]}...': {e}")
+            return None # Retorna None em caso de erro
 
 def _execute_query(query, params=None, conn_externa=None):
     """Executa uma query de modificação (INSERT, UPDATE, DELETE)."""
-    conn = conn_externa if conn_externa else conectar_bd()
+    if _fila_escrita is not None and not conn_externa:
+        inicio = time.perf_counter()
+        try:
+            lastrowid = _fila_escrita.submeter(query, params).result(timeout=FILA_ESCRITA_TIMEOUT)
+            _registrar_consulta(query, params, inicio, 1)
+            invalidar_tabelas(*_tabelas_escritas(query))
+            return lastrowid
+        except FuturoTimeout as e: # A escrita continua na fila e ainda pode ser gravada
+            _registrar_consulta(query, params, inicio, 0, erro=e)
+            print(f"Erro em _execute_query (group commit) com query '{query[:50]}...': "
+                  f"sem resposta da fila de escrita em {FILA_ESCRITA_TIMEOUT:.0f}s")
+            return None
+        except (sqlite3.Error, RuntimeError) as e:
+            _registrar_consulta(query, params, inicio, 0, erro=e)
+            print(f"Erro em _execute_query (group commit) com query '{query[:50]}...': {e}")
+            return None
+    with conexao_bd(conn_externa) as conn:
+        inicio = time.perf_counter()
+        try:
+            cursor = conn.cursor()
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            conn.commit()
+            _registrar_consulta(query, params, inicio, max(cursor.rowcount, 0)) # Sem EXPLAIN: já foi executada
+            invalidar_tabelas(*_tabelas_escritas(query))
+            return cursor.lastrowid # Útil para INSERTs com autoincrement
+        except sqlite3.Error as e:
+            _registrar_consulta(query, params, inicio, 0, erro=e)
+            print(f"Erro em _execute_query com query '{query[:50]}...': {e}")
+            if not conn_externa: # Só faz rollback se a conexão não é do chamador
+                conn.rollback()
+            return None
+
+# --- CACHE DE CONSULTAS ---
+# Listas para selectboxes e relatórios são relidas a cada rerun do Streamlit,
+# mas só mudam quando algum add_* grava. Cada tabela tem um contador de versão
+# que as escritas incrementam; uma entrada do cache guarda as versões das
+# tabelas que sua query lê e deixa de valer assim que alguma delas muda.
+# O cache é por processo: escritas feitas por outro processo (ex: o script de
+# setup) só aparecem após limpar_cache() ou reinício do app.
+CACHE_MAX_ENTRADAS = 256
+CACHE_MAX_LINHAS = 200_000
+
+_versoes_tabelas = {}
+_cache_lock = threading.Lock()
+_cache = OrderedDict() # chave (query, params) -> (versões, linhas); ordem = LRU
+_cache_stats = {"hits": 0, "misses": 0, "invalidadas": 0, "despejadas": 0}
+_cache_linhas = 0
+_cache_geracao = 0 # Incrementada por limpar_cache(): caches derivados (ex: src/relatorios.py) também caem
+
+def _tabelas_escritas(query):
+    """Tabelas alteradas por um INSERT/UPDATE/DELETE/REPLACE."""
+    return re.findall(r"(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE|DELETE\s+FROM)\s+(\w+)", query, re.IGNORECASE)
+
+def invalidar_tabelas(*tabelas):
+    """Incrementa a versão das tabelas: entradas do cache que as leem ficam inválidas."""
+    with _cache_lock:
+        for tabela in tabelas:
+            _versoes_tabelas[tabela] = _versoes_tabelas.get(tabela, 0) + 1
+
+def get_versoes_tabelas(*tabelas):
+    """
+    Chave de validade para caches fora deste módulo: muda a cada escrita deste
+    processo em alguma das tabelas e a cada limpar_cache().
+    """
+    with _cache_lock:
+        return (_cache_geracao,) + tuple(_versoes_tabelas.get(tabela, 0) for tabela in tabelas)
+
+def _remover_entrada(chave):
+    global _cache_linhas
+    _, linhas = _cache.pop(chave)
+    _cache_linhas -= len(linhas)
+
+def _fetch_all_cache(query, params=None):
+    """_fetch_all com cache versionado pelas tabelas lidas na query."""
+    global _cache_linhas
+    chave = (query, tuple(params) if params else ())
+    tabelas = sorted(set(_tabelas_da_query(query).values()))
+    with _cache_lock:
+        versoes = tuple(_versoes_tabelas.get(t, 0) for t in tabelas)
+        entrada = _cache.get(chave)
+        if entrada is not None:
+            if entrada[0] == versoes:
+                _cache.move_to_end(chave)
+                _cache_stats["hits"] += 1
+                return [dict(linha) for linha in entrada[1]] # Cópias: o chamador pode alterar os dicts
+            _remover_entrada(chave)
+            _cache_stats["invalidadas"] += 1
+        _cache_stats["misses"] += 1
+
     try:
-        cursor = conn.cursor()
-        if params:
-            cursor.execute(query, params)
-        else:
-            cursor.execute(query)
-        conn.commit()
-        return cursor.lastrowid # Útil para INSERTs com autoincrement
+        linhas = _fetch_all_ou_erro(query, params)
     except sqlite3.Error as e:
-        print(f"Erro em _execute_query com query '{query[:50]}...': {e}")
-        if conn and not conn_externa: # Só faz rollback se a conexão foi aberta aqui e ainda existe
-             conn.rollback()
-        return None
+        # Falha (ex: "database is locked") não vai para o cache: a próxima chamada tenta de novo
+        print(f"Erro em _fetch_all_cache com query '{query[:50]}...': {e}")
+        return []
+
+    with _cache_lock:
+        # Só guarda se nenhuma escrita aconteceu durante a leitura
+        if versoes == tuple(_versoes_tabelas.get(t, 0) for t in tabelas) and len(linhas) <= CACHE_MAX_LINHAS:
+            if chave in _cache:
+                _remover_entrada(chave)
+            _cache[chave] = (versoes, [dict(linha) for linha in linhas])
+            _cache_linhas += len(linhas)
+            while len(_cache) > CACHE_MAX_ENTRADAS or _cache_linhas > CACHE_MAX_LINHAS:
+                _remover_entrada(next(iter(_cache)))
+                _cache_stats["despejadas"] += 1
+    return linhas
+
+def limpar_cache():
+    """Descarta todas as entradas do cache de consultas."""
+    global _cache_linhas, _cache_geracao
+    with _cache_lock:
+        _cache.clear()
+        _cache_linhas = 0
+        _cache_geracao += 1
+
+def get_cache_stats():
+    """Hits, misses, entradas invalidadas por escrita e despejadas pelo limite LRU."""
+    with _cache_lock:
+        stats = dict(_cache_stats)
+        stats["entradas"] = len(_cache)
+        stats["linhas"] = _cache_linhas
+    total = stats["hits"] + stats["misses"]
+    stats["taxa_acerto"] = stats["hits"] / total if total else 0.0
+    return stats
+
+# --- GROUP COMMIT (OPCIONAL) ---
+# Com vários atendentes cadastrando ao mesmo tempo, cada INSERT com seu próprio
+# commit disputa o lock de escrita e paga um fsync. Com o group commit ativo,
+# _execute_query entrega a escrita a uma única thread escritora, que junta numa
+# só transação as operações que chegaram enquanto o commit anterior era gravado
+# (mais as que chegarem em até `atraso_max_ms`, limitado a `lote_max`). Cada
+# operação roda em um SAVEPOINT, então a falha de uma não desfaz as outras.
+# Qualquer exceção (não só sqlite3.Error: ex. OverflowError ao ligar um inteiro
+# grande demais) desfaz a operação ou o lote e vai para os Futures; a thread
+# escritora nunca morre com a transação aberta segurando o lock do banco.
+FILA_ESCRITA_TIMEOUT = 60.0 # Segundos que _execute_query espera o commit do lote
+
+class FilaEscrita:
+    """Thread escritora que agrupa escritas de todas as sessões em transações curtas."""
+
+    def __init__(self, atraso_max_ms=0, lote_max=100):
+        self.atraso_max = atraso_max_ms / 1000
+        self.lote_max = lote_max
+        self._fila = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._stats = {"operacoes": 0, "lotes": 0, "erros": 0}
+        self._conn = conectar_bd()
+        self._conn.isolation_level = None # Transações controladas manualmente (BEGIN/COMMIT)
+        self._thread = threading.Thread(target=self._executar, name="fila-escrita-sqlite", daemon=True)
+        self._thread.start()
+
+    def submeter(self, query, params=None):
+        """Enfileira uma escrita; o Future resolve com o lastrowid após o commit do lote."""
+        futuro = Future()
+        if not self._thread.is_alive():
+            futuro.set_exception(RuntimeError("Fila de escrita encerrada."))
+            return futuro
+        self._fila.put((query, params, futuro))
+        return futuro
+
+    def _coletar_lote(self):
+        primeiro = self._fila.get()
+        if primeiro is None:
+            return None
+        lote = [primeiro]
+        limite = time.monotonic() + self.atraso_max
+        while len(lote) < self.lote_max:
+            # O que chegou enquanto o lote anterior era gravado entra sem espera;
+            # depois disso, aguarda novas escritas só até o atraso máximo.
+            restante = limite - time.monotonic()
+            try:
+                item = self._fila.get(timeout=restante) if restante > 0 else self._fila.get_nowait()
+            except queue.Empty:
+                break
+            if item is None: # Pedido de parada: processa o lote atual e encerra
+                self._fila.put(None)
+                break
+            lote.append(item)
+        return lote
+
+    def _executar(self):
+        try:
+            while True:
+                lote = self._coletar_lote()
+                if lote is None:
+                    break
+                try:
+                    self._gravar_lote(lote)
+                except Exception as e: # Erro fora das operações (ex: nas estatísticas)
+                    self._desfazer()
+                    for _, _, futuro in lote:
+                        if not futuro.done():
+                            futuro.set_exception(e)
+        finally:
+            self._conn.close()
+
+    def _desfazer(self):
+        try:
+            if self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+        except sqlite3.Error:
+            pass
+
+    def _gravar_lote(self, lote):
+        resultados = []
+        try:
+            self._conn.execute("BEGIN IMMEDIATE")
+            for query, params, futuro in lote:
+                try:
+                    self._conn.execute("SAVEPOINT operacao")
+                    cursor = self._conn.execute(query, params or ())
+                    self._conn.execute("RELEASE operacao")
+                    resultados.append((futuro, cursor.lastrowid, None))
+                except Exception as e:
+                    self._conn.execute("ROLLBACK TO operacao")
+                    self._conn.execute("RELEASE operacao")
+                    resultados.append((futuro, None, e))
+            self._conn.execute("COMMIT")
+        except Exception as e:
+            # Falha do lote inteiro (ex: lock não obtido): todas as operações falham
+            self._desfazer()
+            resultados = [(futuro, None, e) for _, _, futuro in lote]
+
+        erros = sum(1 for _, _, erro in resultados if erro is not None)
+        with self._stats_lock:
+            self._stats["operacoes"] += len(lote)
+            self._stats["lotes"] += 1
+            self._stats["erros"] += erros
+        for futuro, lastrowid, erro in resultados:
+            if erro is not None:
+                futuro.set_exception(erro)
+            else:
+                futuro.set_result(lastrowid)
+
+    def parar(self):
+        """Processa o que já está na fila e encerra a thread escritora."""
+        self._fila.put(None)
+        self._thread.join()
+
+    def estatisticas(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["operacoes_por_lote"] = stats["operacoes"] / stats["lotes"] if stats["lotes"] else 0.0
+        stats["pendentes"] = self._fila.qsize()
+        return stats
+
+_fila_escrita = None
+
+def ativar_group_commit(atraso_max_ms=0, lote_max=100):
+    """Passa a enviar as escritas de _execute_query para a FilaEscrita."""
+    global _fila_escrita
+    if _fila_escrita is not None:
+        if (_fila_escrita.atraso_max, _fila_escrita.lote_max) == (atraso_max_ms / 1000, lote_max):
+            return _fila_escrita
+        _fila_escrita.parar()
+    _fila_escrita = FilaEscrita(atraso_max_ms, lote_max)
+    return _fila_escrita
+
+def desativar_group_commit():
+    """Volta às escritas diretas (um commit por operação)."""
+    global _fila_escrita
+    if _fila_escrita is not None:
+        fila, _fila_escrita = _fila_escrita, None
+        fila.parar()
+
+def submit_write(query, params=None):
+    """
+    Enfileira uma escrita e retorna um concurrent.futures.Future com o lastrowid,
+    sem bloquear o chamador. Requer o group commit ativo.
+    """
+    if _fila_escrita is None:
+        raise RuntimeError("Group commit desativado. Use ativar_group_commit() antes.")
+    return _fila_escrita.submeter(query, params)
+
+def get_group_commit_stats():
+    """Operações, lotes e média de operações por commit (None se desativado)."""
+    return _fila_escrita.estatisticas() if _fila_escrita is not None else None
+
+# --- LEITURA COLUNAR ---
+# _fetch_all gera um dict por linha; quando o chamador vai montar um DataFrame
+# logo em seguida, é mais barato ler as tuplas do cursor direto para colunas.
+def _fetch_tuplas_ou_erro(query, params=None, conn_externa=None):
+    """Como _fetch_tuplas, mas levanta sqlite3.Error: o chamador distingue falha de resultado vazio."""
+    with conexao_leitura(conn_externa) as conn:
+        inicio = time.perf_counter()
+        try:
+            cursor = conn.cursor()
+            cursor.row_factory = None # Tuplas simples, sem sqlite3.Row/dict por linha
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            colunas = [desc[0] for desc in cursor.description]
+            linhas = cursor.fetchall()
+            _registrar_consulta(query, params, inicio, len(linhas), conn=conn)
+            return colunas, linhas
+        except sqlite3.Error as e:
+            _registrar_consulta(query, params, inicio, 0, erro=e)
+            raise
+
+def _fetch_tuplas(query, params=None, conn_externa=None, levantar_erro=False):
+    """Executa uma query e retorna (nomes_das_colunas, lista_de_tuplas)."""
+    if levantar_erro:
+        return _fetch_tuplas_ou_erro(query, params, conn_externa)
+    try:
+        return _fetch_tuplas_ou_erro(query, params, conn_externa)
+    except sqlite3.Error as e:
+        print(f"Erro em _fetch_tuplas com query '{query[:50]}...': {e}")
+        return [], []
+
+def fetch_columns(query, params=None, conn_externa=None, levantar_erro=False):
+    """
+    Executa uma query e retorna um dict {coluna: tupla_de_valores}.
+    Em caso de erro retorna {}, ou levanta sqlite3.Error com `levantar_erro`.
+    """
+    colunas, linhas = _fetch_tuplas(query, params, conn_externa, levantar_erro)
+    valores = list(zip(*linhas)) if linhas else [() for _ in colunas]
+    return dict(zip(colunas, valores))
+
+def fetch_frame(query, params=None, tipos=None, conn_externa=None, levantar_erro=False):
+    """
+    Executa uma query e retorna um pandas.DataFrame montado direto das tuplas do cursor.
+    `tipos` mapeia coluna -> dtype do pandas; "datetime" converte texto ISO em datetime64.
+    Em caso de erro retorna um DataFrame vazio, ou levanta sqlite3.Error com `levantar_erro`.
+    """
+    import pandas as pd # Import tardio: só as páginas que usam DataFrame pagam o custo
+
+    colunas, linhas = _fetch_tuplas(query, params, conn_externa, levantar_erro)
+    df = pd.DataFrame.from_records(linhas, columns=colunas, coerce_float=True)
+    for coluna, tipo in (tipos or {}).items():
+        if coluna not in df.columns:
+            continue
+        if tipo == "datetime":
+            df[coluna] = pd.to_datetime(df[coluna], errors="coerce")
+        else:
+            df[coluna] = df[coluna].astype(tipo)
+    return df
+
+# --- LEITURAS CONCORRENTES ---
+# Uma página que faz várias consultas independentes paga a soma dos tempos.
+# Com WAL, leitores não bloqueiam uns aos outros e o sqlite3 solta o GIL
+# enquanto a consulta roda, então consultas disparadas em threads diferentes,
+# cada uma com sua própria conexão do pool, rodam de fato ao mesmo tempo.
+# O executor tem tantas threads quanto o pool tem conexões, para que as
+# leituras concorrentes reaproveitem conexões em vez de abrir novas.
+_executor_leituras = None
+_executor_lock = threading.Lock()
+PREFIXO_THREADS_LEITURA = "leitura-sqlite"
+
+def _get_executor_leituras():
+    global _executor_leituras
+    with _executor_lock:
+        if _executor_leituras is None:
+            _executor_leituras = ThreadPoolExecutor(max_workers=_pool_tamanho, thread_name_prefix=PREFIXO_THREADS_LEITURA)
+        return _executor_leituras
+
+def _encerrar_executor_leituras():
+    """Descarta o executor (recriado no próximo uso, ex: com o novo tamanho do pool)."""
+    global _executor_leituras
+    with _executor_lock:
+        executor, _executor_leituras = _executor_leituras, None
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+def submit_read(funcao, *args, **kwargs):
+    """
+    Executa uma função de leitura deste módulo (ex: count_total_clientes) numa
+    thread do executor e retorna um concurrent.futures.Future com o resultado.
+    """
+    if threading.current_thread().name.startswith(PREFIXO_THREADS_LEITURA):
+        # Chamada de dentro de uma leitura concorrente: roda na hora, para não
+        # esperar por uma thread do próprio executor (que pode estar toda ocupada)
+        futuro = Future()
+        try:
+            futuro.set_result(funcao(*args, **kwargs))
+        except Exception as e:
+            futuro.set_exception(e)
+        return futuro
+    return _get_executor_leituras().submit(funcao, *args, **kwargs)
+
+def fetch_concurrently(chamadas):
+    """
+    Dispara leituras independentes ao mesmo tempo e espera todas.
+    `chamadas` é um dict nome -> função ou nome -> (função, arg1, arg2...);
+    retorna um dict nome -> resultado, na mesma ordem. Uma exceção levantada por
+    alguma das funções é repassada ao chamador, como numa chamada direta.
+    """
+    futuros = {}
+    for nome, chamada in chamadas.items():
+        funcao, *args = chamada if isinstance(chamada, tuple) else (chamada,)
+        futuros[nome] = submit_read(funcao, *args)
+    return {nome: futuro.result() for nome, futuro in futuros.items()}
+
+async def fetch_async(funcao, *args):
+    """Versão para asyncio: `await database.fetch_async(database.count_total_clientes)`."""
+    import asyncio
+    return await asyncio.wrap_future(submit_read(funcao, *args))
+
+# --- MIGRAÇÕES DE ESQUEMA ---
+# Cada migração tem um número de versão gravado em PRAGMA user_version.
+# Só as migrações com versão maior que a do arquivo são aplicadas, cada uma
+# em sua própria transação. Novas migrações devem ser adicionadas ao final.
+# Resumo do Dashboard (migração 2): contadores mantidos por triggers, para que
+# os cards leiam poucas linhas em vez de agregar as tabelas a cada rerun.
+SQL_RECONSTRUIR_DASHBOARD = [
+    "DELETE FROM dashboard_stats",
+    "DELETE FROM dashboard_clientes_plano",
+    """INSERT INTO dashboard_stats (chave, valor)
+       SELECT 'total_clientes', COUNT(*) FROM clientes
+       UNION ALL SELECT 'total_instrutores', COUNT(*) FROM instrutores
+       UNION ALL SELECT 'pagamentos_pendentes', COUNT(*) FROM pagamentos WHERE pago = 0""",
+    """INSERT INTO dashboard_clientes_plano (plano_id, total_clientes)
+       SELECT plano_id, COUNT(*) FROM clientes WHERE plano_id IS NOT NULL GROUP BY plano_id""",
+]
+
+# Último treino por cliente (migração 4): um treino_id por cliente, mantido pelos
+# triggers de treinos. "Último" é o de maior data_inicio (empate: maior id), a mesma
+# ordem do ROW_NUMBER que a consulta usava. A cada mudança, o cliente afetado é
+# recalculado com uma busca no índice idx_treinos_cliente_data, o que cobre
+# treinos inseridos fora de ordem, datas alteradas e o último treino apagado.
+SQL_RECONSTRUIR_ULTIMO_TREINO = [
+    "DELETE FROM cliente_ultimo_treino",
+    """INSERT INTO cliente_ultimo_treino (cliente_id, treino_id)
+       SELECT cliente_id, id FROM (
+           SELECT cliente_id, id,
+                  ROW_NUMBER() OVER (PARTITION BY cliente_id ORDER BY data_inicio DESC, id DESC) AS rn
+           FROM treinos WHERE cliente_id IS NOT NULL
+       ) WHERE rn = 1""",
+]
+
+def _sql_recalcular_ultimo_treino(cliente):
+    """Comandos de trigger que recalculam o último treino do cliente `cliente` (no-op se NULL)."""
+    return f"""DELETE FROM cliente_ultimo_treino WHERE cliente_id = {cliente};
+               INSERT INTO cliente_ultimo_treino (cliente_id, treino_id)
+               SELECT cliente_id, id FROM treinos WHERE cliente_id = {cliente}
+               ORDER BY data_inicio DESC, id DESC LIMIT 1;"""
+
+def _sql_somar_plano(plano, delta):
+    """Comando de trigger que soma `delta` ao contador de clientes do plano `plano`."""
+    return f"""INSERT INTO dashboard_clientes_plano (plano_id, total_clientes)
+               SELECT {plano}, {delta} WHERE {plano} IS NOT NULL
+               ON CONFLICT (plano_id) DO UPDATE SET total_clientes = total_clientes + ({delta});"""
+
+def _sql_somar_stat(chave, delta):
+    return f"UPDATE dashboard_stats SET valor = valor + ({delta}) WHERE chave = '{chave}';"
+
+MIGRACOES = [
+    (1, "Índices para as consultas de src/database.py", [
+        # get_pagamentos_by_client_id / get_payment_stats_for_client (cobre SUM(valor) e último pagamento)
+        "CREATE INDEX IF NOT EXISTS idx_pagamentos_cliente_pago_data ON pagamentos (cliente_id, pago, data_pagamento, valor)",
+        # count_pagamentosn (WHERE pago = 0)
+        "CREATE INDEX IF NOT EXISTS idx_pagamentos_pago ON pagamentos (pago)",
+        # Exercícios de um treino, já na ordem de exibição
+        "CREATE INDEX IF NOT EXISTS idx_treino_exercicio_treino_ordem ON treino_exercicio (treino_id, ordem)",
+        # Último treino de um cliente (ORDER BY data_inicio DESC, id DESC) e filtro por cliente
+        # (coberto: o id e as colunas lidas estão no índice)
+        "CREATE INDEX IF NOT EXISTS idx_treinos_cliente_data ON treinos (cliente_id, data_inicio DESC, id DESC, plano_id, nome_treino, data_fim)",
+        "CREATE INDEX IF NOT EXISTS idx_treinos_instrutor_data ON treinos (instrutor_id, data_inicio)",
+        "CREATE INDEX IF NOT EXISTS idx_treinos_data ON treinos (data_inicio)",
+        # Joins e agrupamentos de clientes por instrutor/plano
+        "CREATE INDEX IF NOT EXISTS idx_clientes_instrutor ON clientes (instrutor_id)",
+        "CREATE INDEX IF NOT EXISTS idx_clientes_plano ON clientes (plano_id)",
+        # Listagens e selectboxes ordenados por nome
+        "CREATE INDEX IF NOT EXISTS idx_clientes_nome ON clientes (nome)",
+        "CREATE INDEX IF NOT EXISTS idx_instrutores_nome ON instrutores (nome)",
+        "CREATE INDEX IF NOT EXISTS idx_treinos_nome ON treinos (nome_treino)",
+    ]),
+    (2, "Resumo do Dashboard mantido por triggers", [
+        "CREATE TABLE IF NOT EXISTS dashboard_stats (chave TEXT PRIMARY KEY, valor INTEGER NOT NULL) WITHOUT ROWID",
+        """CREATE TABLE IF NOT EXISTS dashboard_clientes_plano (
+               plano_id INTEGER PRIMARY KEY,
+               total_clientes INTEGER NOT NULL
+           )""",
+        *SQL_RECONSTRUIR_DASHBOARD,
+        f"""CREATE TRIGGER IF NOT EXISTS trg_dashboard_clientes_insert AFTER INSERT ON clientes BEGIN
+                {_sql_somar_stat('total_clientes', 1)}
+                {_sql_somar_plano('NEW.plano_id', 1)}
+            END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_dashboard_clientes_delete AFTER DELETE ON clientes BEGIN
+                {_sql_somar_stat('total_clientes', -1)}
+                {_sql_somar_plano('OLD.plano_id', -1)}
+            END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_dashboard_clientes_plano AFTER UPDATE OF plano_id ON clientes
+            WHEN OLD.plano_id IS NOT NEW.plano_id BEGIN
+                {_sql_somar_plano('OLD.plano_id', -1)}
+                {_sql_somar_plano('NEW.plano_id', 1)}
+            END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_dashboard_instrutores_insert AFTER INSERT ON instrutores BEGIN
+                {_sql_somar_stat('total_instrutores', 1)}
+            END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_dashboard_instrutores_delete AFTER DELETE ON instrutores BEGIN
+                {_sql_somar_stat('total_instrutores', -1)}
+            END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_dashboard_pagamentos_insert AFTER INSERT ON pagamentos
+            WHEN NEW.pago = 0 BEGIN
+                {_sql_somar_stat('pagamentos_pendentes', 1)}
+            END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_dashboard_pagamentos_delete AFTER DELETE ON pagamentos
+            WHEN OLD.pago = 0 BEGIN
+                {_sql_somar_stat('pagamentos_pendentes', -1)}
+            END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_dashboard_pagamentos_pago AFTER UPDATE OF pago ON pagamentos
+            WHEN (OLD.pago = 0) IS NOT (NEW.pago = 0) BEGIN
+                {_sql_somar_stat('pagamentos_pendentes', "CASE WHEN NEW.pago = 0 THEN 1 ELSE -1 END")}
+            END""",
+    ]),
+    (3, "Índice de texto completo (FTS5) para nome, email e telefone dos clientes", [
+        # Tabela de conteúdo externo: o texto fica só em 'clientes', o FTS guarda o índice.
+        # remove_diacritics 2 faz "antonio" encontrar "Antônio"; prefix acelera buscas por prefixo.
+        """CREATE VIRTUAL TABLE IF NOT EXISTS clientes_fts USING fts5(
+               nome, email, telefone,
+               content='clientes', content_rowid='id',
+               tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+           )""",
+        "INSERT INTO clientes_fts (clientes_fts) VALUES ('rebuild')",
+        """CREATE TRIGGER IF NOT EXISTS trg_clientes_fts_insert AFTER INSERT ON clientes BEGIN
+               INSERT INTO clientes_fts (rowid, nome, email, telefone) VALUES (NEW.id, NEW.nome, NEW.email, NEW.telefone);
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_clientes_fts_delete AFTER DELETE ON clientes BEGIN
+               INSERT INTO clientes_fts (clientes_fts, rowid, nome, email, telefone) VALUES ('delete', OLD.id, OLD.nome, OLD.email, OLD.telefone);
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_clientes_fts_update AFTER UPDATE OF nome, email, telefone ON clientes BEGIN
+               INSERT INTO clientes_fts (clientes_fts, rowid, nome, email, telefone) VALUES ('delete', OLD.id, OLD.nome, OLD.email, OLD.telefone);
+               INSERT INTO clientes_fts (rowid, nome, email, telefone) VALUES (NEW.id, NEW.nome, NEW.email, NEW.telefone);
+           END""",
+    ]),
+    (4, "Último treino por cliente mantido por triggers", [
+        """CREATE TABLE IF NOT EXISTS cliente_ultimo_treino (
+               cliente_id INTEGER PRIMARY KEY,
+               treino_id INTEGER NOT NULL
+           ) WITHOUT ROWID""",
+        *SQL_RECONSTRUIR_ULTIMO_TREINO,
+        f"""CREATE TRIGGER IF NOT EXISTS trg_ultimo_treino_insert AFTER INSERT ON treinos
+            WHEN NEW.cliente_id IS NOT NULL BEGIN
+                {_sql_recalcular_ultimo_treino('NEW.cliente_id')}
+            END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_ultimo_treino_delete AFTER DELETE ON treinos
+            WHEN OLD.cliente_id IS NOT NULL BEGIN
+                {_sql_recalcular_ultimo_treino('OLD.cliente_id')}
+            END""",
+        # Troca de cliente: os dois clientes são recalculados
+        f"""CREATE TRIGGER IF NOT EXISTS trg_ultimo_treino_update AFTER UPDATE OF cliente_id, data_inicio ON treinos BEGIN
+                {_sql_recalcular_ultimo_treino('OLD.cliente_id')}
+                {_sql_recalcular_ultimo_treino('NEW.cliente_id')}
+            END""",
+    ]),
+    (5, "Receita mensal: índice por data de pagamento e cache dos meses fechados", [
+        # Pagamentos de um período (relatório de receita), coberto pelo índice
+        "CREATE INDEX IF NOT EXISTS idx_pagamentos_data ON pagamentos (data_pagamento, pago, cliente_id, valor)",
+        # Receita já agregada dos meses fechados (src/relatorios.py); 'AAAA-MM'
+        """CREATE TABLE IF NOT EXISTS receita_mensal (
+               mes TEXT NOT NULL,
+               plano_id INTEGER,
+               instrutor_id INTEGER,
+               receita REAL NOT NULL,
+               pagamentos INTEGER NOT NULL
+           )""",
+        "CREATE INDEX IF NOT EXISTS idx_receita_mensal_mes ON receita_mensal (mes)",
+        "CREATE TABLE IF NOT EXISTS receita_meses_fechados (mes TEXT PRIMARY KEY, calculado_em TEXT NOT NULL) WITHOUT ROWID",
+        # Pagamento lançado ou corrigido num mês já fechado: o mês volta a ser calculado
+        """CREATE TRIGGER IF NOT EXISTS trg_receita_pagamentos_insert AFTER INSERT ON pagamentos BEGIN
+               DELETE FROM receita_meses_fechados WHERE mes = substr(NEW.data_pagamento, 1, 7);
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_receita_pagamentos_delete AFTER DELETE ON pagamentos BEGIN
+               DELETE FROM receita_meses_fechados WHERE mes = substr(OLD.data_pagamento, 1, 7);
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_receita_pagamentos_update
+           AFTER UPDATE OF data_pagamento, valor, pago, cliente_id ON pagamentos BEGIN
+               DELETE FROM receita_meses_fechados
+               WHERE mes IN (substr(OLD.data_pagamento, 1, 7), substr(NEW.data_pagamento, 1, 7));
+           END""",
+    ]),
+    (6, "Tabela de inadimplência (preenchida por src/relatorios.calcular_inadimplencia)", [
+        """CREATE TABLE IF NOT EXISTS inadimplencia (
+               cliente_id INTEGER PRIMARY KEY,
+               plano_id INTEGER,
+               meses_em_atraso INTEGER NOT NULL,
+               valor_em_atraso REAL NOT NULL,
+               primeiro_mes_em_atraso TEXT NOT NULL, -- 'AAAA-MM'
+               dias_em_atraso INTEGER NOT NULL,
+               valor_pendente_registrado REAL NOT NULL, -- Pagamentos lançados com pago = 0
+               fim_ciclo_atual TEXT, -- 'AAAA-MM' em que o ciclo de duracao_meses atual termina
+               data_referencia TEXT NOT NULL,
+               calculado_em TEXT NOT NULL
+           )""",
+        "CREATE INDEX IF NOT EXISTS idx_inadimplencia_valor ON inadimplencia (valor_em_atraso DESC)",
+    ]),
+]
+TABELAS_ESQUEMA = ("clientes", "instrutores", "planos", "exercicios", "treinos", "treino_exercicio", "pagamentos")
+
+def _esquema_criado(conn):
+    """True se as tabelas do scripts/setup_database.py já existem no banco."""
+    existentes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    return set(TABELAS_ESQUEMA) <= existentes
+
+def aplicar_migracoes(conn_externa=None):
+    """
+    Aplica as migrações pendentes e roda ANALYZE se alguma foi aplicada.
+    Retorna a versão do esquema após a execução.
+    """
+    with conexao_bd(conn_externa) as conn:
+        versao_inicial = versao_atual = conn.execute("PRAGMA user_version").fetchone()[0]
+        pendentes = [m for m in MIGRACOES if m[0] > versao_atual]
+        if not pendentes:
+            return versao_atual
+
+        if not _esquema_criado(conn):
+            # Banco ainda não criado pelo scripts/setup_database.py
+            return versao_atual
+
+        for versao, descricao, comandos in pendentes:
+            try:
+                conn.execute("BEGIN")
+                for comando in comandos:
+                    conn.execute(comando)
+                conn.execute(f"PRAGMA user_version = {int(versao)}")
+                conn.commit()
+                versao_atual = versao
+                print(f"Migração {versao} aplicada: {descricao}")
+            except sqlite3.Error as e:
+                print(f"Erro ao aplicar a migração {versao} ({descricao}): {e}")
+                conn.rollback()
+                break
+
+        if versao_atual > versao_inicial: # Nada aplicado (a primeira falhou): estatísticas seguem válidas
+            conn.execute("ANALYZE") # Atualiza as estatísticas usadas pelo planejador
+            conn.commit()
+        return versao_atual
+
+def _tabelas_da_query(query, tabelas=TABELAS_ESQUEMA):
+    """Mapeia alias -> tabela para os FROM/JOIN de `tabelas` (ignora subqueries)."""
+    mapa = {}
+    query = re.sub(r"--[^\n]*", "", query) # Comentários podem ficar entre o JOIN e a tabela
+    for tabela, alias in re.findall(r"(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", query, re.IGNORECASE):
+        if tabela in tabelas:
+            mapa[tabela] = tabela
+            if alias and alias.upper() not in ("ON", "WHERE", "JOIN", "LEFT", "INNER", "GROUP", "ORDER", "LIMIT"):
+                mapa[alias] = tabela
+    return mapa
+
+# Varreduras aceitas por verificar_planos_de_consulta(): (leitura, tabela) -> motivo.
+# A leitura é o nome da função seguido dos filtros usados, como em
+# _leituras_verificadas(). Qualquer outra varredura de uma tabela do banco é
+# regressão: SCAN, com ou sem índice (SCAN ... USING INDEX percorre o índice
+# inteiro), e SEARCH com ANY(...) (skip-scan, que também percorre o índice).
+SCANS_PERMITIDOS = {
+    ("get_all_clients", "clientes"): "Listagem completa, na ordem de idx_clientes_nome",
+    ("get_clients_with_current_plan_info", "clientes"): "Listagem completa; plano, instrutor e último treino por chave",
+    ("get_clients_with_current_plan_info_frame", "clientes"): "Listagem completa; plano, instrutor e último treino por chave",
+    ("get_all_clients_for_select", "clientes"): "Opções do selectbox: todos os clientes (índice coberto)",
+    ("count_total_clientes", "clientes"): "COUNT(*) da tabela inteira (o Dashboard usa get_dashboard_summary)",
+    ("search_clients", "clientes"): "Sem filtro: COUNT(*) de todos e a página lida em idx_clientes_nome até o LIMIT",
+    ("search_clients(plano_id)", "clientes"):
+        "Poucos planos (um terço dos clientes cada): ler idx_clientes_nome até completar a página custa menos "
+        "que ordenar todos os clientes do plano",
+    ("get_payment_stats_bulk", "clientes"): "Sem cliente_ids: totais de todos os clientes; pagamentos por busca no índice",
+    ("get_all_instructors", "instrutores"): "Listagem completa",
+    ("get_all_instructors_for_select", "instrutores"): "Opções do selectbox: todos os instrutores",
+    ("get_active_client_count_per_instructor", "instrutores"): "Todos os instrutores; clientes via idx_clientes_instrutor",
+    ("count_total_instrutores", "instrutores"): "COUNT(*) da tabela inteira",
+    ("get_all_plans", "planos"): "Listagem completa (poucas linhas)",
+    ("get_all_plans_for_select", "planos"): "Opções do selectbox (poucas linhas)",
+    ("count_clientes_por_plano", "planos"): "Percorre os planos (poucas linhas); clientes via idx_clientes_plano",
+    ("get_dashboard_summary", "planos"): "Percorre os planos (poucas linhas) junto com dashboard_clientes_plano",
+    ("get_dashboard_summary", "dashboard_stats"): "Tabela de resumo: uma linha por contador",
+    ("get_all_exercises", "exercicios"): "Listagem completa (catálogo pequeno)",
+    ("get_all_exercises_frame", "exercicios"): "Listagem completa (catálogo pequeno)",
+    ("get_all_exercises_for_select", "exercicios"): "Opções do selectbox (catálogo pequeno)",
+    ("get_workouts_with_exercises", "treinos"): "Sem filtro e sem limit: todos os treinos, na ordem de idx_treinos_data",
+}
+
+def _leituras_verificadas(cliente_id, instrutor_id, plano_id):
+    """(função, argumentos nomeados) das leituras conferidas por verificar_planos_de_consulta()."""
+    return [
+        (get_all_clients, {}), (search_clients, {}), (search_clients, {"term": "silva"}),
+        (search_clients, {"plano_id": plano_id}), (search_clients, {"instrutor_id": instrutor_id}),
+        (get_all_instructors, {}), (get_all_plans, {}), (get_all_exercises, {}), (get_all_exercises_frame, {}),
+        (get_workouts_with_exercises, {}), (get_workouts_with_exercises, {"cliente_id": cliente_id}),
+        (get_workouts_with_exercises, {"instrutor_id": instrutor_id, "limit": 20}),
+        (count_workouts, {"cliente_id": cliente_id}),
+        (get_pagamentos_by_client_id, {"cliente_id": cliente_id}),
+        (get_pagamentos_by_client_id_frame, {"cliente_id": cliente_id}),
+        (get_clients_with_current_plan_info, {}), (get_clients_with_current_plan_info_frame, {}),
+        (get_payment_stats_for_client, {"cliente_id": cliente_id}),
+        (get_payment_stats_bulk, {}), (get_payment_stats_bulk, {"cliente_ids": [cliente_id]}),
+        (get_active_client_count_per_instructor, {}),
+        (get_all_clients_for_select, {}), (get_all_instructors_for_select, {}), (get_all_plans_for_select, {}),
+        (get_all_exercises_for_select, {}), (get_all_treinos_for_select, {}),
+        (count_total_clientes, {}), (count_total_instrutores, {}), (count_clientes_por_plano, {}),
+        (count_pagamentosn, {}), (get_dashboard_summary, {}),
+    ]
+
+def _tabelas_do_banco(conn):
+    """Tabelas comuns do banco (sem as internas do SQLite, as virtuais e as tabelas-sombra do FTS)."""
+    linhas = conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'table'").fetchall()
+    virtuais = [nome for nome, sql in linhas if (sql or "").upper().startswith("CREATE VIRTUAL")]
+    return {nome for nome, _ in linhas
+            if not nome.startswith("sqlite_") and nome not in virtuais
+            and not any(nome.startswith(virtual + "_") for virtual in virtuais)}
+
+def verificar_planos_de_consulta(cliente_id=1, instrutor_id=1, plano_id=1):
+    """
+    Executa as leituras de _leituras_verificadas() capturando o SQL real de cada
+    uma e roda EXPLAIN QUERY PLAN em cada comando. Retorna a lista de problemas:
+    tabelas percorridas por inteiro (SCAN <tabela>, com ou sem índice, ou
+    skip-scan) fora de SCANS_PERMITIDOS, como {"funcao", "tabela", "query", "plano"}.
+    """
+    limpar_cache() # Consultas em cache não chegariam ao SQLite para serem capturadas
+    pool = get_pool_leitura() if _config_leitura["ativo"] else get_pool() # O pool que as leituras usam
+    pool.fechar_todas() # Garante que as funções abaixo reutilizem a conexão rastreada
+    capturadas = []
+    with pool.conexao() as conn:
+        conn.set_trace_callback(capturadas.append)
+    comandos = [] # (leitura, comando)
+    try:
+        for funcao, kwargs in _leituras_verificadas(cliente_id, instrutor_id, plano_id):
+            filtros = [nome for nome, valor in kwargs.items() if nome != "limit" and valor is not None]
+            leitura = f"{funcao.__name__}({', '.join(filtros)})" if filtros else funcao.__name__
+            inicio = len(capturadas)
+            funcao(**kwargs)
+            comandos.extend((leitura, comando) for comando in capturadas[inicio:])
     finally:
-        if not conn_externa and conn:
-            conn.close()
+        with pool.conexao() as conn:
+            conn.set_trace_callback(None)
+
+    problemas = []
+    with pool.conexao() as conn:
+        tabelas = _tabelas_do_banco(conn)
+        for leitura, comando in comandos:
+            if not comando.lstrip().upper().startswith(("SELECT", "WITH")) or comando.strip() == "SELECT 1":
+                continue
+            aliases = _tabelas_da_query(comando, tabelas)
+            for linha in conn.execute("EXPLAIN QUERY PLAN " + comando).fetchall():
+                detalhe = linha[3]
+                partes = detalhe.split()
+                if not (partes[0] == "SCAN" or (partes[0] == "SEARCH" and "ANY(" in detalhe)):
+                    continue
+                tabela = aliases.get(partes[1], partes[1])
+                if tabela not in tabelas or (leitura, tabela) in SCANS_PERMITIDOS:
+                    continue
+                problemas.append({"funcao": leitura, "tabela": tabela,
+                                  "query": " ".join(comando.split())[:120], "plano": detalhe})
+    return problemas
 
 # --- Funções para Clientes ---
 def get_all_clients():
@@ -89,6 +1383,152 @@ def get_all_clients():
     """
     return _fetch_all(query)
 
+# Ordenações aceitas por search_clients: nome -> (coluna, direção). O id entra
+# sempre como desempate, o que torna a paginação por cursor (keyset) estável.
+ORDENACOES_CLIENTES = {
+    "nome": ("c.nome", "ASC"),
+    "-nome": ("c.nome", "DESC"),
+    "id": ("c.id", "ASC"),
+    "-id": ("c.id", "DESC"),
+}
+
+def _expressao_fts(term):
+    """
+    Converte o texto digitado numa consulta FTS5: cada palavra vira um prefixo
+    entre aspas ("ana"* "silva"*), todas obrigatórias. Aspas do usuário são
+    descartadas para que o texto nunca seja interpretado como sintaxe do FTS5.
+    """
+    palavras = re.findall(r"\w+", term.replace('"', " "))
+    return " ".join(f'"{palavra}"*' for palavra in palavras)
+
+_tabelas_por_banco = {}
+
+def _tabela_disponivel(nome):
+    """Indica se a tabela `nome` (criada por uma migração) existe no banco atual."""
+    chave = (_caminho_leitura(), nome) # As leituras vão para a réplica, se houver uma
+    if chave not in _tabelas_por_banco:
+        resultado = _fetch_one("SELECT 1 AS existe FROM sqlite_master WHERE name = ?;", (nome,))
+        if resultado is None: # Só memoriza quando existe: a migração pode rodar depois
+            return False
+        _tabelas_por_banco[chave] = True
+    return _tabelas_por_banco[chave]
+
+def _fts_disponivel():
+    """Indica se a migração 3 (clientes_fts) existe no banco atual."""
+    return _tabela_disponivel("clientes_fts")
+
+def fulltext_search_clients(term, limit=50, offset=0):
+    """
+    Busca clientes por nome, email ou telefone no índice FTS5, ordenando por
+    relevância (bm25, com mais peso para o nome). Cada palavra casa por prefixo
+    e sem acentos: "anto fre" encontra "Sr. Antônio Freitas".
+    """
+    expressao = _expressao_fts(term or "")
+    if not expressao:
+        return []
+    query = """
+        SELECT
+            c.id AS cliente_id,
+            c.nome AS cliente_nome,
+            c.email AS cliente_email,
+            c.telefone AS cliente_telefone,
+            pl.nome AS plano_direto_cliente,
+            bm25(clientes_fts, 10.0, 2.0, 1.0) AS relevancia -- Menor = mais relevante
+        FROM clientes_fts
+        JOIN clientes c ON c.id = clientes_fts.rowid
+        LEFT JOIN planos pl ON c.plano_id = pl.id
+        WHERE clientes_fts MATCH ?
+        ORDER BY relevancia
+        LIMIT ? OFFSET ?;
+    """
+    return _fetch_all(query, (expressao, int(limit), int(offset)))
+
+def _filtros_clientes(term=None, plano_id=None, instrutor_id=None):
+    """Monta a cláusula WHERE (e seus parâmetros) da busca de clientes."""
+    conditions = []
+    params = []
+    if term and _fts_disponivel():
+        expressao = _expressao_fts(term)
+        if expressao:
+            conditions.append("c.id IN (SELECT rowid FROM clientes_fts WHERE clientes_fts MATCH ?)")
+            params.append(expressao)
+    elif term:
+        # Sem o índice FTS (migração 3 pendente): busca por trecho do nome
+        termo_escapado = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        conditions.append("c.nome LIKE ? ESCAPE '\\'") # LIKE do SQLite já ignora maiúsculas/minúsculas (ASCII)
+        params.append(f"%{termo_escapado}%")
+    if plano_id:
+        conditions.append("c.plano_id = ?")
+        params.append(plano_id)
+    if instrutor_id:
+        conditions.append("c.instrutor_id = ?")
+        params.append(instrutor_id)
+    return conditions, params
+
+def search_clients(term=None, plano_id=None, instrutor_id=None, page=1, page_size=50, sort="nome", after=None):
+    """
+    Busca paginada de clientes, com filtro e ordenação feitos no SQLite.
+    `term` é procurado no nome, email e telefone pelo índice FTS5 (prefixo de cada palavra).
+
+    Sem `after`, retorna a página `page` (OFFSET). Com `after` (o `proximo_cursor`
+    devolvido pela página anterior), usa paginação por cursor: continua a partir
+    da última linha vista, sem percorrer as páginas anteriores.
+    Retorna {"clientes", "total", "page", "page_size", "proximo_cursor"}.
+    """
+    coluna_ordem, direcao = ORDENACOES_CLIENTES.get(sort, ORDENACOES_CLIENTES["nome"])
+    conditions, params = _filtros_clientes(term, plano_id, instrutor_id)
+
+    total_result = _fetch_one(
+        "SELECT COUNT(*) AS total FROM clientes c"
+        + ((" WHERE " + " AND ".join(conditions)) if conditions else "") + ";",
+        tuple(params)
+    )
+    total = total_result['total'] if total_result else 0
+
+    params_pagina = list(params)
+    conditions_pagina = list(conditions)
+    if after is not None:
+        comparador = ">" if direcao == "ASC" else "<"
+        conditions_pagina.append(f"({coluna_ordem}, c.id) {comparador} (?, ?)")
+        params_pagina.extend(after)
+    where = (" WHERE " + " AND ".join(conditions_pagina)) if conditions_pagina else ""
+
+    query = f"""
+        SELECT
+            c.id AS cliente_id,
+            c.nome AS cliente_nome,
+            c.email AS cliente_email,
+            c.idade AS cliente_idade,
+            c.sexo AS cliente_sexo,
+            c.telefone AS cliente_telefone,
+            pl.nome AS plano_direto_cliente,
+            i.nome AS instrutor_nome
+        FROM clientes c
+        LEFT JOIN planos pl ON c.plano_id = pl.id
+        LEFT JOIN instrutores i ON c.instrutor_id = i.id
+        {where}
+        ORDER BY {coluna_ordem} {direcao}, c.id {direcao}
+        LIMIT ? OFFSET ?;
+    """
+    offset = 0 if after is not None else max(int(page) - 1, 0) * int(page_size)
+    params_pagina += [int(page_size) + 1, offset] # Uma linha a mais indica se há próxima página
+    linhas = _fetch_all(query, tuple(params_pagina))
+
+    proximo_cursor = None
+    if len(linhas) > page_size:
+        linhas = linhas[:page_size]
+        ultima = linhas[-1]
+        chave_ordem = "cliente_nome" if coluna_ordem == "c.nome" else "cliente_id"
+        proximo_cursor = (ultima[chave_ordem], ultima['cliente_id'])
+
+    return {
+        "clientes": linhas,
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "proximo_cursor": proximo_cursor,
+    }
+
 def add_client(nome, email, idade=None, sexo=None, telefone=None, plano_id=None, instrutor_id=None, treino_id=None):
     """Adiciona um novo cliente."""
     query = """
@@ -121,10 +1561,16 @@ def add_plan(nome, preco_mensal, duracao_meses):
     return _execute_query(query, (nome, preco_mensal, duracao_meses))
 
 # --- Funções para Exercícios ---
+QUERY_TODOS_EXERCICIOS = "SELECT id, nome, grupo_muscular FROM exercicios ORDER BY nome;"
+TIPOS_EXERCICIOS = {"id": "Int64", "nome": "string", "grupo_muscular": "string"}
+
 def get_all_exercises():
     """Retorna todos os exercícios."""
-    query = "SELECT id, nome, grupo_muscular FROM exercicios ORDER BY nome;"
-    return _fetch_all(query)
+    return _fetch_all(QUERY_TODOS_EXERCICIOS)
+
+def get_all_exercises_frame():
+    """Como get_all_exercises(), mas já como DataFrame tipado."""
+    return fetch_frame(QUERY_TODOS_EXERCICIOS, tipos=TIPOS_EXERCICIOS)
 
 def add_exercise(nome, grupo_muscular=None):
     """Adiciona um novo exercício."""
@@ -154,14 +1600,86 @@ def add_exercise_to_treino(treino_id, exercicio_id, series=None, repeticoes=None
     params = (treino_id, exercicio_id, series, repeticoes, carga, descanso_segundos, ordem, observacoes_exercicio)
     return _execute_query(query, params)
 
-def get_workouts_with_exercises(cliente_id=None, instrutor_id=None):
+def save_treino_with_exercises(nome_treino, data_inicio, exercicios, cliente_id=None, instrutor_id=None, plano_id=None,
+                               data_fim=None, objetivo=None, tipo_treino=None, descricao_treino=None):
+    """
+    Salva o treino e todos os seus exercícios em uma única transação (um commit).
+    `exercicios` é uma lista de dicts com exercicio_id, series, repeticoes, carga,
+    descanso_segundos, ordem e observacoes_exercicio. Retorna o id do novo treino,
+    ou None se algo falhar (nesse caso nada é gravado).
+    """
+    query_treino = """
+        INSERT INTO treinos 
+            (nome_treino, cliente_id, instrutor_id, plano_id, data_inicio, data_fim, objetivo, tipo_treino, descricao_treino)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    query_exercicios = """
+        INSERT INTO treino_exercicio
+            (treino_id, exercicio_id, series, repeticoes, carga, descanso_segundos, ordem, observacoes_exercicio)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    with conexao_bd() as conn:
+        try:
+            cursor = conn.cursor()
+            cursor.execute(query_treino, (nome_treino, cliente_id, instrutor_id, plano_id, data_inicio, data_fim,
+                                          objetivo, tipo_treino, descricao_treino))
+            treino_id = cursor.lastrowid
+            cursor.executemany(query_exercicios, [
+                (treino_id, ex['exercicio_id'], ex.get('series'), ex.get('repeticoes'), ex.get('carga'),
+                 ex.get('descanso_segundos'), ex.get('ordem'), ex.get('observacoes_exercicio'))
+                for ex in exercicios
+            ])
+            conn.commit()
+            invalidar_tabelas("treinos", "treino_exercicio")
+            return treino_id
+        except (sqlite3.Error, KeyError) as e:
+            print(f"Erro em save_treino_with_exercises para o treino '{nome_treino}': {e}")
+            conn.rollback()
+            return None
+
+# Limite de variáveis por statement em builds antigas do SQLite (SQLITE_MAX_VARIABLE_NUMBER)
+MAX_PARAMS_IN = 900
+
+def _filtros_treinos(cliente_id=None, instrutor_id=None, data_inicio_de=None, data_inicio_ate=None):
+    """Monta a cláusula WHERE (e seus parâmetros) comum às consultas de treinos."""
+    conditions = []
+    params = []
+
+    if cliente_id:
+        conditions.append("t.cliente_id = ?")
+        params.append(cliente_id)
+    if instrutor_id:
+        conditions.append("t.instrutor_id = ?")
+        params.append(instrutor_id)
+    if data_inicio_de:
+        conditions.append("t.data_inicio >= ?")
+        params.append(str(data_inicio_de))
+    if data_inicio_ate:
+        conditions.append("t.data_inicio <= ?")
+        params.append(str(data_inicio_ate))
+
+    where = (" WHERE " + " AND ".join(conditions)) if conditions else ""
+    return where, params
+
+def count_workouts(cliente_id=None, instrutor_id=None, data_inicio_de=None, data_inicio_ate=None):
+    """Retorna quantos treinos atendem aos filtros (para montar a paginação)."""
+    where, params = _filtros_treinos(cliente_id, instrutor_id, data_inicio_de, data_inicio_ate)
+    result = _fetch_one(f"SELECT COUNT(*) AS total FROM treinos t{where};", tuple(params))
+    return result['total'] if result else 0
+
+def get_workouts_with_exercises(cliente_id=None, instrutor_id=None, data_inicio_de=None, data_inicio_ate=None,
+                                limit=None, offset=0):
     """
     Filtra e mostra treinos e seus exercícios.
     Retorna uma lista de treinos, onde cada treino contém uma lista de seus exercícios.
+
+    Usa duas consultas no total (treinos da página + exercícios de todos eles via IN),
+    independente da quantidade de treinos. `limit`/`offset` paginam os treinos e
+    `data_inicio_de`/`data_inicio_ate` filtram por período (datas ISO, inclusivas).
     """
-    conn = conectar_bd() # Usar uma conexão para toda a operação
-    
-    base_query_treinos = """
+    where, params_query_treinos = _filtros_treinos(cliente_id, instrutor_id, data_inicio_de, data_inicio_ate)
+
+    base_query_treinos = f"""
         SELECT
             t.id AS treino_id,
             t.nome_treino,
@@ -180,26 +1698,16 @@ def get_workouts_with_exercises(cliente_id=None, instrutor_id=None):
         LEFT JOIN clientes c ON t.cliente_id = c.id
         LEFT JOIN instrutores i ON t.instrutor_id = i.id
         LEFT JOIN planos pl ON t.plano_id = pl.id
+        {where}
+        ORDER BY t.data_inicio DESC, t.id DESC
     """
-    conditions = []
-    params_query_treinos = []
-
-    if cliente_id:
-        conditions.append("t.cliente_id = ?")
-        params_query_treinos.append(cliente_id)
-    if instrutor_id:
-        conditions.append("t.instrutor_id = ?")
-        params_query_treinos.append(instrutor_id)
-    
-    if conditions:
-        base_query_treinos += " WHERE " + " AND ".join(conditions)
-    
-    base_query_treinos += " ORDER BY t.data_inicio DESC, t.id DESC;"
-
-    treinos = _fetch_all(base_query_treinos, tuple(params_query_treinos), conn_externa=conn)
+    if limit is not None:
+        base_query_treinos += " LIMIT ? OFFSET ?"
+        params_query_treinos += [int(limit), int(offset or 0)]
 
     query_exercicios_treino = """
         SELECT
+            te.treino_id,
             te.id,
             e.nome AS exercicio_nome,
             e.grupo_muscular,
@@ -211,32 +1719,48 @@ def get_workouts_with_exercises(cliente_id=None, instrutor_id=None):
             te.observacoes_exercicio
         FROM treino_exercicio te
         JOIN exercicios e ON te.exercicio_id = e.id
-        WHERE te.treino_id = ?
-        ORDER BY te.ordem ASC, te.id ASC;
+        WHERE te.treino_id IN ({placeholders})
+        ORDER BY te.treino_id, te.ordem ASC, te.id ASC;
     """
-    
+
+    with conexao_leitura() as conn: # Usar uma conexão do pool para toda a operação
+        treinos = _fetch_all(base_query_treinos, tuple(params_query_treinos), conn_externa=conn)
+        exercicios_por_treino = {treino['treino_id']: [] for treino in treinos}
+        treino_ids = list(exercicios_por_treino)
+
+        # Um único IN (...) por lote de ids; normalmente a página inteira cabe em um lote
+        for inicio in range(0, len(treino_ids), MAX_PARAMS_IN):
+            lote = treino_ids[inicio:inicio + MAX_PARAMS_IN]
+            query = query_exercicios_treino.format(placeholders=", ".join("?" * len(lote)))
+            for exercicio in _fetch_all(query, tuple(lote), conn_externa=conn):
+                exercicios_por_treino[exercicio.pop('treino_id')].append(exercicio)
+
     for treino in treinos:
-        # Usar a mesma conexão 'conn' para buscar os exercícios
-        exercicios_do_treino = _fetch_all(query_exercicios_treino, (treino['treino_id'],), conn_externa=conn)
-        treino['exercicios'] = exercicios_do_treino
-    
-    if conn:
-        conn.close() # Fechar a conexão principal no final
+        treino['exercicios'] = exercicios_por_treino[treino['treino_id']]
 
     return treinos
 
 # --- Funções para Pagamentos ---
+# Assumindo que a FK para clientes existe na tabela pagamentos para integridade
+QUERY_PAGAMENTOS_CLIENTE = """
+    SELECT p.id, p.cliente_id, c.nome as cliente_nome, p.data_pagamento, p.valor, p.pago
+    FROM pagamentos p
+    JOIN clientes c ON p.cliente_id = c.id
+    WHERE p.cliente_id = ?
+    ORDER BY p.data_pagamento DESC;
+"""
+TIPOS_PAGAMENTOS = {
+    "id": "Int64", "cliente_id": "Int64", "cliente_nome": "string",
+    "data_pagamento": "datetime", "valor": "float64", "pago": "bool",
+}
+
 def get_pagamentos_by_client_id(cliente_id):
     """Retorna todos os pagamentos de um cliente específico."""
-    # Assumindo que a FK para clientes existe na tabela pagamentos para integridade
-    query = """
-        SELECT p.id, p.cliente_id, c.nome as cliente_nome, p.data_pagamento, p.valor, p.pago
-        FROM pagamentos p
-        JOIN clientes c ON p.cliente_id = c.id
-        WHERE p.cliente_id = ?
-        ORDER BY p.data_pagamento DESC;
-    """
-    return _fetch_all(query, (cliente_id,))
+    return _fetch_all(QUERY_PAGAMENTOS_CLIENTE, (cliente_id,))
+
+def get_pagamentos_by_client_id_frame(cliente_id):
+    """Como get_pagamentos_by_client_id(), mas já como DataFrame tipado."""
+    return fetch_frame(QUERY_PAGAMENTOS_CLIENTE, (cliente_id,), tipos=TIPOS_PAGAMENTOS)
 
 def add_pagamento(cliente_id, data_pagamento, valor, pago=0):
     """Adiciona um novo pagamento."""
@@ -244,13 +1768,7 @@ def add_pagamento(cliente_id, data_pagamento, valor, pago=0):
     return _execute_query(query, (cliente_id, data_pagamento, valor, pago))
 
 # --- Funções de Relatório/Dashboard (Exemplos) ---
-def get_clients_with_current_plan_info():
-    """
-    Lista todos os clientes e tenta encontrar informações do plano do seu treino mais recente.
-    Se o cliente tiver um plano_id direto, essa informação também pode ser usada.
-    Esta versão foca no plano do último treino.
-    """
-    query = """
+_QUERY_CLIENTES_PLANO = """
     SELECT
         c.id AS cliente_id,
         c.nome AS cliente_nome,
@@ -265,45 +1783,92 @@ def get_clients_with_current_plan_info():
         t.data_fim AS ultimo_treino_data_fim
     FROM clientes c
     LEFT JOIN planos pl_cliente ON c.plano_id = pl_cliente.id -- Join para o plano direto do cliente
-    LEFT JOIN (
-        SELECT 
-            cliente_id, 
+    {ultimo_treino}
+    LEFT JOIN planos p_treino ON t.plano_id = p_treino.id -- Join para o plano do último treino
+    ORDER BY c.id;
+"""
+QUERY_CLIENTES_PLANO_ATUAL = _QUERY_CLIENTES_PLANO.format(ultimo_treino="""LEFT JOIN cliente_ultimo_treino ut ON ut.cliente_id = c.id -- Treino mais recente, mantido por triggers
+    LEFT JOIN treinos t ON t.id = ut.treino_id""")
+# Sem a migração 4 (ex: a 3 falhou e o esquema parou na versão 2): treino mais recente calculado na hora
+QUERY_CLIENTES_PLANO_ATUAL_SEM_RESUMO = _QUERY_CLIENTES_PLANO.format(ultimo_treino="""LEFT JOIN (
+        SELECT
+            cliente_id,
             plano_id,
-            nome_treino, 
-            data_inicio, 
+            nome_treino,
+            data_inicio,
             data_fim,
             ROW_NUMBER() OVER(PARTITION BY cliente_id ORDER BY data_inicio DESC, id DESC) as rn
         FROM treinos
-    ) t ON c.id = t.cliente_id AND t.rn = 1 -- Pega o treino mais recente por cliente
-    LEFT JOIN planos p_treino ON t.plano_id = p_treino.id -- Join para o plano do último treino
-    ORDER BY c.id;
-    """
-    return _fetch_all(query)
+    ) t ON c.id = t.cliente_id AND t.rn = 1 -- Pega o treino mais recente por cliente""")
+TIPOS_CLIENTES_PLANO_ATUAL = {
+    "cliente_id": "Int64", "cliente_nome": "string", "cliente_email": "string",
+    "cliente_idade": "Int64", "cliente_sexo": "category", "cliente_telefone": "string",
+    "plano_direto_cliente": "category", "plano_ultimo_treino": "category",
+    "ultimo_treino_nome": "string", "ultimo_treino_data_inicio": "datetime", "ultimo_treino_data_fim": "datetime",
+}
 
-def get_payment_stats_for_client(cliente_id):
-    """Retorna o total de pagamentos e o último pagamento de um cliente."""
-    query_total = """
-        SELECT SUM(valor) as total_pago
-        FROM pagamentos
-        WHERE cliente_id = ? AND pago = 1;
+def _query_clientes_plano_atual():
+    if _tabela_disponivel("cliente_ultimo_treino"):
+        return QUERY_CLIENTES_PLANO_ATUAL
+    return QUERY_CLIENTES_PLANO_ATUAL_SEM_RESUMO
+
+def get_clients_with_current_plan_info():
+    """
+    Lista todos os clientes e tenta encontrar informações do plano do seu treino mais recente.
+    Se o cliente tiver um plano_id direto, essa informação também pode ser usada.
+    Esta versão foca no plano do último treino.
     """
-    total_pago_result = _fetch_one(query_total, (cliente_id,))
-    total_pago = total_pago_result['total_pago'] if total_pago_result and total_pago_result['total_pago'] is not None else 0.0
+    return _fetch_all(_query_clientes_plano_atual())
+
+def get_clients_with_current_plan_info_frame():
+    """Como get_clients_with_current_plan_info(), mas já como DataFrame tipado."""
+    return fetch_frame(_query_clientes_plano_atual(), tipos=TIPOS_CLIENTES_PLANO_ATUAL)
 
-    query_last_payment = """
-        SELECT data_pagamento, valor
-        FROM pagamentos
-        WHERE cliente_id = ? AND pago = 1
-        ORDER BY data_pagamento DESC
-        LIMIT 1;
+def get_payment_stats_bulk(cliente_ids=None):
     """
-    last_payment = _fetch_one(query_last_payment, (cliente_id,))
+    Estatísticas de pagamento de todos os clientes (ou dos ids em `cliente_ids`)
+    numa única consulta agrupada: total pago, saldo em aberto (pago = 0) e data/valor
+    do último pagamento confirmado. Clientes sem pagamentos vêm com total 0.
+    """
+    filtro = ""
+    params = ()
+    if cliente_ids is not None:
+        # Um único parâmetro com a lista em JSON: a consulta é a mesma para qualquer quantidade de ids
+        filtro = "WHERE c.id IN (SELECT value FROM json_each(?))"
+        params = (json.dumps([int(cliente_id) for cliente_id in cliente_ids]),)
+    # Cada subconsulta é uma busca no índice idx_pagamentos_cliente_pago_data
+    # (cliente_id, pago, data_pagamento, valor): o custo é proporcional aos
+    # pagamentos dos clientes pedidos, não ao tamanho da tabela.
+    query = f"""
+        SELECT
+            c.id AS cliente_id,
+            (SELECT COALESCE(SUM(p.valor), 0.0) FROM pagamentos p
+              WHERE p.cliente_id = c.id AND p.pago = 1) AS total_pago,
+            (SELECT COALESCE(SUM(p.valor), 0.0) FROM pagamentos p
+              WHERE p.cliente_id = c.id AND p.pago = 0) AS saldo_aberto,
+            (SELECT p.data_pagamento FROM pagamentos p
+              WHERE p.cliente_id = c.id AND p.pago = 1
+              ORDER BY p.data_pagamento DESC LIMIT 1) AS ultimo_pagamento_data,
+            (SELECT p.valor FROM pagamentos p
+              WHERE p.cliente_id = c.id AND p.pago = 1
+              ORDER BY p.data_pagamento DESC LIMIT 1) AS ultimo_pagamento_valor
+        FROM clientes c
+        {filtro}
+        ORDER BY c.id;
+    """
+    return _fetch_all(query, params)
 
-    return {
+def get_payment_stats_for_client(cliente_id):
+    """Retorna o total de pagamentos e o último pagamento de um cliente."""
+    stats = get_payment_stats_bulk([cliente_id])
+    if stats:
+        return stats[0]
+    return { # Cliente inexistente: mesmos campos, zerados
         "cliente_id": cliente_id,
-        "total_pago": total_pago,
-        "ultimo_pagamento_data": last_payment['data_pagamento'] if last_payment else None,
-        "ultimo_pagamento_valor": last_payment['valor'] if last_payment else None
+        "total_pago": 0.0,
+        "saldo_aberto": 0.0,
+        "ultimo_pagamento_data": None,
+        "ultimo_pagamento_valor": None
     }
 
 def get_active_client_count_per_instructor():
@@ -330,33 +1895,33 @@ def get_active_client_count_per_instructor():
     ORDER BY
         numero_clientes_ativos DESC, i.nome;
     """
-    return _fetch_all(query)
+    return _fetch_all_cache(query)
 
 # --- Funções para Selectboxes em formulários (exemplos) ---
 def get_all_clients_for_select():
     """Retorna (id, nome) de todos os clientes para selectboxes."""
     query = "SELECT id, nome FROM clientes ORDER BY nome ASC;"
-    return _fetch_all(query) # _fetch_all já retorna lista de dicts
+    return _fetch_all_cache(query) # _fetch_all_cache também retorna lista de dicts
 
 def get_all_instructors_for_select():
     """Retorna (id, nome) de todos os instrutores para selectboxes."""
     query = "SELECT id, nome FROM instrutores ORDER BY nome ASC;"
-    return _fetch_all(query)
+    return _fetch_all_cache(query)
 
 def get_all_plans_for_select():
     """Retorna (id, nome) de todos os planos para selectboxes."""
     query = "SELECT id, nome FROM planos ORDER BY nome ASC;"
-    return _fetch_all(query)
+    return _fetch_all_cache(query)
 
 def get_all_exercises_for_select():
     """Retorna (id, nome) de todos os exercícios globais para selectboxes."""
     query = "SELECT id, nome FROM exercicios ORDER BY nome ASC;"
-    return _fetch_all(query)
+    return _fetch_all_cache(query)
 
 def get_all_treinos_for_select():
     """Retorna (id, nome_treino) de todos os treinos para selectboxes."""
     query = "SELECT id, nome_treino FROM treinos WHERE nome_treino IS NOT NULL ORDER BY nome_treino ASC;"
-    return _fetch_all(query)
+    return _fetch_all_cache(query)
 
 
 if __name__ == '__main__':
@@ -452,4 +2017,80 @@ def count_pagamentosn():
         WHERE pago = 0; 
         """
     result = _fetch_one(query)
-    return result['total_pago'] if result and 'total_pago' in result else 0
\ No newline at end of file
+    return result['total_pago'] if result and 'total_pago' in result else 0
+
+def get_dashboard_summary():
+    """
+    Retorna os números dos cards do Dashboard a partir das tabelas de resumo
+    (dashboard_stats/dashboard_clientes_plano), sem agregar clientes ou pagamentos.
+    Se o resumo ainda não existir (migração 2 pendente), calcula pelas funções count_*.
+    """
+    with conexao_leitura() as conn:
+        stats = {row['chave']: row['valor'] for row in _fetch_all("SELECT chave, valor FROM dashboard_stats;", conn_externa=conn)}
+        if not stats:
+            return fetch_concurrently({ # Quatro agregações independentes, ao mesmo tempo
+                "total_clientes": count_total_clientes,
+                "total_instrutores": count_total_instrutores,
+                "pagamentos_pendentes": count_pagamentosn,
+                "clientes_por_plano": count_clientes_por_plano,
+            })
+        clientes_por_plano = _fetch_all("""
+            SELECT p.nome AS nome_plano, d.total_clientes
+            FROM dashboard_clientes_plano d
+            JOIN planos p ON p.id = d.plano_id
+            WHERE d.total_clientes > 0
+            ORDER BY p.nome;
+        """, conn_externa=conn)
+    return {
+        "total_clientes": stats.get('total_clientes', 0),
+        "total_instrutores": stats.get('total_instrutores', 0),
+        "pagamentos_pendentes": stats.get('pagamentos_pendentes', 0),
+        "clientes_por_plano": clientes_por_plano,
+    }
+
+def reconstruir_dashboard_stats():
+    """
+    Recalcula o resumo do Dashboard do zero e retorna as diferenças encontradas
+    em relação ao que os triggers mantinham (lista vazia = resumo consistente).
+    """
+    antes = get_dashboard_summary()
+    with conexao_bd() as conn:
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for comando in SQL_RECONSTRUIR_DASHBOARD:
+                conn.execute(comando)
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"Erro ao reconstruir o resumo do Dashboard: {e}")
+            conn.rollback()
+            return None
+    depois = get_dashboard_summary()
+    return [
+        {"campo": campo, "antes": antes[campo], "depois": depois[campo]}
+        for campo in depois if antes[campo] != depois[campo]
+    ]
+
+def reconstruir_ultimo_treino():
+    """
+    Recalcula cliente_ultimo_treino do zero e retorna os clientes cujo treino_id
+    mantido pelos triggers estava diferente (lista vazia = tabela consistente).
+    """
+    query_mapa = "SELECT cliente_id, treino_id FROM cliente_ultimo_treino"
+    with conexao_bd() as conn:
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            antes = {row[0]: row[1] for row in conn.execute(query_mapa)}
+            for comando in SQL_RECONSTRUIR_ULTIMO_TREINO:
+                conn.execute(comando)
+            depois = {row[0]: row[1] for row in conn.execute(query_mapa)}
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"Erro ao reconstruir o último treino por cliente: {e}")
+            conn.rollback()
+            return None
+    invalidar_tabelas("treinos") # A listagem em cache lê a tabela pelo join com treinos
+    return [
+        {"cliente_id": cliente_id, "antes": antes.get(cliente_id), "depois": depois.get(cliente_id)}
+        for cliente_id in sorted(antes.keys() | depois.keys())
+        if antes.get(cliente_id) != depois.get(cliente_id)
+    ]
@@ -0,0 +1,187 @@
+import os
+import io
+import time
+import pstats
+import cProfile
+import threading
+from datetime import datetime
+from collections import deque
+from contextlib import contextmanager
+
+from src import database
+
+# --- PERFIL DAS EXECUÇÕES DO APP (OPCIONAL) ---
+# Cada interação no Streamlit reexecuta o script inteiro. Com o perfil ativo,
+# cada execução é dividida em etapas cronometradas (config/auth, dados,
+# dataframe, render...) por página; os tempos são somados entre todas as
+# sessões do processo. O tempo das consultas ao banco é separado sozinho, na
+# etapa "dados", a partir da instrumentação de src/database.py. Com cprofile
+# ativo, as execuções mais lentas de cada página também são gravadas como
+# arquivos .prof (pstats).
+#
+# Uso no app: iniciar_rerun() no topo do script, etapa("nome") ao começar cada
+# trecho (a etapa anterior termina ali), `with medir("dataframe"):` em volta de
+# trechos pontuais, definir_pagina() quando a página for conhecida e
+# finalizar_rerun() no fim. Com o perfil desligado, tudo é no-op.
+JANELA_RERUNS = 200 # Últimas execuções guardadas por (página, etapa) para p50/p95
+
+_config_perfil = {
+    "ativo": os.environ.get("ACADEMIA_PERFIL") == "1",
+    "cprofile": False,
+    "piores_guardados": 5, # Arquivos .prof mantidos por página
+    "pasta": os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "perfis"),
+}
+_tempos = {} # (pagina, etapa) -> deque de durações em ms
+_piores = {} # pagina -> lista de (total_ms, caminho_prof, quando)
+_lock = threading.Lock()
+_atual = threading.local() # Streamlit roda cada sessão em sua própria thread
+
+def configurar_perfil(opcoes=None):
+    """Aplica a seção 'perfil_paginas' do config.yaml (ativo, cprofile, piores_guardados, pasta)."""
+    opcoes = opcoes or {}
+    for chave in ("ativo", "cprofile", "piores_guardados", "pasta"):
+        if opcoes.get(chave) is not None:
+            _config_perfil[chave] = opcoes[chave]
+    if os.environ.get("ACADEMIA_PERFIL") == "1": # A variável de ambiente sempre liga
+        _config_perfil["ativo"] = True
+
+def ativo():
+    return _config_perfil["ativo"]
+
+def iniciar_rerun(etapa_inicial="config/auth"):
+    """Começa a cronometrar uma execução do script (descarta uma anterior não finalizada)."""
+    if not _config_perfil["ativo"]:
+        _atual.rerun = None
+        return
+    profiler = None
+    if _config_perfil["cprofile"]:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError: # Outro profiler já ativo (ex.: outra sessão, no Python 3.12+)
+            profiler = None
+    agora = time.perf_counter()
+    _atual.rerun = {"inicio": agora, "pagina": None, "etapa": etapa_inicial, "inicio_etapa": agora,
+                    "descontar": 0.0, "etapas": {}, "profiler": profiler}
+
+def _somar(rerun, nome, ms):
+    rerun["etapas"][nome] = rerun["etapas"].get(nome, 0.0) + ms
+
+def etapa(nome):
+    """Encerra a etapa atual e começa `nome` (tempos da mesma etapa na execução são somados)."""
+    rerun = getattr(_atual, "rerun", None)
+    if rerun is None:
+        return
+    agora = time.perf_counter()
+    # O que medir() e as consultas já contaram não entra na etapa que as envolvia
+    _somar(rerun, rerun["etapa"], (agora - rerun["inicio_etapa"]) * 1000 - rerun["descontar"])
+    rerun["etapa"], rerun["inicio_etapa"], rerun["descontar"] = nome, agora, 0.0
+
+def _medido(nome, ms):
+    rerun = getattr(_atual, "rerun", None)
+    if rerun is not None:
+        _somar(rerun, nome, ms)
+        rerun["descontar"] += ms
+
+@contextmanager
+def medir(nome):
+    """
+    Conta o tempo do bloco em `nome`, descontando-o da etapa atual. Consultas
+    dentro do bloco continuam em "dados" (não são contadas duas vezes).
+    """
+    rerun = getattr(_atual, "rerun", None)
+    if rerun is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    ja_descontado = rerun["descontar"]
+    try:
+        yield
+    finally:
+        interno = rerun["descontar"] - ja_descontado
+        _medido(nome, (time.perf_counter() - inicio) * 1000 - interno)
+
+def _ao_executar_consulta(duracao_ms):
+    _medido("dados", duracao_ms)
+
+database.registrar_observador_consultas(_ao_executar_consulta)
+
+def definir_pagina(pagina):
+    rerun = getattr(_atual, "rerun", None)
+    if rerun is not None:
+        rerun["pagina"] = pagina
+
+def finalizar_rerun(pagina=None):
+    """Registra a execução atual. Retorna {etapa: ms} (com 'total') ou None se o perfil estiver desligado."""
+    rerun = getattr(_atual, "rerun", None)
+    if rerun is None:
+        return None
+    etapa(None) # Fecha a última etapa
+    _atual.rerun = None
+    rerun["etapas"].pop(None, None)
+    if rerun["profiler"] is not None:
+        rerun["profiler"].disable()
+    pagina = pagina or rerun["pagina"] or "(sem página)"
+    etapas = dict(rerun["etapas"])
+    etapas["total"] = (time.perf_counter() - rerun["inicio"]) * 1000
+
+    with _lock:
+        for nome, ms in etapas.items():
+            _tempos.setdefault((pagina, nome), deque(maxlen=JANELA_RERUNS)).append(ms)
+    if rerun["profiler"] is not None:
+        _guardar_se_entre_piores(pagina, etapas["total"], rerun["profiler"])
+    return etapas
+
+def _guardar_se_entre_piores(pagina, total_ms, profiler):
+    with _lock:
+        piores = _piores.setdefault(pagina, [])
+        if len(piores) >= _config_perfil["piores_guardados"] and total_ms <= piores[-1][0]:
+            return
+        os.makedirs(_config_perfil["pasta"], exist_ok=True)
+        quando = datetime.now()
+        nome_pagina = "".join(c if c.isalnum() else "_" for c in pagina)
+        caminho = os.path.join(_config_perfil["pasta"], f"{quando:%Y%m%d_%H%M%S_%f}_{nome_pagina}_{total_ms:.0f}ms.prof")
+        try:
+            profiler.dump_stats(caminho)
+        except OSError as e:
+            print(f"Erro ao gravar o perfil em '{caminho}': {e}")
+            return
+        piores.append((total_ms, caminho, quando.isoformat(timespec="seconds")))
+        piores.sort(key=lambda item: item[0], reverse=True)
+        for _, caminho_antigo, _ in piores[_config_perfil["piores_guardados"]:]:
+            try:
+                os.remove(caminho_antigo)
+            except OSError:
+                pass
+        del piores[_config_perfil["piores_guardados"]:]
+
+def _percentil(valores, fracao):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(fracao * len(ordenados)))] if ordenados else 0.0
+
+def get_resumo():
+    """Uma linha por (página, etapa): execuções, média, p50, p95 e máximo em ms."""
+    with _lock:
+        copia = {chave: list(valores) for chave, valores in _tempos.items()}
+    return [
+        {"pagina": pagina, "etapa": nome, "execucoes": len(valores),
+         "media_ms": sum(valores) / len(valores), "p50_ms": _percentil(valores, 0.50),
+         "p95_ms": _percentil(valores, 0.95), "max_ms": max(valores)}
+        for (pagina, nome), valores in sorted(copia.items())
+    ]
+
+def get_piores_reruns():
+    """Execuções mais lentas com .prof gravado: [{pagina, total_ms, arquivo, quando}]."""
+    with _lock:
+        return [{"pagina": pagina, "total_ms": total, "arquivo": caminho, "quando": quando}
+                for pagina, piores in _piores.items() for total, caminho, quando in piores]
+
+def relatorio_pstats(caminho, ordenar_por="cumulative", linhas=30):
+    """Texto do pstats de um .prof gravado (as funções com mais tempo acumulado)."""
+    saida = io.StringIO()
+    pstats.Stats(caminho, stream=saida).strip_dirs().sort_stats(ordenar_por).print_stats(linhas)
+    return saida.getvalue()
+
+def limpar_perfil():
+    with _lock:
+        _tempos.clear()
@@ -0,0 +1,349 @@
+import sqlite3
+import threading
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from src import database
+
+# --- RELATÓRIO DE RECEITA MENSAL ---
+# Receita (pagamentos com pago = 1) por mês, plano e instrutor. Os pagamentos
+# de um período são lidos numa única consulta (mês, plano, instrutor, valor) e
+# agregados com pandas/NumPy; o plano e o instrutor vêm do cadastro do cliente.
+#
+# Meses fechados (anteriores ao mês atual) são calculados uma vez e gravados em
+# receita_mensal (migração 5), marcados em receita_meses_fechados, e ficam
+# também em memória. A cada chamada só o mês atual é recalculado. Se um
+# pagamento de um mês fechado for lançado, alterado ou apagado, os triggers
+# da migração 5 desmarcam o mês, e ele é recalculado na próxima chamada.
+# O mês atual fica em memória enquanto este processo não grava em pagamentos
+# ou clientes (mesma regra do cache de consultas de src/database.py: escritas
+# de outro processo só aparecem após database.limpar_cache()).
+# O plano/instrutor de um mês fechado é o que o cliente tinha no fechamento.
+# receita_mensal e receita_meses_fechados são lidas sempre no banco principal
+# (database.conexao_bd): a réplica de leitura pode estar atrasada e faria meses
+# já fechados parecerem pendentes. Só o mês atual é agregado pelo pool de leitura.
+LOTE_MESES = 3 # Meses calculados por transação no fechamento (limita o tempo com o lock de escrita)
+SEM_PLANO = -1 # plano_id/instrutor_id ausentes, dentro dos DataFrames
+
+QUERY_PAGAMENTOS_PERIODO = f"""
+    SELECT CAST(substr(p.data_pagamento, 1, 4) || substr(p.data_pagamento, 6, 2) AS INTEGER) AS mes,
+           COALESCE(c.plano_id, {SEM_PLANO}) AS plano_id,
+           COALESCE(c.instrutor_id, {SEM_PLANO}) AS instrutor_id,
+           p.valor
+    FROM pagamentos p
+    LEFT JOIN clientes c ON c.id = p.cliente_id
+    WHERE p.data_pagamento >= ? AND p.data_pagamento < ? AND p.pago = 1
+"""
+COLUNAS_RECEITA = ["mes", "plano_id", "instrutor_id", "receita", "pagamentos"]
+
+_cache_fechados = {} # (banco, 'AAAA-MM') -> DataFrame do mês
+_cache_aberto = {} # banco -> (mes_atual, versões de pagamentos/clientes, DataFrame)
+_lock = threading.Lock()
+
+def _mes_texto(mes):
+    """date ou AAAAMM (int) -> 'AAAA-MM'."""
+    if isinstance(mes, date):
+        return f"{mes.year:04d}-{mes.month:02d}"
+    return f"{mes // 100:04d}-{mes % 100:02d}"
+
+def _proximo_mes(mes):
+    """'AAAA-MM' -> 'AAAA-MM' do mês seguinte."""
+    ano, numero = int(mes[:4]), int(mes[5:7])
+    return f"{ano + numero // 12:04d}-{numero % 12 + 1:02d}"
+
+def _meses_entre(inicio, fim):
+    """Meses 'AAAA-MM' de `inicio` (inclusive) até `fim` (exclusive)."""
+    meses = []
+    while inicio < fim:
+        meses.append(inicio)
+        inicio = _proximo_mes(inicio)
+    return meses
+
+def _agregar(inicio, fim, conn=None):
+    """
+    Receita de [inicio, fim) ('AAAA-MM') agregada por mês, plano e instrutor.
+    Levanta sqlite3.Error se a leitura falhar: um período sem pagamentos e uma
+    leitura que falhou não podem virar o mesmo DataFrame vazio.
+    """
+    colunas = database.fetch_columns(QUERY_PAGAMENTOS_PERIODO, (f"{inicio}-01", f"{fim}-01"),
+                                     conn_externa=conn, levantar_erro=True)
+    if not colunas["mes"]: # Nenhum pagamento no período
+        return pd.DataFrame(columns=COLUNAS_RECEITA)
+    df = pd.DataFrame({
+        "mes": np.asarray(colunas["mes"], dtype=np.int64),
+        "plano_id": np.asarray(colunas["plano_id"], dtype=np.int64),
+        "instrutor_id": np.asarray(colunas["instrutor_id"], dtype=np.int64),
+        "valor": np.asarray(colunas["valor"], dtype=np.float64),
+    })
+    agregado = (df.groupby(["mes", "plano_id", "instrutor_id"], sort=True)["valor"]
+                  .agg(receita="sum", pagamentos="size").reset_index())
+    agregado["mes"] = [_mes_texto(mes) for mes in agregado["mes"]] # Poucas linhas: um por grupo
+    return agregado[COLUNAS_RECEITA]
+
+def _fechar_meses(meses, conn):
+    """
+    Calcula e grava os meses fechados pendentes, LOTE_MESES por transação, em
+    `conn` (banco principal). Se a leitura ou a gravação de um lote falhar, ele
+    é desfeito e continua pendente; retorna False.
+    """
+    for i in range(0, len(meses), LOTE_MESES):
+        lote = meses[i:i + LOTE_MESES]
+        try:
+            # Lock de escrita antes da leitura: nenhum pagamento entra no lote entre o cálculo e a marca
+            conn.execute("BEGIN IMMEDIATE")
+            agregado = _agregar(lote[0], _proximo_mes(lote[-1]), conn)
+            conn.executemany("DELETE FROM receita_mensal WHERE mes = ?", [(mes,) for mes in lote])
+            conn.executemany(
+                "INSERT INTO receita_mensal (mes, plano_id, instrutor_id, receita, pagamentos) VALUES (?, ?, ?, ?, ?)",
+                [(mes, None if plano == SEM_PLANO else int(plano), None if instrutor == SEM_PLANO else int(instrutor),
+                  float(receita), int(pagamentos))
+                 for mes, plano, instrutor, receita, pagamentos in agregado.itertuples(index=False)]
+            )
+            agora = datetime.now().isoformat(timespec="seconds")
+            conn.executemany("INSERT OR REPLACE INTO receita_meses_fechados (mes, calculado_em) VALUES (?, ?)",
+                             [(mes, agora) for mes in lote])
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"Erro ao fechar a receita dos meses {lote[0]} a {lote[-1]}: {e}")
+            conn.rollback()
+            return False
+    return True
+
+def _carregar_fechados(meses, conn):
+    """DataFrame por mês de receita_mensal (lida em `conn`), para os meses pedidos. Levanta sqlite3.Error."""
+    if not meses:
+        return {}
+    marcadores = ", ".join("?" * len(meses))
+    df = database.fetch_frame(
+        f"""SELECT mes, COALESCE(plano_id, {SEM_PLANO}) AS plano_id, COALESCE(instrutor_id, {SEM_PLANO}) AS instrutor_id,
+                   receita, pagamentos
+            FROM receita_mensal WHERE mes IN ({marcadores})""",
+        tuple(meses), conn_externa=conn, levantar_erro=True,
+    )
+    por_mes = {} if df.empty else {mes: grupo.reset_index(drop=True) for mes, grupo in df.groupby("mes")}
+    return {mes: por_mes.get(mes, pd.DataFrame(columns=COLUNAS_RECEITA)) for mes in meses} # Mês sem receita
+
+def receita_mensal(hoje=None):
+    """
+    Receita de todos os meses por (mes, plano_id, instrutor_id): colunas mes ('AAAA-MM'),
+    plano_id, instrutor_id (SEM_PLANO quando ausente), receita, pagamentos e fechado.
+    Fecha os meses pendentes antes de responder (na primeira vez, todo o histórico).
+    """
+    mes_atual = _mes_texto(hoje or date.today())
+    banco = database.DB_NAME
+
+    # Uma sessão fecha os meses; as outras esperam e usam o resultado
+    with _lock, database.conexao_bd() as conn:
+        try:
+            primeira = database.fetch_columns("SELECT MIN(data_pagamento) AS primeira FROM pagamentos",
+                                              conn_externa=conn, levantar_erro=True)["primeira"][0]
+            if primeira is None: # Nenhum pagamento lançado
+                return pd.DataFrame(columns=COLUNAS_RECEITA + ["fechado"])
+            meses_fechados = _meses_entre(primeira[:7], mes_atual)
+            marcados = set(database.fetch_columns("SELECT mes FROM receita_meses_fechados",
+                                                  conn_externa=conn, levantar_erro=True)["mes"])
+            for chave in [chave for chave in _cache_fechados if chave[0] == banco and chave[1] not in marcados]:
+                del _cache_fechados[chave] # Mês reaberto por um pagamento lançado depois do fechamento
+            pendentes = [mes for mes in meses_fechados if mes not in marcados]
+            if pendentes and not _fechar_meses(pendentes, conn):
+                return pd.DataFrame(columns=COLUNAS_RECEITA + ["fechado"])
+            faltando = [mes for mes in meses_fechados if (banco, mes) not in _cache_fechados]
+            carregados = _carregar_fechados(faltando, conn)
+        except sqlite3.Error as e:
+            print(f"Erro ao ler os meses fechados da receita: {e}")
+            return pd.DataFrame(columns=COLUNAS_RECEITA + ["fechado"])
+        for mes, df in carregados.items():
+            _cache_fechados[(banco, mes)] = df
+        partes = [_cache_fechados[(banco, mes)] for mes in meses_fechados]
+
+    # Mês atual (e lançamentos com data futura): recalculados após qualquer escrita
+    versoes = database.get_versoes_tabelas("pagamentos", "clientes")
+    entrada = _cache_aberto.get(banco)
+    if entrada is not None and entrada[:2] == (mes_atual, versoes):
+        aberto = entrada[2]
+    else:
+        try:
+            aberto = _agregar(mes_atual, "9999-12")
+            _cache_aberto[banco] = (mes_atual, versoes, aberto)
+        except sqlite3.Error as e: # Não fica em cache: a próxima chamada lê de novo
+            print(f"Erro ao calcular a receita do mês {mes_atual}: {e}")
+            aberto = pd.DataFrame(columns=COLUNAS_RECEITA)
+    partes = [parte.assign(fechado=True) for parte in partes if not parte.empty]
+    if not aberto.empty:
+        partes.append(aberto.assign(fechado=False))
+    if not partes:
+        return pd.DataFrame(columns=COLUNAS_RECEITA + ["fechado"])
+    return pd.concat(partes, ignore_index=True)
+
+def _nomes(query):
+    linhas = database.fetch_columns(query)
+    return dict(zip(linhas.get("id", ()), linhas.get("nome", ())))
+
+def relatorio_receita(meses=12, hoje=None):
+    """
+    Relatório dos últimos `meses` meses (incluindo o atual), com nomes:
+    {"por_mes": DataFrame(mes, receita, pagamentos, fechado),
+     "por_plano": DataFrame(plano, receita, pagamentos),
+     "por_instrutor": DataFrame(instrutor, receita, pagamentos), "mes_atual": 'AAAA-MM'}.
+    """
+    mes_atual = _mes_texto(hoje or date.today())
+    df = receita_mensal(hoje)
+    if meses:
+        ano, numero = int(mes_atual[:4]), int(mes_atual[5:7])
+        total = ano * 12 + numero - meses # Primeiro mês da janela, em meses desde o ano 0
+        df = df[df["mes"] >= f"{total // 12:04d}-{total % 12 + 1:02d}"]
+
+    por_mes = (df.groupby("mes", sort=True)
+                 .agg(receita=("receita", "sum"), pagamentos=("pagamentos", "sum"), fechado=("fechado", "all"))
+                 .reset_index())
+    planos = _nomes("SELECT id, nome FROM planos")
+    instrutores = _nomes("SELECT id, nome FROM instrutores")
+    por_plano = (df.groupby("plano_id")[["receita", "pagamentos"]].sum()
+                   .sort_values("receita", ascending=False).reset_index())
+    por_plano.insert(0, "plano", por_plano.pop("plano_id").map(planos).fillna("Sem plano"))
+    por_instrutor = (df.groupby("instrutor_id")[["receita", "pagamentos"]].sum()
+                       .sort_values("receita", ascending=False).reset_index())
+    por_instrutor.insert(0, "instrutor", por_instrutor.pop("instrutor_id").map(instrutores).fillna("Sem instrutor"))
+    return {"por_mes": por_mes, "por_plano": por_plano, "por_instrutor": por_instrutor, "mes_atual": mes_atual}
+
+def reabrir_meses(*meses):
+    """
+    Desmarca meses fechados ('AAAA-MM'; sem argumentos, todos) para que sejam
+    recalculados na próxima chamada (ex: após trocar o plano de muitos clientes).
+    """
+    with database.conexao_bd() as conn:
+        if meses:
+            conn.executemany("DELETE FROM receita_meses_fechados WHERE mes = ?", [(mes,) for mes in meses])
+        else:
+            conn.execute("DELETE FROM receita_meses_fechados")
+        conn.commit()
+    with _lock:
+        _cache_fechados.clear()
+        _cache_aberto.clear()
+
+# --- INADIMPLÊNCIA ---
+# Compara, para todos os clientes de uma vez, a cobrança esperada pelo plano
+# (uma mensalidade de planos.preco_mensal por mês) com o que foi pago. Uma
+# consulta agrega os pagamentos por cliente (leitura sequencial do índice
+# idx_pagamentos_cliente_pago_data) e o calendário é calculado com NumPy sobre
+# os vetores resultantes, sem laço por cliente: o custo cresce linearmente com
+# clientes + pagamentos. O resultado substitui o conteúdo de inadimplencia
+# (migração 6), que só guarda os clientes em atraso.
+#
+# Como clientes não tem data de adesão, a cobrança começa no mês do primeiro
+# pagamento lançado (pago ou não); clientes sem plano ou sem pagamentos ficam
+# de fora. A mensalidade de um mês vence no dia `dia_vencimento` e os valores
+# pagos quitam os meses mais antigos primeiro. O contrato é renovado a cada
+# planos.duracao_meses meses a partir do início (fim_ciclo_atual).
+DIA_VENCIMENTO_PADRAO = 10
+
+QUERY_SALDO_CLIENTES = """
+    SELECT c.id AS cliente_id, c.plano_id, pl.preco_mensal, pl.duracao_meses,
+           MIN(p.data_pagamento) AS inicio,
+           COALESCE(SUM(CASE WHEN p.pago = 1 THEN p.valor END), 0.0) AS total_pago,
+           COALESCE(SUM(CASE WHEN p.pago = 0 THEN p.valor END), 0.0) AS total_pendente
+    FROM clientes c
+    JOIN planos pl ON pl.id = c.plano_id
+    LEFT JOIN pagamentos p ON p.cliente_id = c.id
+    GROUP BY c.id
+"""
+
+def _indice_mes(datas):
+    """Datas ISO ('AAAA-MM...') -> meses desde 1970-01 (int64), vetorizado."""
+    return np.asarray(datas, dtype="U7").astype("datetime64[M]").astype(np.int64)
+
+def _texto_mes(indices):
+    """Meses desde 1970-01 -> 'AAAA-MM'."""
+    return np.datetime_as_string(np.asarray(indices, dtype=np.int64).astype("datetime64[M]"), unit="M")
+
+def calcular_inadimplencia(hoje=None, dia_vencimento=DIA_VENCIMENTO_PADRAO, gravar=True):
+    """
+    Recalcula a inadimplência de todos os clientes na data `hoje` e, se `gravar`,
+    substitui o conteúdo da tabela inadimplencia. Retorna (DataFrame dos clientes
+    em atraso, resumo), ou (None, None) em caso de erro.
+    """
+    hoje = hoje or date.today()
+    colunas = database.fetch_columns(QUERY_SALDO_CLIENTES)
+    if not colunas:
+        return None, None
+    tem_historico = np.array([inicio is not None for inicio in colunas.get("inicio", ())], dtype=bool)
+    preco = np.asarray(colunas.get("preco_mensal", ()), dtype=np.float64)
+    duracao = np.asarray([d or 1 for d in colunas.get("duracao_meses", ())], dtype=np.int64)
+    avaliados = tem_historico & (preco > 0)
+
+    cliente_id = np.asarray(colunas.get("cliente_id", ()), dtype=np.int64)[avaliados]
+    plano_id = np.asarray(colunas.get("plano_id", ()), dtype=np.int64)[avaliados]
+    preco, duracao = preco[avaliados], np.maximum(duracao[avaliados], 1)
+    total_pago = np.asarray(colunas.get("total_pago", ()), dtype=np.float64)[avaliados]
+    total_pendente = np.asarray(colunas.get("total_pendente", ()), dtype=np.float64)[avaliados]
+    inicio = _indice_mes(np.asarray(colunas.get("inicio", ()), dtype=object)[avaliados].astype(str))
+
+    mes_atual = _indice_mes([hoje.isoformat()])[0]
+    vencidos_no_mes = 1 if hoje.day > dia_vencimento else 0 # A mensalidade do mês atual já venceu?
+    meses_devidos = np.maximum(mes_atual - inicio + vencidos_no_mes, 0)
+    meses_cobertos = np.floor(total_pago / preco + 1e-9).astype(np.int64)
+    meses_em_atraso = np.maximum(meses_devidos - meses_cobertos, 0)
+    valor_em_atraso = np.round(np.maximum(meses_devidos * preco - total_pago, 0.0), 2)
+    em_atraso = (meses_em_atraso > 0) & (valor_em_atraso > 0)
+
+    primeiro_mes = inicio + meses_cobertos
+    vencimento = (primeiro_mes.astype("datetime64[M]").astype("datetime64[D]")
+                  + np.timedelta64(dia_vencimento - 1, "D"))
+    dias_em_atraso = (np.datetime64(hoje.isoformat(), "D") - vencimento).astype(np.int64)
+    fim_ciclo = inicio + ((mes_atual - inicio) // duracao + 1) * duracao - 1
+
+    df = pd.DataFrame({
+        "cliente_id": cliente_id[em_atraso],
+        "plano_id": plano_id[em_atraso],
+        "meses_em_atraso": meses_em_atraso[em_atraso],
+        "valor_em_atraso": valor_em_atraso[em_atraso],
+        "primeiro_mes_em_atraso": _texto_mes(primeiro_mes[em_atraso]),
+        "dias_em_atraso": dias_em_atraso[em_atraso],
+        "valor_pendente_registrado": np.round(total_pendente[em_atraso], 2),
+        "fim_ciclo_atual": _texto_mes(fim_ciclo[em_atraso]),
+    }).sort_values("valor_em_atraso", ascending=False, kind="stable").reset_index(drop=True)
+    resumo = {
+        "data_referencia": hoje.isoformat(),
+        "clientes": len(tem_historico),
+        "clientes_avaliados": int(avaliados.sum()),
+        "clientes_em_atraso": len(df),
+        "valor_total_em_atraso": round(float(df["valor_em_atraso"].sum()), 2),
+    }
+
+    if gravar:
+        agora = datetime.now().isoformat(timespec="seconds")
+        with database.conexao_bd() as conn:
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute("DELETE FROM inadimplencia")
+                conn.executemany(
+                    """INSERT INTO inadimplencia (cliente_id, plano_id, meses_em_atraso, valor_em_atraso,
+                           primeiro_mes_em_atraso, dias_em_atraso, valor_pendente_registrado, fim_ciclo_atual,
+                           data_referencia, calculado_em)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    [(int(cid), int(pid), int(meses), float(valor), mes, int(dias), float(pendente), fim,
+                      resumo["data_referencia"], agora)
+                     for cid, pid, meses, valor, mes, dias, pendente, fim in df.itertuples(index=False)]
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"Erro ao gravar a inadimplência: {e}")
+                conn.rollback()
+                return None, None
+    return df, resumo
+
+def listar_inadimplentes(limite=100):
+    """Clientes em atraso do último cálculo, com nome e plano, do maior valor em atraso para o menor."""
+    return database.fetch_frame(
+        """SELECT i.cliente_id, c.nome AS cliente, pl.nome AS plano, i.meses_em_atraso, i.valor_em_atraso,
+                  i.primeiro_mes_em_atraso, i.dias_em_atraso, i.valor_pendente_registrado, i.fim_ciclo_atual,
+                  i.data_referencia, i.calculado_em
+           FROM inadimplencia i
+           LEFT JOIN clientes c ON c.id = i.cliente_id
+           LEFT JOIN planos pl ON pl.id = i.plano_id
+           ORDER BY i.valor_em_atraso DESC
+           LIMIT ?""",
+        (limite,),
+    )
@@ -1,16 +1,15 @@
 # app.py
 import streamlit as st
-import streamlit_pills as stp
-import pandas as pd
 from src import database
+from src import perfil_paginas
+from src import config_app
 from datetime import date, timedelta
 # from src import database # Mantenha para suas funções de BD
+# pandas e streamlit_pills são importados só nas páginas que os usam (primeira execução mais rápida)
 
 import streamlit_authenticator as stauth # Biblioteca de autenticação
-import yaml
-from yaml.loader import SafeLoader # Para carregar o YAML de forma segura
 
-conn = database.conectar_bd() 
+perfil_paginas.iniciar_rerun() # No-op se o perfil estiver desligado
 
 # --- Configuração da Página (DEVE SER A PRIMEIRA CHAMADA DO STREAMLIT) ---
 st.set_page_config(
@@ -20,9 +19,9 @@ st.set_page_config(
 )
 
 # --- 1. Carregar Configurações do Autenticador ---
+# Lido uma vez por processo (e de novo só se o arquivo mudar), já com as senhas em hash
 try:
-    with open('config.yaml', 'r', encoding='utf-8') as file: # Adicionado encoding='utf-8'
-        config = yaml.load(file, Loader=SafeLoader)
+    config = config_app.carregar_config('config.yaml')
 except FileNotFoundError:
     st.error("ERRO CRÍTICO: Arquivo de configuração 'config.yaml' não encontrado. "
              "Crie este arquivo no mesmo diretório do app.py conforme a documentação.")
@@ -31,8 +30,15 @@ except Exception as e:
     st.error(f"Erro ao carregar o arquivo config.yaml: {e}")
     st.stop()
 
+# Perfil de PRAGMAs/pool do SQLite (seção 'database' do config.yaml, opcional)
+database.configurar_banco(config.get('database'))
+# Perfil de tempo por execução (seção 'perfil_paginas', opcional; ou ACADEMIA_PERFIL=1)
+perfil_paginas.configurar_perfil(config.get('perfil_paginas'))
+
+# O Authenticate é criado a cada execução porque o gerenciador de cookies dele lê os
+# cookies da sessão só no construtor; com as senhas já em hash, isso fica barato.
 authenticator = stauth.Authenticate(
-    config['credentials'],
+    config_app.credenciais_da_sessao(config),
     config['cookie']['name'],
     config['cookie']['key'],
     config['cookie']['expiry_days']
@@ -51,6 +57,7 @@ authenticator.login() # 'main' é o padrão para localização do formulário
 
 if st.session_state["authentication_status"]:
     # --- USUÁRIO AUTENTICADO ---
+    perfil_paginas.etapa("menu")
 
     # Buscar e definir o papel do usuário no session_state
     try:
@@ -71,6 +78,7 @@ if st.session_state["authentication_status"]:
         st.markdown("---")
 
     # --- Menu de Navegação com Pills (Área Principal) ---
+    import streamlit_pills as stp # Só depois do login
     opcoes_menu_base = ["Dashboard", "Clientes", "Treinos", "Pagamentos"]
     icones_menu_base = ["🏠", "👥", "🏋️", "💳"]
     
@@ -102,15 +110,18 @@ if st.session_state["authentication_status"]:
         st.session_state.pagina_selecionada = pagina_atual
     else:
         pagina_atual = None # Nenhuma página para mostrar
+    perfil_paginas.definir_pagina(pagina_atual)
+    perfil_paginas.etapa("render") # Consultas e medir("dataframe") são descontados daqui
 
     # --- Conteúdo da Página Selecionada ---
     if pagina_atual == "Dashboard":
         st.title("🏠 Dashboard")
         st.header(f"Olá, {st.session_state['name']}!") 
-        total_clientes = database.count_total_clients()
-        total_instrutores = database.count_total_intrutores()
-        dados_planos = database.count_clientes_por_plano()
-        totalpago = database.count_pagamentosn()
+        resumo_dashboard = database.get_dashboard_summary() # Uma leitura das tabelas de resumo
+        total_clientes = resumo_dashboard['total_clientes']
+        total_instrutores = resumo_dashboard['total_instrutores']
+        dados_planos = resumo_dashboard['clientes_por_plano']
+        totalpago = resumo_dashboard['pagamentos_pendentes']
 
             # Definindo o estilo do card
         col1, col2 = st.columns(2)
@@ -206,6 +217,7 @@ if st.session_state["authentication_status"]:
 
 
     elif pagina_atual == "Clientes":
+        import pandas as pd # Importação adiada: o Dashboard não usa pandas
         st.title("👨‍💻 Gestão de Clientes")
         st.markdown("Gerencie os clientes da sua academia: visualize, adicione e veja seus planos.")
 
@@ -214,30 +226,68 @@ if st.session_state["authentication_status"]:
         if tab_selecionada == "Lista de Clientes":
             st.header("Lista de Clientes e Seus Planos")
 
-            clientes_info = database.get_clients_with_current_plan_info()
-
-            if clientes_info:
-                df_clientes = pd.DataFrame(clientes_info)
-            
-                df_clientes_display = df_clientes[[ 
-                'cliente_nome', 
-                'cliente_email', 
-                'cliente_telefone', 
-                'plano_direto_cliente',
-                ]].copy()
-            
-                df_clientes_display.columns = [
-                'Nome do Cliente', 
-                'Email', 
-                'Telefone', 
-                'Plano Associado (Direto)'
-                ]
-
-                filtro_cliente_nome = st.text_input("Filtrar clientes por nome:", "")
-                if filtro_cliente_nome:
-                    df_clientes_display = df_clientes_display[df_clientes_display['Nome do Cliente'].str.contains(filtro_cliente_nome, case=False, na=False)]
+            # Filtros aplicados no banco: só a página exibida é carregada
+            planos_filtro_cli = database.get_all_plans_for_select()
+            instrutores_filtro_cli = database.get_all_instructors_for_select()
+            op_planos_filtro_cli = {"-- Todos os Planos --": None, **{p['nome']: p['id'] for p in planos_filtro_cli}}
+            op_instrutores_filtro_cli = {"-- Todos os Instrutores --": None, **{i['nome']: i['id'] for i in instrutores_filtro_cli}}
+
+            filtro_cliente_nome = st.text_input("Buscar clientes (nome, email ou telefone):", "", help="Cada palavra busca pelo início, sem diferenciar acentos. Ex: \"anto fre\" encontra \"Antônio Freitas\".")
+            col_fc1, col_fc2, col_fc3 = st.columns(3)
+            with col_fc1:
+                plano_filtro_cli_sel = st.selectbox("Plano:", list(op_planos_filtro_cli.keys()), key="filtro_plano_clientes")
+            with col_fc2:
+                instrutor_filtro_cli_sel = st.selectbox("Instrutor:", list(op_instrutores_filtro_cli.keys()), key="filtro_instrutor_clientes")
+            with col_fc3:
+                clientes_por_pagina = st.selectbox("Clientes por página:", [25, 50, 100], index=1, key="clientes_por_pagina")
+
+            # Paginação por cursor: guarda o cursor de início de cada página visitada
+            filtros_clientes = (filtro_cliente_nome, plano_filtro_cli_sel, instrutor_filtro_cli_sel, clientes_por_pagina)
+            if st.session_state.get("clientes_filtros") != filtros_clientes:
+                st.session_state.clientes_filtros = filtros_clientes
+                st.session_state.clientes_cursores = [None]
+
+            resultado_clientes = database.search_clients(
+                term=filtro_cliente_nome,
+                plano_id=op_planos_filtro_cli.get(plano_filtro_cli_sel),
+                instrutor_id=op_instrutores_filtro_cli.get(instrutor_filtro_cli_sel),
+                page_size=clientes_por_pagina,
+                after=st.session_state.clientes_cursores[-1]
+            )
+
+            if resultado_clientes['clientes']:
+                with perfil_paginas.medir("dataframe"):
+                    df_clientes_display = pd.DataFrame(resultado_clientes['clientes'])[[ 
+                    'cliente_nome', 
+                    'cliente_email', 
+                    'cliente_telefone', 
+                    'plano_direto_cliente',
+                    ]]
+                
+                    df_clientes_display.columns = [
+                    'Nome do Cliente', 
+                    'Email', 
+                    'Telefone', 
+                    'Plano Associado (Direto)'
+                    ]
 
                 st.dataframe(df_clientes_display, use_container_width=True)
+
+                pagina_clientes = len(st.session_state.clientes_cursores)
+                total_paginas_clientes = max(1, -(-resultado_clientes['total'] // clientes_por_pagina))
+                col_pag1, col_pag2, col_pag3 = st.columns([1, 2, 1])
+                with col_pag1:
+                    if st.button("◀ Anterior", disabled=pagina_clientes == 1, key="clientes_pagina_anterior"):
+                        st.session_state.clientes_cursores.pop()
+                        st.rerun()
+                with col_pag2:
+                    st.caption(f"Página {pagina_clientes} de {total_paginas_clientes} · {resultado_clientes['total']} clientes")
+                with col_pag3:
+                    if st.button("Próxima ▶", disabled=resultado_clientes['proximo_cursor'] is None, key="clientes_pagina_proxima"):
+                        st.session_state.clientes_cursores.append(resultado_clientes['proximo_cursor'])
+                        st.rerun()
+            elif filtro_cliente_nome or op_planos_filtro_cli.get(plano_filtro_cli_sel) or op_instrutores_filtro_cli.get(instrutor_filtro_cli_sel):
+                st.info("Nenhum cliente encontrado com os filtros aplicados.")
             else:
                 st.info("Nenhum cliente cadastrado ainda.")
 
@@ -317,6 +367,7 @@ if st.session_state["authentication_status"]:
                         st.error("Erro ao cadastrar cliente. Verifique se o email já existe ou outros dados.")
 
     elif pagina_atual == "Treinos":
+        import pandas as pd # Importação adiada: o Dashboard não usa pandas
         st.title("🏋️ Gerenciamento de Treinos")
 
         tab_visualizar, tab_cadastrar_treino_exercicios, tab_banco_exercicios = st.tabs([
@@ -346,17 +397,39 @@ if st.session_state["authentication_status"]:
                 with col_f2:
                     instrutor_filtro_nome_sel = st.selectbox("Filtrar por Instrutor:", list(opcoes_instrutores_filtro.keys()), key="filtro_instrutor_treino_page")
                 
+                col_f3, col_f4 = st.columns(2)
+                with col_f3:
+                    data_de_filtro = st.date_input("Início a partir de:", value=None, key="filtro_data_de_treino_page")
+                with col_f4:
+                    data_ate_filtro = st.date_input("Início até:", value=None, key="filtro_data_ate_treino_page")
+
                 cliente_id_para_filtro = opcoes_clientes_filtro.get(cliente_filtro_nome_sel)
                 instrutor_id_para_filtro = opcoes_instrutores_filtro.get(instrutor_filtro_nome_sel)
+                filtros_treino = {
+                    "cliente_id": cliente_id_para_filtro,
+                    "instrutor_id": instrutor_id_para_filtro,
+                    "data_inicio_de": data_de_filtro.isoformat() if data_de_filtro else None,
+                    "data_inicio_ate": data_ate_filtro.isoformat() if data_ate_filtro else None,
+                }
+
+                # Paginação: só a página exibida é buscada no banco
+                total_treinos = database.count_workouts(**filtros_treino)
+                col_p1, col_p2 = st.columns(2)
+                with col_p1:
+                    treinos_por_pagina = st.selectbox("Treinos por página:", [10, 25, 50], key="treinos_por_pagina")
+                total_paginas_treinos = max(1, -(-total_treinos // treinos_por_pagina))
+                with col_p2:
+                    pagina_treinos = st.number_input("Página:", min_value=1, max_value=total_paginas_treinos, value=1, step=1, key="pagina_treinos")
 
                 # Buscar treinos com base nos filtros
                 treinos_encontrados_data = database.get_workouts_with_exercises(
-                    cliente_id=cliente_id_para_filtro, 
-                    instrutor_id=instrutor_id_para_filtro
+                    **filtros_treino,
+                    limit=treinos_por_pagina,
+                    offset=(pagina_treinos - 1) * treinos_por_pagina
                 ) 
 
                 if treinos_encontrados_data:
-                    st.write(f"Encontrados {len(treinos_encontrados_data)} treinos:")
+                    st.write(f"Encontrados {total_treinos} treinos (página {pagina_treinos} de {total_paginas_treinos}):")
                     for treino_idx, treino_info in enumerate(treinos_encontrados_data):
                         exp_label = f"**{treino_info.get('nome_treino', f'Treino ID: {treino_info.get('treino_id')}')}**"
                         if treino_info.get('cliente_nome'): exp_label += f" - Cliente: {treino_info['cliente_nome']}"
@@ -372,9 +445,10 @@ if st.session_state["authentication_status"]:
                             exercicios_deste_treino = treino_info.get('exercicios')
                             if exercicios_deste_treino:
                                 st.markdown("**Exercícios do Treino:**")
-                                df_ex = pd.DataFrame(exercicios_deste_treino)
-                                cols_ex_ver = ['ordem', 'exercicio_nome', 'series', 'repeticoes', 'carga', 'descanso_segundos', 'observacoes_exercicio']
-                                cols_ex_ver_existentes = [col for col in cols_ex_ver if col in df_ex.columns]
+                                with perfil_paginas.medir("dataframe"):
+                                    df_ex = pd.DataFrame(exercicios_deste_treino)
+                                    cols_ex_ver = ['ordem', 'exercicio_nome', 'series', 'repeticoes', 'carga', 'descanso_segundos', 'observacoes_exercicio']
+                                    cols_ex_ver_existentes = [col for col in cols_ex_ver if col in df_ex.columns]
                                 st.table(df_ex[cols_ex_ver_existentes])
                             else:
                                 st.info("Este treino não possui exercícios detalhados.")
@@ -388,9 +462,10 @@ if st.session_state["authentication_status"]:
             try:
                 instrutor_clientes_data = database.get_active_client_count_per_instructor() # Passa conn implicitamente
                 if instrutor_clientes_data:
-                    df_instrutor_clientes = pd.DataFrame(instrutor_clientes_data)
-                    col_instr_cli_display = ['instrutor_nome', 'instrutor_especialidade', 'numero_clientes_ativos']
-                    col_instr_cli_existentes = [col for col in col_instr_cli_display if col in df_instrutor_clientes.columns]
+                    with perfil_paginas.medir("dataframe"):
+                        df_instrutor_clientes = pd.DataFrame(instrutor_clientes_data)
+                        col_instr_cli_display = ['instrutor_nome', 'instrutor_especialidade', 'numero_clientes_ativos']
+                        col_instr_cli_existentes = [col for col in col_instr_cli_display if col in df_instrutor_clientes.columns]
                     st.dataframe(df_instrutor_clientes[col_instr_cli_existentes], use_container_width=True, hide_index=True)
                 else:
                     st.info("Nenhuma informação de clientes por instrutor disponível.")
@@ -514,55 +589,34 @@ if st.session_state["authentication_status"]:
                     elif not st.session_state.exercicios_para_treino_atual:
                         st.error("Adicione pelo menos um exercício à lista (Passo 2).")
                     else:
-                        novo_treino_id_db = database.add_treino(
+                        # Treino e exercícios gravados numa única transação: ou salva tudo, ou nada
+                        novo_treino_id_db = database.save_treino_with_exercises(
                         dados_treino_principal_final['nome_treino'],
                         dados_treino_principal_final['data_inicio'],
-                        cliente_id=dados_treino_principal_final.get('cliente_id'), # Exemplo, ajuste conforme seus dados
-                        instrutor_id=dados_treino_principal_final.get('instrutor_id'), # Exemplo
-                        plano_id=dados_treino_principal_final.get('plano_id'), # Exemplo
-                        data_fim=dados_treino_principal_final.get('data_fim'), # Exemplo
-                        objetivo=dados_treino_principal_final.get('objetivo'), # Exemplo
-                        tipo_treino=dados_treino_principal_final.get('tipo_treino'), # Exemplo
+                        st.session_state.exercicios_para_treino_atual,
+                        cliente_id=dados_treino_principal_final.get('cliente_id'),
+                        instrutor_id=dados_treino_principal_final.get('instrutor_id'),
+                        plano_id=dados_treino_principal_final.get('plano_id'),
+                        data_fim=dados_treino_principal_final.get('data_fim'),
+                        objetivo=dados_treino_principal_final.get('objetivo'),
+                        tipo_treino=dados_treino_principal_final.get('tipo_treino'),
                         descricao_treino=dados_treino_principal_final.get('descricao_treino')
-                        # Remova a linha: conn_externa=conn
                         )
                         if novo_treino_id_db:
-                            todos_ex_salvos_final_db = True
-                            for ex_info_final_db in st.session_state.exercicios_para_treino_atual:
-                                res_add_ex_final_db = database.add_exercise_to_treino(
-                                    novo_treino_id_db,
-                                    ex_info_final_db['exercicio_id'],
-                                    ex_info_final_db['series'],
-                                    ex_info_final_db['repeticoes'], # Certifique-se de que todos os argumentos posicionais e nomeados estão corretos
-                                    ex_info_final_db['carga'],
-                                    ex_info_final_db['descanso_segundos'],
-                                    ex_info_final_db['ordem'],
-                                    ex_info_final_db['observacoes_exercicio']
-                                    
-                            )
-                                if res_add_ex_final_db is None: 
-                                    todos_ex_salvos_final_db = False
-                                    st.error(f"Falha ao salvar o exercício '{ex_info_final_db['nome_exercicio']}' no treino ID {novo_treino_id_db}.")
-                                    break
-                            
-                            if todos_ex_salvos_final_db:
-                                st.success(f"Treino '{dados_treino_principal_final['nome_treino']}' e seus exercícios salvos com ID: {novo_treino_id_db}!")
-                                st.session_state.exercicios_para_treino_atual = []
-                                st.session_state.nome_treino_sendo_criado = ""
-                                st.session_state.dados_treino_principal_temp = {}
-                                st.session_state.proxima_ordem_exercicio = 1
-                                st.rerun()
-                            else:
-                                st.error(f"Alguns exercícios não puderam ser salvos. O treino principal foi criado (ID: {novo_treino_id_db}), mas pode estar incompleto.")
+                            st.success(f"Treino '{dados_treino_principal_final['nome_treino']}' e seus exercícios salvos com ID: {novo_treino_id_db}!")
+                            st.session_state.exercicios_para_treino_atual = []
+                            st.session_state.nome_treino_sendo_criado = ""
+                            st.session_state.dados_treino_principal_temp = {}
+                            st.session_state.proxima_ordem_exercicio = 1
+                            st.rerun()
                         else:
-                            st.error("Falha ao salvar os dados do treino principal.")
+                            st.error("Falha ao salvar o treino. Nenhum dado foi gravado; verifique os dados e tente novamente.")
 
         with tab_banco_exercicios:
             st.subheader("Banco Global de Exercícios")
             try:
-                exercicios_globais_data = database.get_all_exercises()
-                if exercicios_globais_data:
-                    df_ex_globais = pd.DataFrame(exercicios_globais_data)
+                df_ex_globais = database.get_all_exercises_frame()
+                if not df_ex_globais.empty:
                     st.dataframe(df_ex_globais[['id', 'nome', 'grupo_muscular']], use_container_width=True, hide_index=True)
                 else:
                     st.info("Nenhum exercício no banco global.")
@@ -579,7 +633,7 @@ if st.session_state["authentication_status"]:
                         if not form_nome_ex_g_val:
                             st.warning("Nome do exercício é obrigatório.")
                         else:
-                            novo_ex_g_id_db = database.add_exercise(form_nome_ex_g_val, form_grupo_musc_ex_g_val, conn_externa=conn)
+                            novo_ex_g_id_db = database.add_exercise(form_nome_ex_g_val, form_grupo_musc_ex_g_val)
                             if novo_ex_g_id_db:
                                 st.success(f"Exercício '{form_nome_ex_g_val}' adicionado ao banco global com ID: {novo_ex_g_id_db}!")
                                 st.rerun()
@@ -588,10 +642,11 @@ if st.session_state["authentication_status"]:
         
 
     elif pagina_atual == "Pagamentos":
+        import pandas as pd # Importação adiada: o Dashboard não usa pandas
         st.title("💳 Pagamentos")
         st.header("Gerenciamento de Pagamentos")
         
-        tab_ver_pagamentos, tab_registrar_pagamento = st.tabs(["Consultar Pagamentos", "Registrar Novo Pagamento"])
+        tab_ver_pagamentos, tab_registrar_pagamento, tab_receita = st.tabs(["Consultar Pagamentos", "Registrar Novo Pagamento", "Receita Mensal"])
         with tab_ver_pagamentos:
             st.subheader("Consultar Pagamentos de Clientes")
             try:
@@ -606,15 +661,21 @@ if st.session_state["authentication_status"]:
                     cliente_id_pag = op_cli_pag.get(cliente_nome_pag_sel) 
                     if cliente_id_pag:
                         st.markdown(f"#### Histórico de Pagamentos de: **{cliente_nome_pag_sel}**")
-                        pagamentos_cliente = database.get_pagamentos_by_client_id(cliente_id_pag)
-                        if pagamentos_cliente:
-                            df_pag = pd.DataFrame(pagamentos_cliente)
-                            df_pag['pago'] = df_pag['pago'].apply(lambda x: "Sim" if x == 1 else "Não")
+                        # Histórico e totais são independentes: as duas consultas rodam ao mesmo tempo
+                        with perfil_paginas.medir("dados"): # Rodam em outras threads, fora do observador do perfil
+                            dados_pag = database.fetch_concurrently({
+                                "historico": (database.get_pagamentos_by_client_id_frame, cliente_id_pag),
+                                "stats": (database.get_payment_stats_for_client, cliente_id_pag),
+                            })
+                        df_pag, stats_pag = dados_pag["historico"], dados_pag["stats"]
+                        with perfil_paginas.medir("dataframe"):
+                            if not df_pag.empty:
+                                df_pag['pago'] = df_pag['pago'].map({True: "Sim", False: "Não"})
+                        if not df_pag.empty:
                             st.dataframe(df_pag[['data_pagamento', 'valor', 'pago']], hide_index=True, use_container_width=True)
                         else:
                             st.info("Nenhum pagamento registrado para este cliente.")
 
-                        stats_pag = database.get_payment_stats_for_client(cliente_id_pag)
                         st.metric("Total Pago", f"R$ {stats_pag.get('total_pago', 0):.2f}")
                         if stats_pag.get('ultimo_pagamento_data'):
                             data_ult_pag = pd.to_datetime(stats_pag['ultimo_pagamento_data']).strftime('%d/%m/%Y') if stats_pag['ultimo_pagamento_data'] else "N/A"
@@ -659,14 +720,97 @@ if st.session_state["authentication_status"]:
                                 st.error("Falha ao registrar pagamento.")
                         else:
                             st.error("Cliente selecionado para pagamento não encontrado.")
+
+        with tab_receita:
+            st.subheader("Receita Mensal")
+            from src import relatorios # Importado só aqui: NumPy/pandas do relatório
+            periodos_receita = {"Últimos 6 meses": 6, "Últimos 12 meses": 12, "Últimos 24 meses": 24, "Todo o histórico": 0}
+            periodo_receita = st.selectbox("Período:", list(periodos_receita.keys()), index=1, key="sel_periodo_receita")
+            try:
+                # Meses fechados vêm do cache; só o mês atual é recalculado (após alguma escrita)
+                with perfil_paginas.medir("dataframe"):
+                    relatorio = relatorios.relatorio_receita(periodos_receita[periodo_receita])
+                por_mes = relatorio["por_mes"]
+                if por_mes.empty:
+                    st.info("Nenhum pagamento confirmado no período.")
+                else:
+                    receita_mes_atual = por_mes.loc[por_mes["mes"] == relatorio["mes_atual"], "receita"].sum()
+                    col_rec1, col_rec2 = st.columns(2)
+                    col_rec1.metric(f"Receita de {relatorio['mes_atual']} (parcial)", f"R$ {receita_mes_atual:,.2f}")
+                    col_rec2.metric("Receita no período", f"R$ {por_mes['receita'].sum():,.2f}")
+                    st.bar_chart(por_mes.set_index("mes")["receita"])
+
+                    col_plano, col_instrutor = st.columns(2)
+                    with col_plano:
+                        st.markdown("##### Por Plano")
+                        st.dataframe(relatorio["por_plano"], hide_index=True, use_container_width=True)
+                    with col_instrutor:
+                        st.markdown("##### Por Instrutor")
+                        st.dataframe(relatorio["por_instrutor"], hide_index=True, use_container_width=True)
+            except Exception as e:
+                st.error(f"Erro ao carregar o relatório de receita: {e}")
             
 
     elif pagina_atual == "Configurações Admin":
+        import pandas as pd # Importação adiada: o Dashboard não usa pandas
         st.title("⚙️ Configurações Administrativas")
         st.header("Painel do Administrador")
         if st.session_state.get("role_usuario") == "admin":
             st.write("Bem-vindo à área de configurações do administrador.")
             # ... (seu código para a página de Admin) ...
+
+            st.subheader("Desempenho das Consultas")
+            st.caption(f"Contado desde o início do processo (ou da última limpeza). "
+                       f"Consultas acima de {database.get_config_instrumentacao()['limite_lento_ms']:.0f} ms entram no log de lentas.")
+            criterios_ordem = {"Tempo total": "tempo_total_ms", "p95": "p95_ms", "Máximo": "max_ms",
+                               "Chamadas": "chamadas", "Erros": "erros", "Linhas": "linhas_total"}
+            col_ordem, col_limpar = st.columns([3, 1])
+            with col_ordem:
+                criterio_sel = st.selectbox("Ordenar por:", list(criterios_ordem.keys()), key="admin_ordem_consultas")
+            with col_limpar:
+                if st.button("Zerar estatísticas", key="admin_zerar_consultas"):
+                    database.limpar_query_stats()
+            stats_consultas = database.get_query_stats(criterios_ordem[criterio_sel], limite=20)
+            if stats_consultas:
+                df_consultas = pd.DataFrame(stats_consultas).drop(columns=["histograma"])
+                st.dataframe(df_consultas.round(2), use_container_width=True, hide_index=True)
+                query_hist_sel = st.selectbox("Histograma de latência:", [c["query"] for c in stats_consultas],
+                                              format_func=lambda q: q[:120], key="admin_hist_consulta")
+                histograma = next(c["histograma"] for c in stats_consultas if c["query"] == query_hist_sel)
+                st.bar_chart(pd.Series(histograma, name="execuções"))
+            else:
+                st.info("Nenhuma consulta registrada ainda.")
+
+            st.subheader("Consultas Lentas Recentes")
+            lentas = database.get_slow_queries()
+            if lentas:
+                st.dataframe(pd.DataFrame(lentas).drop(columns=["plano"]), use_container_width=True, hide_index=True)
+                for entrada in lentas[:10]:
+                    if entrada["plano"]:
+                        with st.expander(f"{entrada['quando']} · {entrada['duracao_ms']:.0f} ms · {entrada['funcao'] or entrada['origem']}"):
+                            st.code(entrada["query"], language="sql")
+                            st.code("\n".join(entrada["plano"]))
+            else:
+                st.info("Nenhuma consulta lenta registrada.")
+
+            st.subheader("Tempo por Página")
+            if perfil_paginas.ativo():
+                resumo_perfil = perfil_paginas.get_resumo()
+                if resumo_perfil:
+                    df_perfil = pd.DataFrame(resumo_perfil)
+                    st.dataframe(df_perfil.pivot(index="pagina", columns="etapa", values="p50_ms").round(1),
+                                 use_container_width=True)
+                    st.caption("p50 em ms por etapa. \"dados\" é o tempo dentro do banco; \"render\" é o restante da página.")
+                    with st.expander("Detalhes (média, p95, máximo)"):
+                        st.dataframe(df_perfil.round(1), use_container_width=True, hide_index=True)
+                for rerun_lento in perfil_paginas.get_piores_reruns():
+                    with st.expander(f"cProfile · {rerun_lento['pagina']} · {rerun_lento['total_ms']:.0f} ms · {rerun_lento['quando']}"):
+                        st.caption(rerun_lento["arquivo"])
+                        st.code(perfil_paginas.relatorio_pstats(rerun_lento["arquivo"]))
+                if st.button("Zerar tempos", key="admin_zerar_perfil"):
+                    perfil_paginas.limpar_perfil()
+            else:
+                st.info("Perfil desligado. Ative com perfil_paginas.ativo no config.yaml ou ACADEMIA_PERFIL=1.")
         else:
             st.error("Acesso Negado. Esta área é restrita a administradores.")
 
@@ -675,4 +819,7 @@ elif st.session_state["authentication_status"] is False:
     # O formulário de login já está visível acima por padrão
 elif st.session_state["authentication_status"] is None:
     st.warning('Por favor, insira seu nome de usuário e senha para acessar o sistema.')
-    # O formulário de login já está visível acima por padrão
\ No newline at end of file
+    # O formulário de login já está visível acima por padrão
+
+# --- Fim da execução: registra os tempos das etapas (se o perfil estiver ativo) ---
+perfil_paginas.finalizar_rerun()
@@ -0,0 +1,38 @@
+import os
+import sys
+import sqlite3
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "scripts")) # Mesmo esquema dos scripts de benchmark
+
+import setup_database # noqa: E402
+from src import database # noqa: E402
+
+@pytest.fixture
+def banco_esquema(tmp_path):
+    """Banco vazio com as tabelas de setup_database.criar_tabelas (sem migrações)."""
+    caminho = str(tmp_path / "academia_teste.db")
+    conn = sqlite3.connect(caminho)
+    try:
+        setup_database.criar_tabelas(conn)
+    finally:
+        conn.close()
+    return caminho
+
+@pytest.fixture(autouse=True)
+def isolar_database(tmp_path, monkeypatch):
+    """Pools e marcações de src.database novos a cada teste, longe do academia.db."""
+    monkeypatch.setattr(database, "DB_NAME", str(tmp_path / "sem_banco.db"))
+    monkeypatch.setattr(database, "_pool", None)
+    monkeypatch.setattr(database, "_pool_leitura", None)
+    monkeypatch.setattr(database, "_bancos_migrados", set())
+    monkeypatch.setattr(database, "_migracoes_falhas", {})
+    monkeypatch.setattr(database, "_tabelas_por_banco", {})
+    yield
+    for pool in (database._pool, database._pool_leitura):
+        if pool is not None:
+            pool.fechar_todas()
+    database.limpar_cache()
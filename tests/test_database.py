@@ -0,0 +1,115 @@
+import sqlite3
+import threading
+
+import pytest
+
+import setup_database
+from src import database
+
+def _versao(caminho):
+    conn = sqlite3.connect(caminho)
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+
+def test_migracoes_aplicadas_quando_o_setup_roda_depois_do_app(tmp_path, monkeypatch):
+    caminho = str(tmp_path / "academia_teste.db")
+    monkeypatch.setattr(database, "DB_NAME", caminho)
+    database.get_pool() # App aberto antes do setup: arquivo sem tabelas
+    assert _versao(caminho) == 0
+
+    conn = sqlite3.connect(caminho)
+    setup_database.criar_tabelas(conn)
+    conn.close()
+
+    database.get_pool()
+    assert _versao(caminho) == database.MIGRACOES[-1][0]
+
+def test_migracao_que_falha_nao_e_repetida_a_cada_consulta(banco_esquema, monkeypatch):
+    conn = sqlite3.connect(banco_esquema)
+    database.aplicar_migracoes(conn_externa=conn)
+    ultima = database.MIGRACOES[-1][0]
+    monkeypatch.setattr(database, "MIGRACOES", database.MIGRACOES + [(ultima + 1, "Sempre falha", ["CREATE TABLE clientes (id)"])])
+
+    comandos = []
+    conn.set_trace_callback(comandos.append)
+    assert database.aplicar_migracoes(conn_externa=conn) == ultima
+    assert "ANALYZE" not in comandos # Nenhuma migração aplicada: sem ANALYZE
+    conn.close()
+
+    chamadas = []
+    original = database.aplicar_migracoes
+    monkeypatch.setattr(database, "aplicar_migracoes", lambda **kw: chamadas.append(kw) or original(**kw))
+    monkeypatch.setattr(database, "DB_NAME", banco_esquema)
+    for _ in range(5):
+        database.count_total_clientes()
+    assert len(chamadas) == 1
+    assert database._migracoes_falhas == {banco_esquema: ultima + 1}
+
+def _pool(caminho, **opcoes):
+    return database.PoolConexoes(caminho, fabrica=lambda: sqlite3.connect(caminho, check_same_thread=False), **opcoes)
+
+def test_pool_nao_empresta_acima_do_maximo(tmp_path):
+    pool = _pool(str(tmp_path / "pool.db"), tamanho=1, maximo=2, timeout=0.05)
+    primeira, segunda = pool.obter(), pool.obter()
+    with pytest.raises(sqlite3.OperationalError):
+        pool.obter()
+    pool.devolver(primeira)
+    assert pool.obter() is primeira
+    assert pool.estatisticas()["emprestadas"] == 2
+    assert pool.estatisticas()["esgotado"] == 1
+    pool.devolver(segunda)
+
+def test_pool_espera_uma_devolucao(tmp_path):
+    pool = _pool(str(tmp_path / "pool.db"), tamanho=1, maximo=1, timeout=5)
+    conn = pool.obter()
+    threading.Timer(0.05, pool.devolver, (conn,)).start()
+    assert pool.obter() is conn
+    assert pool.estatisticas()["esperas"] == 1
+
+def test_conexao_devolvida_a_pool_substituido_e_fechada(banco_esquema, monkeypatch):
+    monkeypatch.setattr(database, "DB_NAME", banco_esquema)
+    antigo = database.get_pool()
+    with database.conexao_bd() as conn:
+        database.configurar_pool(3) # Ex: config.yaml alterado com a página aberta
+    assert database.get_pool() is not antigo
+    assert antigo.estatisticas()["livres"] == 0
+    with pytest.raises(sqlite3.ProgrammingError): # Cannot operate on a closed database
+        conn.execute("SELECT 1")
+
+def test_fila_escrita_sobrevive_a_erro_fora_do_sqlite(banco_esquema, monkeypatch):
+    monkeypatch.setattr(database, "DB_NAME", banco_esquema)
+    fila = database.FilaEscrita()
+    try:
+        with pytest.raises(OverflowError): # 2**70 não cabe num INTEGER do SQLite
+            fila.submeter("INSERT INTO planos (nome, preco_mensal, duracao_meses) VALUES (?, ?, ?)",
+                          ("Gigante", 10, 2**70)).result(timeout=5)
+        lastrowid = fila.submeter("INSERT INTO planos (nome, preco_mensal, duracao_meses) VALUES (?, ?, ?)",
+                                  ("Mensal", 100, 1)).result(timeout=5)
+        assert lastrowid is not None
+        conn = sqlite3.connect(banco_esquema, timeout=0) # Lock de escrita liberado para outros processos
+        conn.execute("INSERT INTO planos (nome, preco_mensal, duracao_meses) VALUES ('Anual', 900, 12)")
+        conn.commit()
+        conn.close()
+        assert fila.estatisticas()["erros"] == 1
+    finally:
+        fila.parar()
+
+@pytest.mark.parametrize("ate_versao", [2, None]) # Esquema parado na versão 2 (sem cliente_ultimo_treino) e completo
+def test_clientes_com_plano_atual_com_e_sem_cliente_ultimo_treino(banco_esquema, monkeypatch, ate_versao):
+    if ate_versao is not None:
+        monkeypatch.setattr(database, "MIGRACOES", [m for m in database.MIGRACOES if m[0] <= ate_versao])
+    monkeypatch.setattr(database, "DB_NAME", banco_esquema)
+    database.get_pool() # Aplica as migrações disponíveis
+    with database.conexao_bd() as conn:
+        conn.execute("INSERT INTO planos (id, nome, preco_mensal, duracao_meses) VALUES (1, 'Mensal', 100, 1)")
+        conn.execute("INSERT INTO clientes (id, nome, email, plano_id) VALUES (1, 'Ana', 'ana@teste.com', 1)")
+        conn.executemany("INSERT INTO treinos (cliente_id, plano_id, nome_treino, data_inicio) VALUES (1, 1, ?, ?)",
+                         [("Adaptação", "2025-01-01"), ("Hipertrofia", "2025-03-01")])
+        conn.commit()
+
+    clientes = database.get_clients_with_current_plan_info()
+    assert [(c["cliente_nome"], c["ultimo_treino_nome"]) for c in clientes] == [("Ana", "Hipertrofia")]
+    frame = database.get_clients_with_current_plan_info_frame()
+    assert frame["ultimo_treino_nome"].tolist() == ["Hipertrofia"]
@@ -0,0 +1,88 @@
+"""
+EXPLAIN QUERY PLAN das consultas do app num banco com o esquema completo
+(setup_database.criar_tabelas + migrações) e as estatísticas do planejador de
+uma academia com 100 mil clientes e 2,4 milhões de pagamentos, gravadas em
+sqlite_stat1. As tabelas ficam vazias: o plano escolhido depende só do esquema
+e das estatísticas, então os testes são rápidos e não variam com os dados.
+"""
+import sqlite3
+
+import pytest
+
+from src import database
+from src import relatorios
+
+ESTATISTICAS = [ # (tbl, idx, stat) do ANALYZE de um banco gerado por scripts/gerar_dados_sinteticos.py
+    ("clientes", "idx_clientes_instrutor", "100000 250"),
+    ("clientes", "idx_clientes_nome", "100000 112"),
+    ("clientes", "idx_clientes_plano", "100000 33334"),
+    ("clientes", "sqlite_autoindex_clientes_1", "100000 1"),
+    ("instrutores", "idx_instrutores_nome", "400 2"),
+    ("planos", "sqlite_autoindex_planos_1", "3 1"),
+    ("exercicios", "sqlite_autoindex_exercicios_1", "21 1"),
+    ("treinos", "idx_treinos_cliente_data", "299900 4 1 1 1 1 1"),
+    ("treinos", "idx_treinos_data", "299900 274"),
+    ("treinos", "idx_treinos_instrutor_data", "299900 750 2"),
+    ("treinos", "idx_treinos_nome", "299900 42843"),
+    ("treino_exercicio", "idx_treino_exercicio_treino_ordem", "1799772 7 1"),
+    ("pagamentos", "idx_pagamentos_cliente_pago_data", "2400001 25 14 1 1"),
+    ("pagamentos", "idx_pagamentos_data", "2400001 2192 1096 1 1"),
+    ("pagamentos", "idx_pagamentos_pago", "2400001 1200001"),
+    ("cliente_ultimo_treino", "cliente_ultimo_treino", "94965 1"),
+    ("dashboard_stats", "dashboard_stats", "3 1"),
+    ("dashboard_clientes_plano", None, "3"),
+]
+
+@pytest.fixture
+def banco_planos(banco_esquema, monkeypatch):
+    conn = sqlite3.connect(banco_esquema)
+    try:
+        database.aplicar_migracoes(conn_externa=conn)
+        conn.execute("DELETE FROM sqlite_stat1")
+        conn.executemany("INSERT INTO sqlite_stat1 (tbl, idx, stat) VALUES (?, ?, ?)", ESTATISTICAS)
+        conn.commit()
+    finally:
+        conn.close()
+    monkeypatch.setattr(database, "DB_NAME", banco_esquema)
+    database.configurar_banco({}) # Conexões novas: as estatísticas são lidas ao abrir
+    return banco_esquema
+
+def _plano(caminho, query, params=()):
+    conn = sqlite3.connect(caminho)
+    try:
+        return [linha[3] for linha in conn.execute("EXPLAIN QUERY PLAN " + query, params)]
+    finally:
+        conn.close()
+
+def _formatar(problemas):
+    return "\n".join(f"{p['funcao']}: {p['plano']}\n    {p['query']}" for p in problemas)
+
+def test_leituras_sem_varredura_fora_da_lista_permitida(banco_planos):
+    problemas = database.verificar_planos_de_consulta()
+    assert not problemas, "Varreduras fora de database.SCANS_PERMITIDOS:\n" + _formatar(problemas)
+
+def test_verificacao_detecta_indice_removido(banco_planos):
+    conn = sqlite3.connect(banco_planos)
+    conn.execute("DROP INDEX idx_pagamentos_cliente_pago_data")
+    conn.commit()
+    conn.close()
+
+    problemas = database.verificar_planos_de_consulta()
+    assert {"get_pagamentos_by_client_id(cliente_id)", "get_payment_stats_for_client(cliente_id)"} <= {
+        p["funcao"] for p in problemas if p["tabela"] == "pagamentos"
+    }
+
+def test_scans_permitidos_documentados():
+    for (leitura, tabela), motivo in database.SCANS_PERMITIDOS.items():
+        assert leitura and tabela and motivo.strip(), (leitura, tabela)
+
+def test_receita_do_periodo_usa_indice_por_data(banco_planos):
+    plano = _plano(banco_planos, relatorios.QUERY_PAGAMENTOS_PERIODO, ("2025-01-01", "2025-02-01"))
+    assert any(linha.startswith("SEARCH p USING COVERING INDEX idx_pagamentos_data") for linha in plano), plano
+    assert not any(linha.startswith("SCAN") for linha in plano), plano
+
+def test_inadimplencia_le_pagamentos_pelo_indice_do_cliente(banco_planos):
+    # O job percorre todos os clientes de propósito; os pagamentos de cada um vêm do índice
+    plano = _plano(banco_planos, relatorios.QUERY_SALDO_CLIENTES)
+    assert [linha for linha in plano if linha.startswith("SCAN")] == ["SCAN c"], plano
+    assert any("idx_pagamentos_cliente_pago_data" in linha for linha in plano), plano
@@ -0,0 +1,62 @@
+import shutil
+import sqlite3
+from datetime import date
+
+import pytest
+
+from src import database
+from src import relatorios
+
+HOJE = date(2025, 4, 15)
+
+@pytest.fixture
+def banco_receita(banco_esquema, monkeypatch):
+    conn = sqlite3.connect(banco_esquema)
+    try:
+        database.aplicar_migracoes(conn_externa=conn)
+        conn.execute("INSERT INTO planos (id, nome, preco_mensal, duracao_meses) VALUES (1, 'Mensal', 100, 1)")
+        conn.execute("INSERT INTO clientes (id, nome, email, telefone, plano_id) VALUES (1, 'Ana', 'ana@teste.com', '1111', 1)")
+        conn.executemany("INSERT INTO pagamentos (cliente_id, data_pagamento, valor, pago) VALUES (1, ?, ?, 1)",
+                         [("2025-01-05", 100), ("2025-02-05", 100), ("2025-03-05", 150), ("2025-04-05", 100)])
+        conn.commit()
+    finally:
+        conn.close()
+    monkeypatch.setattr(database, "DB_NAME", banco_esquema)
+    monkeypatch.setattr(database, "_config_leitura", dict(database._config_leitura))
+    monkeypatch.setattr(relatorios, "_cache_fechados", {})
+    monkeypatch.setattr(relatorios, "_cache_aberto", {})
+    return banco_esquema
+
+def _receita_por_mes(df):
+    return df.groupby("mes")["receita"].sum().to_dict()
+
+def _meses_fechados(caminho):
+    conn = sqlite3.connect(caminho)
+    try:
+        return dict(conn.execute("SELECT mes, calculado_em FROM receita_meses_fechados").fetchall())
+    finally:
+        conn.close()
+
+def test_meses_fechados_lidos_no_principal_com_replica_atrasada(banco_receita, tmp_path, monkeypatch):
+    replica = str(tmp_path / "replica.db")
+    shutil.copyfile(banco_receita, replica) # Cópia de antes do fechamento: receita_meses_fechados vazia
+    database.configurar_leitura(replica=replica)
+
+    fechamentos = []
+    original = relatorios._fechar_meses
+    monkeypatch.setattr(relatorios, "_fechar_meses", lambda meses, conn: fechamentos.append(meses) or original(meses, conn))
+    for _ in range(2):
+        df = relatorios.receita_mensal(HOJE)
+    assert fechamentos == [["2025-01", "2025-02", "2025-03"]]
+    assert _receita_por_mes(df) == {"2025-01": 100, "2025-02": 100, "2025-03": 150, "2025-04": 100}
+
+def test_leitura_que_falha_nao_fecha_o_mes_com_receita_zero(banco_receita, monkeypatch):
+    query = relatorios.QUERY_PAGAMENTOS_PERIODO
+    monkeypatch.setattr(relatorios, "QUERY_PAGAMENTOS_PERIODO", "SELECT mes FROM tabela_inexistente WHERE ? < ?")
+    assert relatorios.receita_mensal(HOJE).empty
+    assert _meses_fechados(banco_receita) == {}
+    assert relatorios._cache_fechados == {}
+
+    monkeypatch.setattr(relatorios, "QUERY_PAGAMENTOS_PERIODO", query)
+    assert _receita_por_mes(relatorios.receita_mensal(HOJE))["2025-03"] == 150
+    assert set(_meses_fechados(banco_receita)) == {"2025-01", "2025-02", "2025-03"}
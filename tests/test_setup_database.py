@@ -0,0 +1,79 @@
+import sqlite3
+
+import pandas as pd
+
+import setup_database
+from src import database
+
+COLUNAS_CLIENTES = ["id", "nome", "email", "telefone", "plano_id"]
+
+def _gravar_clientes(pasta, linhas):
+    pd.DataFrame(linhas, columns=COLUNAS_CLIENTES).to_csv(pasta / "clientes_academia.csv", index=False)
+
+def _ids_por_email(conn):
+    return dict(conn.execute("SELECT email, id FROM clientes").fetchall())
+
+def test_reimportar_csv_com_ids_em_outra_ordem_preserva_ids(banco_esquema, tmp_path, monkeypatch):
+    monkeypatch.setattr(setup_database, "DATA_FOLDER", str(tmp_path))
+    conn = sqlite3.connect(banco_esquema)
+    conn.isolation_level = None # Como no --incremental: a função controla as transações
+    try:
+        _gravar_clientes(tmp_path, [
+            (1, "Ana", "ana@teste.com", "1111", 1),
+            (2, "Bruno", "bruno@teste.com", "2222", 2),
+            (3, "Carla", "carla@teste.com", "3333", 1),
+        ])
+        assert setup_database.importar_csv_incremental(conn, "clientes", "clientes_academia.csv") is not None
+        ids = _ids_por_email(conn)
+        conn.execute("INSERT INTO pagamentos (cliente_id, data_pagamento, valor, pago) VALUES (?, '2025-01-05', 100, 1)",
+                     (ids["ana@teste.com"],))
+
+        # Mesmo cadastro exportado em outra ordem: os ids do CSV agora apontam para outras pessoas
+        _gravar_clientes(tmp_path, [
+            (1, "Carla", "carla@teste.com", "3333", 1),
+            (2, "Bruno", "bruno@teste.com", "9999", 2),
+            (3, "Ana", "ana@teste.com", "1111", 1),
+            (4, "Davi", "davi@teste.com", "4444", 3),
+        ])
+        resultado = setup_database.importar_csv_incremental(conn, "clientes", "clientes_academia.csv", forcar=True)
+
+        assert resultado == {"inseridas": 1, "atualizadas": 1, "pulado": False}
+        novos_ids = _ids_por_email(conn)
+        assert {email: novos_ids[email] for email in ids} == ids
+        assert novos_ids["davi@teste.com"] not in ids.values()
+        assert conn.execute("SELECT telefone FROM clientes WHERE email = 'bruno@teste.com'").fetchone()[0] == "9999"
+        assert conn.execute(
+            "SELECT c.nome FROM pagamentos p JOIN clientes c ON c.id = p.cliente_id"
+        ).fetchone()[0] == "Ana"
+    finally:
+        conn.close()
+
+def test_streaming_com_recriar_indices_mantem_indice_dos_triggers(banco_esquema, tmp_path, monkeypatch):
+    monkeypatch.setattr(setup_database, "DATA_FOLDER", str(tmp_path))
+    pd.DataFrame({
+        "cliente_id": [1, 1, 2],
+        "nome_treino": ["Adaptação", "Hipertrofia", "Força"],
+        "data_inicio": ["2025-01-01", "2025-03-01", "2025-02-01"],
+    }).to_csv(tmp_path / "treinos.csv", index=False)
+    conn = sqlite3.connect(banco_esquema)
+    conn.isolation_level = None
+    try:
+        database.aplicar_migracoes(conn_externa=conn) # trg_ultimo_treino_* leem treinos por cliente_id
+        conn.executemany("INSERT INTO clientes (id, nome, email) VALUES (?, ?, ?)",
+                         [(1, "Ana", "ana@teste.com"), (2, "Bruno", "bruno@teste.com")])
+        comandos = []
+        conn.set_trace_callback(comandos.append)
+        stats = setup_database.importar_csv_streaming(conn, "treinos", "treinos.csv", recriar_indices=True)
+        conn.set_trace_callback(None)
+
+        assert stats["linhas"] == 3
+        removidos = {comando.split()[-1] for comando in comandos if comando.startswith("DROP INDEX")}
+        assert "idx_treinos_data" in removidos
+        assert "idx_treinos_cliente_data" not in removidos
+        indices = {linha[0] for linha in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'treinos'")}
+        assert removidos <= indices # Recriados no final
+        assert dict(conn.execute(
+            "SELECT ut.cliente_id, t.nome_treino FROM cliente_ultimo_treino ut JOIN treinos t ON t.id = ut.treino_id"
+        ).fetchall()) == {1: "Hipertrofia", 2: "Força"}
+    finally:
+        conn.close()